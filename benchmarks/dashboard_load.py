@@ -0,0 +1,114 @@
+"""
+DASHBOARD LOAD TEST
+Measures request latency of a running dashboard under concurrency.
+
+Usage:
+    python3 machinery_dashboard.py --production &
+    python3 benchmarks/dashboard_load.py --concurrency 32 --requests 2000
+
+Reports p50/p90/p99/max latency and throughput per endpoint, and can write
+the numbers as JSON (--output) for comparison between commits.
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+DEFAULT_PATHS = ['/', '/api/status', '/api/runs']
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_load_test(base_url, paths, total_requests, concurrency, timeout=30):
+    """Fire total_requests GETs spread round-robin over paths; return per-path stats"""
+    local = threading.local()
+    latencies = {path: [] for path in paths}
+    errors = {path: 0 for path in paths}
+    lock = threading.Lock()
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    def one_request(i):
+        path = paths[i % len(paths)]
+        start = time.perf_counter()
+        try:
+            response = session().get(base_url + path, timeout=timeout)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies[path].append(elapsed)
+            else:
+                errors[path] += 1
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(total_requests)))
+    wall = time.perf_counter() - wall_start
+
+    report = {
+        'base_url': base_url,
+        'concurrency': concurrency,
+        'total_requests': total_requests,
+        'wall_seconds': round(wall, 3),
+        'requests_per_second': round(total_requests / wall, 1) if wall else 0.0,
+        'endpoints': {}
+    }
+    for path in paths:
+        values = sorted(latencies[path])
+        report['endpoints'][path] = {
+            'ok': len(values),
+            'errors': errors[path],
+            'mean_ms': round(statistics.mean(values) * 1000, 2) if values else None,
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p90_ms': round(percentile(values, 90) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2) if values else None
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard latency under concurrency")
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--path', action='append', dest='paths',
+                        help="Endpoint to hit (repeatable); defaults to the page, status and runs list")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--output', help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    report = run_load_test(args.url.rstrip('/'), args.paths or DEFAULT_PATHS, args.requests, args.concurrency)
+
+    print(f"\n{args.requests} requests, concurrency {args.concurrency}: "
+          f"{report['requests_per_second']} req/s over {report['wall_seconds']}s")
+    print(f"{'endpoint':<40} {'ok':>6} {'err':>5} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+    for path, stats in report['endpoints'].items():
+        print(f"{path:<40} {stats['ok']:>6} {stats['errors']:>5} "
+              f"{stats['p50_ms']:>7}ms {stats['p90_ms']:>7}ms {stats['p99_ms']:>7}ms {stats['max_ms'] or 0:>7}ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+FAKE MESSAGE BATCHES ENDPOINT
+Local HTTP server speaking the Message Batches part of the Anthropic API,
+so bulk profiling (machinery_bulk.py) runs against it with the real SDK:
+
+    ANTHROPIC_BASE_URL=http://127.0.0.1:<port> python3 machinery_bulk.py submit
+
+    POST /v1/messages/batches                 create a job
+    GET  /v1/messages/batches/<id>            job status
+    GET  /v1/messages/batches/<id>/results    .jsonl results once ended
+
+Each request is answered like FakeAnthropicClient answers messages.create
+(deterministic profiles, cut off at max_tokens). A job ends after
+processing_seconds; every error_every-th request comes back errored. Jobs
+live in the server, so a client can restart and resume polling them.
+"""
+
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from fake_llm import FakeAnthropicClient
+
+
+def iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def message_json(message):
+    """FakeAnthropicClient response as the API's Message JSON"""
+    return {
+        'id': f"msg_{uuid.uuid4().hex[:24]}",
+        'type': 'message',
+        'role': 'assistant',
+        'model': message.model,
+        'content': [{'type': 'text', 'text': block.text} for block in message.content],
+        'stop_reason': message.stop_reason,
+        'stop_sequence': None,
+        'usage': {'input_tokens': message.usage.input_tokens, 'output_tokens': message.usage.output_tokens}
+    }
+
+
+class FakeBatchServer:
+    """Threaded HTTP server on 127.0.0.1 with an in-memory Message Batches API
+
+    processing_seconds: time from creation until a job has ended
+    error_every: answer every Nth request of a job with an error (0 = never)
+    """
+
+    def __init__(self, port=0, processing_seconds=0.0, error_every=0):
+        self.processing_seconds = processing_seconds
+        self.error_every = error_every
+        self.jobs = {}
+        self.created = 0
+        self._client = FakeAnthropicClient()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.split('?')[0].rstrip('/') != '/v1/messages/batches':
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                self.send_json(server.create(body.get('requests', [])))
+
+            def do_GET(self):
+                parts = self.path.split('?')[0].strip('/').split('/')
+                if parts[:3] != ['v1', 'messages', 'batches'] or len(parts) not in (4, 5):
+                    self.send_error(404)
+                    return
+                job = server.jobs.get(parts[3])
+                if job is None:
+                    self.send_json({'type': 'error', 'error': {'type': 'not_found_error',
+                                                               'message': f"No batch {parts[3]}"}}, 404)
+                elif len(parts) == 4:
+                    self.send_json(server.status(job, f"http://{self.headers.get('Host')}"))
+                elif parts[4] == 'results' and server.ended(job):
+                    body = ''.join(json.dumps(line) + '\n' for line in job['results']).encode('utf-8')
+                    self.send_bytes(body, 'application/binary')
+                else:
+                    self.send_error(404)
+
+            def send_json(self, value, status=200):
+                self.send_bytes(json.dumps(value).encode('utf-8'), 'application/json', status)
+
+            def send_bytes(self, body, content_type, status=200):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    def create(self, requests):
+        """Answer every request up front; the job only reports them once it has ended"""
+        results = []
+        for number, request in enumerate(requests, 1):
+            if self.error_every and number % self.error_every == 0:
+                result = {'type': 'errored', 'error': {'type': 'error', 'error': {
+                    'type': 'api_error', 'message': "Fake batch request error (error_every)"}}}
+            else:
+                result = {'type': 'succeeded',
+                          'message': message_json(self._client.messages.create(**request['params']))}
+            results.append({'custom_id': request['custom_id'], 'result': result})
+        with self._lock:
+            self.created += 1
+            job = {'id': f"msgbatch_{uuid.uuid4().hex[:24]}", 'created': time.time(), 'results': results}
+            self.jobs[job['id']] = job
+        return self.status(job, self.base_url)
+
+    def ended(self, job):
+        return time.time() >= job['created'] + self.processing_seconds
+
+    def status(self, job, base_url):
+        ended = self.ended(job)
+        counts = {'processing': 0 if ended else len(job['results']),
+                  'succeeded': 0, 'errored': 0, 'canceled': 0, 'expired': 0}
+        if ended:
+            for line in job['results']:
+                counts[line['result']['type']] += 1
+        return {
+            'id': job['id'],
+            'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': counts,
+            'created_at': iso(job['created']),
+            'expires_at': iso(job['created'] + timedelta(hours=24).total_seconds()),
+            'ended_at': iso(job['created'] + self.processing_seconds) if ended else None,
+            'archived_at': None,
+            'cancel_initiated_at': None,
+            'results_url': f"{base_url}/v1/messages/batches/{job['id']}/results" if ended else None
+        }
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake Message Batches endpoint")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--processing-seconds', type=float, default=30.0)
+    parser.add_argument('--error-every', type=int, default=0)
+    args = parser.parse_args()
+    with FakeBatchServer(args.port, args.processing_seconds, args.error_every) as fake:
+        print(f"Fake batches endpoint on {fake.base_url} (export ANTHROPIC_BASE_URL={fake.base_url})")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,141 @@
+"""
+FAKE ANTHROPIC CLIENT
+Stands in for anthropic.Anthropic in benchmarks: returns deterministic
+provider profiles for the providers named in the prompt, after a
+configurable latency, with token usage like the real API. messages.stream
+delivers the same answer in small text chunks.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+
+TIERS = ['budget', 'mid', 'premium']
+TECHNOLOGIES = ['injection molding', 'extrusion', 'blow molding', 'thermoforming', 'compression molding',
+                'recycling', 'film extrusion', 'rotomolding']
+REGIONS = ['EU', 'Eastern Europe', 'Global', 'Asia', 'North America']
+
+
+def parse_providers(prompt):
+    """Provider records embedded after 'PROVIDERS:' in a profiling prompt"""
+    start = prompt.find('PROVIDERS:')
+    if start < 0:
+        return []
+    start = prompt.find('[', start)
+    try:
+        providers, _ = json.JSONDecoder().raw_decode(prompt[start:])
+    except ValueError:
+        return []
+    return [p for p in providers if isinstance(p, dict)]
+
+
+def fake_profile(name, country=''):
+    """Deterministic provider profile derived from the provider name"""
+    digest = hashlib.sha256(name.encode('utf-8')).digest()
+    techs = [TECHNOLOGIES[digest[1] % len(TECHNOLOGIES)]]
+    if digest[2] % 2:
+        techs.append(TECHNOLOGIES[digest[3] % len(TECHNOLOGIES)])
+    regions = ['EU'] if digest[4] % 3 else ['Global']
+    if digest[5] % 2:
+        regions.append(REGIONS[digest[6] % len(REGIONS)])
+    tier = TIERS[digest[0] % len(TIERS)]
+    return {
+        'name': name,
+        'country': country,
+        'tier': tier,
+        'technologies': sorted(set(techs)),
+        'ideal_revenue_range': {'budget': '€1-10 million', 'mid': '€5-30 million', 'premium': '€30+ million'}[tier],
+        'ideal_regions': sorted(set(regions)),
+        'processes': sorted(set(techs)),
+        'company_size_focus': {'budget': ['small'], 'mid': ['small', 'medium'], 'premium': ['medium', 'large']}[tier],
+        'key_strengths': ['Reliable machines', 'Service network', 'Energy efficiency'],
+        'ideal_for': f"{tier.capitalize()} {techs[0]} producers"
+    }
+
+
+class _Messages:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, model=None, max_tokens=1024, messages=None, **kwargs):
+        client = self._client
+        prompt = ''.join(m['content'] for m in messages or [] if isinstance(m.get('content'), str))
+
+        with client._lock:
+            client.calls += 1
+            fail = client.fail_every and client.calls % client.fail_every == 0
+        if client.latency:
+            time.sleep(client.latency)
+        if fail:
+            raise RuntimeError("Fake API error (fail_every)")
+
+        profiles = [fake_profile(p.get('name', ''), p.get('country', '')) for p in parse_providers(prompt)]
+
+        text = "Here are the provider profiles:\n" + json.dumps(profiles, indent=1)
+        if client.malformed_every:
+            # A missing comma after the name: that one object no longer parses
+            entries = [json.dumps(profile, indent=1) for profile in profiles]
+            entries = [entry.replace('",\n "country"', '"\n "country"', 1) if number % client.malformed_every == 0
+                       else entry for number, entry in enumerate(entries, 1)]
+            text = "Here are the provider profiles:\n[\n" + ",\n".join(entries) + "\n]"
+        output_tokens = len(text) // 4
+        stop_reason = 'end_turn'
+        if output_tokens > max_tokens:
+            text = text[:max_tokens * 4]
+            output_tokens = max_tokens
+            stop_reason = 'max_tokens'
+
+        return SimpleNamespace(
+            content=[SimpleNamespace(type='text', text=text)],
+            usage=SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=output_tokens),
+            stop_reason=stop_reason,
+            model=model
+        )
+
+    def stream(self, **kwargs):
+        return _MessageStream(self.create(**kwargs), self._client.chunk_chars)
+
+
+class _MessageStream:
+    """Context manager like the SDK's MessageStream: text_stream, then get_final_message()"""
+
+    def __init__(self, message, chunk_chars):
+        self._message = message
+        self._chunk_chars = chunk_chars
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        text = self._message.content[0].text
+        for start in range(0, len(text), self._chunk_chars):
+            yield text[start:start + self._chunk_chars]
+
+    def get_final_message(self):
+        return self._message
+
+
+class FakeAnthropicClient:
+    """Drop-in for anthropic.Anthropic(...) as used by FastMachineryMatcher
+
+    latency: seconds per messages.create call
+    fail_every: raise on every Nth call (0 = never), to exercise fallbacks
+    malformed_every: break the JSON of every Nth profile in an answer (0 = never)
+    chunk_chars: characters per streamed text chunk
+    """
+
+    def __init__(self, latency=0.0, fail_every=0, malformed_every=0, chunk_chars=64):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.malformed_every = malformed_every
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.messages = _Messages(self)
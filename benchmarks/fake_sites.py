@@ -0,0 +1,114 @@
+"""
+FAKE PROSPECT WEBSITES
+Local HTTP server serving deterministic prospect homepages, so website
+enrichment can be benchmarked offline and reproducibly.
+
+    /site/<n>             homepage of prospect n
+    /site/<n>/<page>      sub-pages (equipment, machinery, about, technology, contact)
+
+Pages carry nav/script/style/footer noise, filler text and machinery brand
+mentions chosen from the prospect number (at the top of equipment/machinery
+pages, mid-page on homepages). Responses have an ETag and
+conditional requests get 304 Not Modified.
+"""
+
+import hashlib
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+BRANDS = ['ENGEL', 'Arburg', 'KraussMaffei', 'Sumitomo Demag', 'Husky', 'Wittmann Battenfeld',
+          'Haitian', 'Negri Bossi', 'Netstal', 'BOY', 'Yizumi', 'Chen Hsong']
+SUB_PAGES = ['equipment', 'machinery', 'about', 'technology', 'contact']
+FILLER = ("We are a family-owned manufacturer of technical plastic parts serving the automotive, "
+          "packaging and household industries with certified quality and on-time delivery. ")
+
+
+def page_html(site, page='', filler_kb=20):
+    """Deterministic HTML for one page of one prospect site"""
+    digest = hashlib.sha256(f"{site}/{page}".encode('utf-8')).digest()
+    links = ''.join(f'<li><a href="/site/{site}/{p}">{p.capitalize()}</a></li>' for p in SUB_PAGES)
+
+    brand_text = ''
+    if page in ('equipment', 'machinery') or (not page and digest[0] % 3 == 0):
+        brands = [BRANDS[b % len(BRANDS)] for b in digest[1:1 + 1 + digest[2] % 3]]
+        brand_text = (f"<h2>Our machine park</h2><p>Our equipment includes "
+                      f"{', '.join(brands)} injection moulding machines.</p>")
+
+    filler = FILLER * max(1, filler_kb * 1024 // len(FILLER))
+    return (
+        "<!DOCTYPE html><html><head><title>Prospect</title>"
+        "<style>body{font-family:sans-serif}.x{color:red}</style>"
+        "<script>var tracking = {id: 'UA-000', brands: 'ENGEL Arburg Husky'};</script>"
+        f"</head><body><nav><ul>{links}</ul></nav>"
+        f"<main><h1>Prospect {site}</h1>{brand_text if page else ''}<p>{filler[:len(filler) // 2]}</p>"
+        f"{'' if page else brand_text}<p>{filler[len(filler) // 2:]}</p></main>"
+        "<footer>Contact · Imprint · Privacy · ENGEL partner network</footer></body></html>"
+    )
+
+
+class FakeSiteServer:
+    """Threaded HTTP server on 127.0.0.1 serving fake prospect websites
+
+    latency: seconds added to each response
+    filler_kb: approximate page size
+    """
+
+    def __init__(self, port=0, latency=0.0, filler_kb=20):
+        self.latency = latency
+        self.filler_kb = filler_kb
+        self.requests = 0
+        self.not_modified = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                parts = self.path.strip('/').split('/')
+                if len(parts) < 2 or parts[0] != 'site' or not parts[1].isdigit():
+                    self.send_error(404)
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                body = page_html(int(parts[1]), parts[2] if len(parts) > 2 else '', server.filler_kb).encode('utf-8')
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
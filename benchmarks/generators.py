@@ -0,0 +1,93 @@
+"""
+SYNTHETIC DATA GENERATORS
+Deterministic prospect CSVs and K2025-style exhibitor lists for benchmarks.
+
+The same (rows, seed) always produces the same file, so timings are
+comparable across commits.
+"""
+
+import csv
+import random
+
+
+COUNTRIES = ['RO', 'DE', 'IT', 'PL', 'FR', 'ES', 'AT', 'HU', 'CZ', 'NL', 'TR', 'US', 'CN', 'UA']
+COUNTRY_WEIGHTS = [30, 15, 10, 8, 6, 5, 4, 4, 4, 3, 4, 3, 2, 2]
+
+NAME_PREFIXES = ['Plast', 'Poly', 'Tehno', 'Euro', 'Inter', 'Flex', 'Pro', 'Nova', 'Mega', 'Alfa',
+                 'Omni', 'Terra', 'Vita', 'Delta', 'Meta', 'Duo', 'Star', 'Prima']
+NAME_SUFFIXES = ['pack', 'form', 'mold', 'tech', 'plast', 'tub', 'film', 'flex', 'line', 'pro']
+LEGAL_FORMS = ['SRL', 'SA', 'GmbH', 'SpA', 'Sp. z o.o.', 'SAS', 'S.L.', 'Kft', 's.r.o.', 'BV']
+PROCESS_WORDS = ['injection molding', 'blown film', 'pipe extrusion', 'PET preform', 'thermoforming',
+                 'compounding', 'rotomolding', 'recycling', 'packaging', 'automotive parts']
+
+EXHIBITOR_STEMS = ['Engel', 'Arburg', 'Krauss', 'Demag', 'Husky', 'Wittmann', 'Negri', 'Haitian', 'Chen',
+                   'Yizumi', 'Netstal', 'Sacmi', 'Battenfeld', 'Boy', 'Nissei', 'Milacron', 'Tederic',
+                   'Borch', 'Windsor', 'Sandretto', 'Reifen', 'Coperion', 'Kautex', 'Illig', 'Kiefel']
+EXHIBITOR_FORMS = ['GmbH', 'AG', 'SpA', 'Ltd', 'Inc', 'Co KG', 'Machinery Co', 'Holdings', 'Group']
+EXHIBITOR_COUNTRIES = ['Germany', 'Austria', 'Italy', 'China', 'Japan', 'Canada', 'USA', 'Switzerland',
+                       'Taiwan', 'India', 'France', 'Spain']
+PRODUCT_GROUPS = ['Injection moulding machines', 'Extrusion lines', 'Blow moulding machines',
+                  'Thermoforming machines', 'Robots and automation', 'Recycling machines',
+                  'Compounding extruders', 'Film lines', 'Moulds', 'Peripheral equipment']
+
+
+def company_name(rng, index):
+    """Unique, plausible-looking company name"""
+    return f"{rng.choice(NAME_PREFIXES)}{rng.choice(NAME_SUFFIXES).capitalize()} {index} {rng.choice(LEGAL_FORMS)}"
+
+
+def generate_prospect_rows(rows, seed=42, site_base_url=None, website_ratio=0.8):
+    """Yield prospect rows with the Firma/Web1/Jud/Cifra2024EUR columns of the real export
+
+    site_base_url: when set, websites point at the fake site server (e.g.
+    http://127.0.0.1:8765) so enrichment can run offline.
+    """
+    rng = random.Random(seed)
+    for i in range(rows):
+        if rng.random() < website_ratio:
+            if site_base_url:
+                website = f"{site_base_url}/site/{i}"
+            else:
+                website = f"https://www.prospect-{i}.example"
+        else:
+            website = '-'
+
+        # Log-normal revenue: many small firms, a long tail of large ones
+        revenue = round(min(rng.lognormvariate(15.2, 1.6), 2_000_000_000), 2)
+
+        yield {
+            'Firma': company_name(rng, i),
+            'Web1': website,
+            'Jud': rng.choices(COUNTRIES, COUNTRY_WEIGHTS)[0],
+            'Cifra2024EUR': revenue,
+            'Activitate': ', '.join(rng.sample(PROCESS_WORDS, rng.randint(1, 3)))
+        }
+
+
+def write_prospects_csv(path, rows, seed=42, site_base_url=None):
+    """Write a synthetic prospect CSV (utf-8-sig, like the real export)"""
+    fieldnames = ['Firma', 'Web1', 'Jud', 'Cifra2024EUR', 'Activitate']
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in generate_prospect_rows(rows, seed, site_base_url):
+            writer.writerow(row)
+    return path
+
+
+def generate_exhibitors(count, seed=7):
+    """K2025-style exhibitor records (name, url, hall, stand, country, products)"""
+    rng = random.Random(seed)
+    exhibitors = []
+    for i in range(count):
+        stem = EXHIBITOR_STEMS[i % len(EXHIBITOR_STEMS)]
+        name = f"{stem} {rng.choice(EXHIBITOR_FORMS)} {i}"
+        exhibitors.append({
+            'name': name,
+            'url': f"https://www.k-online.com/vis/v1/en/exhprofiles/{100000 + i}",
+            'hall': str(rng.randint(1, 17)),
+            'stand': f"{rng.choice('ABCDEFGH')}{rng.randint(1, 80):02d}",
+            'country': rng.choice(EXHIBITOR_COUNTRIES),
+            'products': rng.sample(PRODUCT_GROUPS, rng.randint(1, 4))
+        })
+    return exhibitors
@@ -0,0 +1,199 @@
+"""
+MACHINERY MATCHER BENCHMARKS
+Times each pipeline stage on synthetic data, fully offline:
+
+    ingestion    read + filter the prospect CSV
+    enrichment   analyze_prospects_batch, fast path (all rows)
+    scraping     analyze_prospects_batch with website detection against the
+                 local fake site server (first --scrape-rows rows)
+    profiling    _analyze_provider_profiles with the fake LLM client
+    scoring      smart_match_analysis on the precomputed profiles
+    export       export_to_excel + export_to_json
+
+Usage:
+    python3 benchmarks/run_benchmarks.py --sizes 1000,10000 --output bench.json
+    python3 benchmarks/run_benchmarks.py --sizes 1000 --compare bench.json
+
+Every size runs against a fresh cache DB in a temporary directory, and all
+inputs are generated from fixed seeds, so results are comparable across
+commits.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd
+
+import machinery_matcher as mm
+from machinery_metrics import metrics
+from generators import write_prospects_csv, generate_exhibitors
+from fake_llm import FakeAnthropicClient
+from fake_sites import FakeSiteServer
+
+
+STAGES = ['ingestion', 'enrichment', 'scraping', 'profiling', 'scoring', 'export']
+
+
+@contextlib.contextmanager
+def quiet(enabled=True):
+    """Silence the pipeline's per-item prints (they would dominate the timings)"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(rows, args, site_server, workdir):
+    """Run every stage for one prospect count; return {stage: seconds} plus details"""
+    timings = {}
+    csv_path = os.path.join(workdir, f"prospects_{rows}.csv")
+    write_prospects_csv(csv_path, rows, seed=args.seed, site_base_url=site_server.base_url)
+    exhibitors = generate_exhibitors(args.exhibitors, seed=args.seed)
+
+    cache_db = mm.CacheDB(os.path.join(workdir, f"cache_{rows}.db"))
+    scrape_db = mm.CacheDB(os.path.join(workdir, f"cache_{rows}_scrape.db"))
+    client = FakeAnthropicClient(latency=args.llm_latency)
+    http_cache = mm.HTTPCache(os.path.join(workdir, f"http_cache_{rows}.db"))
+    matcher = mm.FastMachineryMatcher(None, cache_db, client=client, http_cache=http_cache)
+    scrape_matcher = mm.FastMachineryMatcher(None, scrape_db, client=client, http_cache=http_cache)
+
+    metrics.reset()
+    with quiet(not args.verbose):
+        start = time.perf_counter()
+        df = pd.read_csv(csv_path, encoding='utf-8-sig')
+        df = df[df['Firma'].notna()]
+        timings['ingestion'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        enriched = matcher.analyze_prospects_batch(df, enable_scraping=False)
+        timings['enrichment'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scrape_matcher.analyze_prospects_batch(df.head(args.scrape_rows), enable_scraping=True)
+        timings['scraping'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        profiles = matcher._analyze_provider_profiles(exhibitors[:50], args.technology)
+        timings['profiling'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = matcher.smart_match_analysis(enriched, exhibitors, args.top_n, args.technology,
+                                               provider_profiles=profiles)
+        timings['scoring'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        mm.export_to_excel(results, os.path.join(workdir, f"export_{rows}.xlsx"))
+        mm.export_to_json(results, os.path.join(workdir, f"export_{rows}.json"))
+        timings['export'] = time.perf_counter() - start
+
+    cache_db.conn.close()
+    scrape_db.conn.close()
+    http_cache.close()
+
+    return {
+        'rows': rows,
+        'stages': {stage: round(timings[stage], 4) for stage in STAGES},
+        'total_seconds': round(sum(timings.values()), 4),
+        'enriched_prospects': len(enriched),
+        'scraped_rows': min(rows, args.scrape_rows),
+        'provider_profiles': len(profiles),
+        'llm_calls': client.calls,
+        'matched_rows': sum(p['total_prospects_matched'] for p in results['top_providers']),
+        'metrics': metrics.summary()
+    }
+
+
+def compare(baseline_path, report):
+    """Print per-stage ratios against an earlier report (ratio < 1 means faster now)"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    base_by_rows = {r['rows']: r for r in baseline['results']}
+
+    print(f"\n📈 Compared with {baseline_path} (commit {baseline.get('commit')})")
+    for result in report['results']:
+        base = base_by_rows.get(result['rows'])
+        if not base:
+            print(f"   {result['rows']} rows: no baseline")
+            continue
+        print(f"\n   {result['rows']} rows")
+        for stage in STAGES + ['total']:
+            new = result['total_seconds'] if stage == 'total' else result['stages'][stage]
+            old = base['total_seconds'] if stage == 'total' else base['stages'].get(stage)
+            if not old:
+                continue
+            print(f"   {stage:<12} {old:>9.3f}s → {new:>9.3f}s   x{new / old:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the machinery matcher pipeline offline")
+    parser.add_argument('--sizes', default='1000,10000', help="Comma-separated prospect counts (e.g. 1000,10000,100000)")
+    parser.add_argument('--exhibitors', type=int, default=1900, help="Synthetic K2025 exhibitors")
+    parser.add_argument('--scrape-rows', type=int, default=200, help="Rows enriched with website detection")
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--technology', default='injection',
+                        help="Technology filter passed to profiling and scoring ('' for none)")
+    parser.add_argument('--llm-latency', type=float, default=0.05, help="Fake LLM seconds per call")
+    parser.add_argument('--site-latency', type=float, default=0.0, help="Fake website seconds per request")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    parser.add_argument('--compare', help="Earlier JSON report to compare against")
+    parser.add_argument('--verbose', action='store_true', help="Keep the pipeline's own output")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    args.technology = args.technology or None
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'verbose')},
+        'results': []
+    }
+
+    print("\n" + "="*70)
+    print("⏱  MACHINERY MATCHER BENCHMARKS")
+    print("="*70)
+
+    with FakeSiteServer(latency=args.site_latency) as site_server, tempfile.TemporaryDirectory() as workdir:
+        for rows in sizes:
+            print(f"\n▶ {rows} prospects...")
+            result = run_size(rows, args, site_server, workdir)
+            report['results'].append(result)
+            for stage in STAGES:
+                print(f"   {stage:<12} {result['stages'][stage]:>9.3f}s")
+            print(f"   {'total':<12} {result['total_seconds']:>9.3f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == '__main__':
+    main()
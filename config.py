@@ -25,7 +25,66 @@ ENABLE_WEB_SCRAPING = False  # Start with False
 # etc.
 FILTER_BY_TECHNOLOGY = None  # Start with None
 
+# CSV columns scanned for production-process keywords before any scraping
+# (the company name is always scanned; missing columns are ignored)
+PROSPECT_TEXT_COLUMNS = ['Activitate', 'Descriere', 'Domeniu', 'CAEN']
+
 # Performance settings
 BATCH_SIZE = 50
 USE_CACHE = True
-PARALLEL_PROCESSING = True
\ No newline at end of file
+PARALLEL_PROCESSING = True
+
+# Website scraping limits
+MAX_PAGE_BYTES = 1_000_000  # Stop downloading a page after this many bytes
+MAX_PAGE_TEXT_CHARS = 3000  # Visible text kept per page for machinery detection
+CRAWL_MAX_PAGES = 4  # Pages read per prospect site (homepage + /equipment, /machinery, /about, ...)
+CRAWL_CONCURRENCY = 8  # Pages fetched at once over all prospects
+CRAWL_PER_HOST = 2  # Starting limit of pages fetched at once from one website (adapts, see below)
+
+# Machinery brand dictionary (K2025 exhibitors are added automatically)
+BRAND_ALIAS_FILE = 'brand_aliases.json'  # Curated aliases and model lines (relative to the program directory)
+
+# HTTP response cache (raw pages, re-parsed when detection logic changes)
+HTTP_CACHE_PATH = 'http_cache.db'
+HTTP_CACHE_TTL = {'default': 24 * 3600, 'k-online.com': 7 * 24 * 3600}  # Seconds, by host suffix
+HTTP_CACHE_OFFLINE = False  # True = replay cached pages only, never fetch (same as --offline)
+
+# Cache freshness (days). Stale rows are served and refreshed in the background;
+# rows past TTL + max stale are refetched and pruned by `machinery_maintenance.py compact`
+CACHE_TTL_DAYS = {'prospect_data': 30, 'k2025_exhibitors': 14, 'provider_data': 30}
+CACHE_MAX_STALE_DAYS = {'prospect_data': 60, 'k2025_exhibitors': 30, 'provider_data': 0}
+CACHE_REFRESH_WORKERS = 2
+
+# Streaming runs (python machinery_matcher.py --stream)
+STREAM_QUEUE_SIZE = 200    # Enriched prospects waiting for the scorer before enrichment pauses
+STREAM_REPORT_EVERY = 100  # Print a partial ranking every N scored prospects
+
+# Time-budgeted runs (python machinery_matcher.py --time-budget 45m)
+TIME_BUDGET_RESERVE = 0.1           # Share of the budget kept for scoring and export
+TIME_BUDGET_SCRAPE_ESTIMATE = 10.0  # Seconds per website check assumed until one is measured
+
+# Preview runs (python machinery_matcher.py --preview)
+PREVIEW_SAMPLE_SIZE = 150  # Prospects scored, drawn from the region/size strata
+
+# Task queue (python machinery_worker.py worker)
+TASK_LEASE_SECONDS = 300  # A task not finished within this goes back to the queue
+TASK_MAX_ATTEMPTS = 5     # Give up on a task after this many failed attempts
+TASK_RETRY_DELAY = 30     # Seconds before a failed task is retried (times attempts)
+
+# Adaptive concurrency: limits grow while calls succeed and halve on 429 / 5xx / timeouts
+ADAPTIVE_LIMITS = {
+    'host': {'initial': CRAWL_PER_HOST, 'maximum': 8, 'latency_target': 5.0},  # Per website host
+    'api': {'initial': 2, 'maximum': 8}                                         # Per LLM API
+}
+LLM_MAX_RETRIES = 4  # Retries of a throttled / overloaded AI call before falling back
+LLM_RETRY_DELAY = 1.0       # Seconds before the first retry; doubles per retry (jittered)
+LLM_RETRY_MAX_DELAY = 30.0  # Longest backoff between retries
+
+# AI provider profiling requests (providers are packed into as few requests as fit)
+PROFILE_INPUT_TOKEN_BUDGET = 4000  # Estimated tokens of provider data per request
+PROFILE_MAX_OUTPUT_TOKENS = 4096   # max_tokens per request; batches aim for ~75% of it
+PROFILE_TOKENS_PER_PROFILE = 180   # Expected output tokens per provider profile
+
+# Bulk profiling with the Message Batches API (python machinery_bulk.py submit / poll)
+BULK_POLL_INTERVAL = 60  # Seconds between job status checks with `poll --wait`
+BULK_MAX_ATTEMPTS = 3    # Submissions of a request that errored or expired before basic profiles are used
@@ -0,0 +1,284 @@
+"""
+MACHINERY MATCHER - BRAND DICTIONARY
+Detects machinery brands and model lines in prospect website text.
+
+The dictionary combines:
+- every cached K2025 exhibitor (legal forms and generic words stripped,
+  e.g. "Husky Injection Molding Systems" -> "Husky")
+- the curated alias file (brand_aliases.json): short forms ("KM"),
+  spelling variants ("Sumitomo (SHI) Demag") and distinctive model lines
+  ("Allrounder" -> Arburg)
+
+All aliases are compiled into a single trie-shaped regex, so one pass over
+the page finds every brand regardless of dictionary size. Each detection
+gets a confidence score from its context: a mention next to "machine park"
+or "our equipment" counts for more than one in a customer list. Short
+all-caps aliases ("KM", "FCS") and model lines ("NEX", "CCM") match any
+such token, so they need more evidence: a short alias counts next to a
+machinery context term, with one of the brand's model lines or when the
+page names the brand in full; a short model line only counts on a page
+that names its brand.
+"""
+
+import json
+import os
+import re
+from bisect import bisect_left
+
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ALIAS_FILE = os.path.join(MODULE_DIR, 'brand_aliases.json')
+
+# Words dropped from exhibitor names before they are used as brand aliases
+LEGAL_FORMS = {
+    'gmbh', 'ag', 'kg', 'co', 'spa', 'srl', 'sa', 'sas', 'sl', 'bv', 'nv', 'oy', 'ab', 'as', 'sro', 'kft',
+    'ltd', 'limited', 'inc', 'llc', 'corp', 'corporation', 'plc', 'pty', 'pvt', 'kk', 'se', 'mbh'
+}
+GENERIC_WORDS = {
+    'holdings', 'holding', 'group', 'international', 'industrial', 'industries', 'industrie', 'industry',
+    'machinery', 'machines', 'machine', 'maschinen', 'maschinenbau', 'technologies', 'technology',
+    'technik', 'systems', 'system', 'plastics', 'plastic', 'kunststoff', 'precision', 'engineering',
+    'equipment', 'solutions', 'injection', 'molding', 'moulding', 'manufacturing', 'company', 'the',
+    'and', 'und', 'of', 'austria', 'germany', 'deutschland', 'italia', 'italy', 'china', 'europe'
+}
+MIN_DERIVED_ALIAS_LENGTH = 4
+
+# Phrases that mark a brand mention as describing the prospect's own machines
+CONTEXT_TERMS = [
+    'machine park', 'machinery park', 'machine pool', 'our equipment', 'equipment list', 'our machines',
+    'production hall', 'we operate', 'we use', 'injection moulding machines', 'injection molding machines',
+    'machines from', 'clamping force', 'tonnage', 'maschinenpark', 'parc machines', 'parc de machines',
+    'parco macchine', 'park maszynowy', 'parc de masini', 'parcul de masini', 'parc de mașini', 'utilaje',
+    'echipamente', 'dotari', 'dotări'
+]
+CONTEXT_WINDOW = 200  # Characters either side of a mention
+
+# Confidence scoring
+CURATED_SCORE = 0.5   # Brand or alias from the curated file
+DERIVED_SCORE = 0.35  # Name only known from the exhibitor list
+MODEL_SCORE = 0.45    # Model line without the brand name
+CONTEXT_BONUS = 0.3
+MODEL_BONUS = 0.1     # Brand and one of its model lines both mentioned
+MENTION_BONUS = 0.05  # Per extra mention, capped
+MAX_MENTION_BONUS = 0.15
+CONFIDENCE_LEVELS = [(0.75, 'high'), (0.5, 'medium'), (0.0, 'low')]
+
+
+def normalize(text):
+    """Collapse punctuation and whitespace so 'Krauss-Maffei' and 'Krauss Maffei' compare equal"""
+    return re.sub(r'[\W_]+', ' ', text).strip()
+
+
+def brand_from_exhibitor(name):
+    """Exhibitor name without legal forms and trailing generic words ('' if nothing is left)"""
+    words = normalize(name).split()
+    while words and words[-1].lower() in LEGAL_FORMS | GENERIC_WORDS:
+        words.pop()
+    return ' '.join(w for w in words if w.lower() not in LEGAL_FORMS)
+
+
+def trie_regex(words):
+    """Regex source matching any of the words, shaped as a prefix trie
+
+    Shared prefixes are matched once, so the cost per text position does not
+    grow with the number of words the way a flat alternation does.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        if list(node) == ['']:
+            return None
+        branches = []
+        single_chars = []
+        for char in sorted(k for k in node if k):
+            rest = build(node[char])
+            if rest is None:
+                single_chars.append(re.escape(char))
+            else:
+                branches.append(re.escape(char) + rest)
+        if single_chars:
+            branches.append(single_chars[0] if len(single_chars) == 1 else f"[{''.join(single_chars)}]")
+        source = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if '' in node:
+            source = f"(?:{source})?"
+        return source
+
+    return build(trie) or ''
+
+
+def _compile(words, flags=0):
+    if not words:
+        return None
+    return re.compile(rf"(?<!\w)(?:{trie_regex(words)})(?!\w)", flags)
+
+
+class BrandDetector:
+    """Compiled brand dictionary; detect() runs one regex pass per text"""
+
+    def __init__(self, entries):
+        """entries: (alias, brand, kind) with kind 'curated', 'derived' or 'model'"""
+        self.aliases = {}
+        self.case_sensitive = {}
+        self.manufacturers = {}
+        for alias, brand, kind in entries:
+            key = normalize(alias)
+            if not key:
+                continue
+            if key.isupper() and len(key) <= 3:
+                self.case_sensitive.setdefault(key, (brand, kind))
+            else:
+                current = self.aliases.get(key.lower())
+                # Curated spellings win over names derived from the exhibitor list
+                if current is None or (current[1] == 'derived' and kind != 'derived'):
+                    self.aliases[key.lower()] = (brand, kind)
+
+        self.pattern = _compile(self.aliases, re.IGNORECASE)
+        self.exact_pattern = _compile(self.case_sensitive)
+        self.context_pattern = _compile([normalize(t).lower() for t in CONTEXT_TERMS], re.IGNORECASE)
+
+    @property
+    def brands(self):
+        return sorted({brand for brand, _ in self.aliases.values()} |
+                      {brand for brand, _ in self.case_sensitive.values()})
+
+    def __len__(self):
+        return len(self.brands)
+
+    @classmethod
+    def build(cls, exhibitor_names=(), alias_file=DEFAULT_ALIAS_FILE):
+        """Dictionary from exhibitor names plus the curated alias file
+        
+        A relative alias_file is taken relative to this module, not the working directory.
+        """
+        entries = []
+        curated = {}
+        if alias_file and not os.path.isabs(alias_file):
+            alias_file = os.path.join(MODULE_DIR, alias_file)
+        if alias_file and not os.path.exists(alias_file):
+            print(f"⚠ Brand alias file {alias_file} not found; only exhibitor names are detected")
+        elif alias_file:
+            with open(alias_file, encoding='utf-8') as f:
+                for item in json.load(f).get('brands', []):
+                    brand = item['brand']
+                    for alias in [brand] + item.get('aliases', []):
+                        entries.append((alias, brand, 'curated'))
+                        curated[normalize(alias).lower()] = brand
+                    for model in item.get('models', []):
+                        entries.append((model, brand, 'model'))
+
+        manufacturers = {}
+        for name in exhibitor_names:
+            if not name:
+                continue
+            alias = brand_from_exhibitor(name)
+            key = alias.lower()
+            brand = curated.get(key) or curated.get(key.split()[0] if key else '')
+            if brand is None:
+                # Short or generic leftovers ("BOY", "Plastic") would match ordinary words
+                if len(alias) < MIN_DERIVED_ALIAS_LENGTH or key in GENERIC_WORDS:
+                    continue
+                brand = alias
+            manufacturers.setdefault(brand, name)
+            entries.append((alias, brand, 'derived'))
+
+        detector = cls(entries)
+        detector.manufacturers = manufacturers
+        return detector
+
+    def detect(self, text):
+        """Brands mentioned in text, best first
+
+        Returns [{'brand', 'confidence', 'score', 'mentions', 'matched'[, 'manufacturer']}]
+        """
+        text = normalize(text or '')
+        if not text:
+            return []
+
+        hits = []
+        if self.pattern is not None:
+            hits += [(m.start(), m.group().lower(), self.aliases) for m in self.pattern.finditer(text)]
+        if self.exact_pattern is not None:
+            hits += [(m.start(), m.group(), self.case_sensitive) for m in self.exact_pattern.finditer(text)]
+        if not hits:
+            return []
+
+        context_positions = [m.start() for m in self.context_pattern.finditer(text)]
+
+        found = {}
+        for position, key, table in hits:
+            brand, kind = table[key]
+            entry = found.setdefault(brand, {'kinds': set(), 'mentions': 0, 'context': False, 'matched': [],
+                                             'full': False, 'short': False, 'short_context': False})
+            i = bisect_left(context_positions, position - CONTEXT_WINDOW)
+            in_context = i < len(context_positions) and context_positions[i] <= position + CONTEXT_WINDOW
+            if table is not self.case_sensitive:
+                entry['full'] = True
+            elif kind != 'model':
+                # Short all-caps aliases ("KM", "FCS") are common acronyms; in context they name the brand
+                entry['short'] = True
+                entry['short_context'] = entry['short_context'] or in_context
+            entry['kinds'].add(kind)
+            entry['mentions'] += 1
+            if key not in entry['matched']:
+                entry['matched'].append(key)
+            entry['context'] = entry['context'] or in_context
+
+        detections = []
+        for brand, entry in found.items():
+            kinds = entry['kinds']
+            # Short all-caps aliases and model lines alone are no evidence ("NEX" may be any acronym)
+            named = entry['full'] or entry['short_context'] or (entry['short'] and 'model' in kinds)
+            if not named:
+                continue
+            if 'curated' in kinds:
+                score = CURATED_SCORE + (MODEL_BONUS if 'model' in kinds else 0)
+            elif 'model' in kinds:
+                score = MODEL_SCORE
+            else:
+                score = DERIVED_SCORE
+            if entry['context']:
+                score += CONTEXT_BONUS
+            score += min(MAX_MENTION_BONUS, MENTION_BONUS * (entry['mentions'] - 1))
+            score = round(min(score, 1.0), 2)
+
+            detection = {
+                'brand': brand,
+                'confidence': next(label for threshold, label in CONFIDENCE_LEVELS if score >= threshold),
+                'score': score,
+                'mentions': entry['mentions'],
+                'matched': entry['matched']
+            }
+            if brand in self.manufacturers:
+                detection['manufacturer'] = self.manufacturers[brand]
+            detections.append(detection)
+
+        detections.sort(key=lambda d: (-d['score'], d['brand']))
+        return detections
+
+
+def merge_detections(pages):
+    """Combine per-page detections [(url, detections)] into one list, best first
+
+    A brand keeps its best-scoring page, its mentions are summed and 'pages'
+    lists every URL it was seen on.
+    """
+    merged = {}
+    for url, detections in pages:
+        for detection in detections:
+            brand = detection['brand']
+            if brand not in merged:
+                merged[brand] = dict(detection, matched=list(detection['matched']), pages=[url])
+                continue
+            entry = merged[brand]
+            mentions = entry['mentions'] + detection['mentions']
+            matched = entry['matched'] + [m for m in detection['matched'] if m not in entry['matched']]
+            pages_seen = entry['pages'] + [url]
+            if detection['score'] > entry['score']:
+                entry.update(detection)
+            entry.update(mentions=mentions, matched=matched, pages=pages_seen)
+    return sorted(merged.values(), key=lambda d: (-d['score'], d['brand']))
@@ -0,0 +1,199 @@
+"""
+MACHINERY MATCHER - BULK PROFILING
+AI profiles for a whole provider catalogue through the Message Batches API
+instead of synchronous messages.create calls. All requests go into one
+asynchronous job that the API works through on its own (within 24 hours,
+at half the token price and outside the per-minute rate limits), so no
+process has to stay up holding rate-limit slots.
+
+Usage:
+    python3 machinery_bulk.py submit [--technology injection] [--limit 500]   # queue a job, then exit
+    python3 machinery_bulk.py poll                                            # ingest finished jobs (e.g. from cron)
+    python3 machinery_bulk.py poll --wait                                     # until every job is ingested
+    python3 machinery_bulk.py status
+
+Job IDs and the providers behind each request are kept in the llm_batches
+table of machinery_cache.db, so polling picks up where it left off after a
+restart. Finished jobs are ingested into the provider profile cache
+(provider_data), where the next `python3 machinery_matcher.py` run finds
+them. Requests whose answer was cut off at max_tokens are resubmitted in a
+follow-up job split in halves, a malformed profile entry as a request for
+its provider alone; errored or expired ones up to BULK_MAX_ATTEMPTS times.
+Providers still without an AI profile after that are not cached, so the
+next submit includes them again.
+
+The anthropic SDK reads ANTHROPIC_BASE_URL, so a job can run against the
+local fake endpoint in benchmarks/fake_batches.py.
+"""
+
+import argparse
+import time
+
+import anthropic
+
+from machinery_metrics import metrics, record_llm_usage
+from machinery_matcher import (ANTHROPIC_API_KEY, FILTER_BY_TECHNOLOGY, TECHNOLOGY_KEYWORDS, BULK_POLL_INTERVAL,
+                               BULK_MAX_ATTEMPTS, CacheDB, K2025Scraper, FastMachineryMatcher, open_http_cache)
+
+
+JOB_KIND = 'profile'
+
+
+def submit_job(cache_db, matcher, entries, technology_filter=None, commit=True):
+    """Create one batch job for [(providers, attempt)] and remember it; returns the job ID"""
+    job_requests, stored = [], {}
+    for number, (providers, attempt) in enumerate(entries):
+        custom_id = f"profile-{number:05d}"
+        job_requests.append({'custom_id': custom_id, 'params': matcher._profile_request(providers, technology_filter)})
+        stored[custom_id] = {'providers': providers, 'attempt': attempt}
+    job = matcher.client.messages.batches.create(requests=job_requests)
+    cache_db.save_llm_batch(job.id, JOB_KIND, technology_filter, stored, commit=commit)
+    metrics.incr('llm_batch_requests', len(job_requests))
+    print(f"📤 Batch job {job.id}: {len(job_requests)} requests, "
+          f"{sum(len(providers) for providers, _ in entries)} providers")
+    return job.id
+
+
+def submit(cache_db, matcher, providers, technology_filter=None, limit=None):
+    """Job profiling every candidate provider without a cached profile (None if all are cached)"""
+    candidates = matcher.provider_candidates(providers, technology_filter, limit=limit)
+    cached = cache_db.get_provider_profiles([p['name'] for p in candidates], technology_filter)
+    pending = {name for _, _, tf, job_requests, _ in cache_db.open_llm_batches(JOB_KIND) if tf == technology_filter
+               for request in job_requests.values() for name in (p['name'] for p in request['providers'])}
+    missing = [p for p in candidates if p['name'] not in cached and p['name'] not in pending]
+    print(f"✓ {len(candidates)} providers: {len(cached)} cached, {len(pending)} in open jobs, {len(missing)} to profile")
+    if not missing:
+        return None
+    return submit_job(cache_db, matcher, [(batch, 1) for batch in matcher.pack_profile_batches(missing)],
+                      technology_filter)
+
+
+def ingest(cache_db, matcher, batch_id, technology_filter, job_requests):
+    """Cache the profiles of an ended job and resubmit what needs another try; returns profiles cached
+    
+    Providers left without an AI profile (unreadable answer, malformed again
+    on their own, out of attempts) stay uncached, so a later submit picks
+    them up again.
+    """
+    profiles, retry, seen, skipped = [], [], set(), []
+    for entry in matcher.client.messages.batches.results(batch_id):
+        request = job_requests.get(entry.custom_id)
+        if request is None:
+            continue
+        seen.add(entry.custom_id)
+        providers, attempt = request['providers'], request['attempt']
+        if entry.result.type == 'succeeded':
+            record_llm_usage(entry.result.message)
+            try:
+                found, parts = matcher._read_profiles(providers, entry.result.message, technology_filter)
+            except Exception as e:
+                print(f"    ⚠ {entry.custom_id}: {e}")
+                found, parts = [], []
+                skipped.extend(providers)
+            profiles.extend(found)
+            # A malformed entry comes back as its provider alone; one that is malformed again is left uncached
+            for part in parts:
+                if len(part) == 1 and len(providers) == 1:
+                    skipped.extend(part)
+                else:
+                    retry.append((part, attempt))
+        elif attempt < BULK_MAX_ATTEMPTS:
+            metrics.incr('llm_batch_retries', result=entry.result.type)
+            retry.append((providers, attempt + 1))
+        else:
+            print(f"    ⚠ {entry.custom_id}: {entry.result.type} after {attempt} attempts")
+            skipped.extend(providers)
+
+    # A request missing from the results counts as expired
+    for custom_id in job_requests.keys() - seen:
+        request = job_requests[custom_id]
+        if request['attempt'] < BULK_MAX_ATTEMPTS:
+            retry.append((request['providers'], request['attempt'] + 1))
+        else:
+            skipped.extend(request['providers'])
+
+    cache_db.save_provider_profiles(profiles, technology_filter)
+    # The follow-up job and the ingested mark are committed together, so a
+    # crash in between re-ingests this job (idempotent) instead of losing the retries
+    if retry:
+        submit_job(cache_db, matcher, retry, technology_filter, commit=False)
+    cache_db.update_llm_batch(batch_id, 'ingested')
+    print(f"📥 Batch job {batch_id}: {len(profiles)} profiles cached"
+          + (f", {sum(len(p) for p, _ in retry)} providers resubmitted" if retry else "")
+          + (f", {len(skipped)} left unprofiled (submit again later)" if skipped else ""))
+    return len(profiles)
+
+
+def poll(cache_db, matcher):
+    """Check every open job once and ingest the ended ones; returns the number of jobs still open"""
+    for batch_id, _, technology_filter, job_requests, _ in cache_db.open_llm_batches(JOB_KIND):
+        job = matcher.client.messages.batches.retrieve(batch_id)
+        if job.processing_status == 'ended':
+            ingest(cache_db, matcher, batch_id, technology_filter, job_requests)
+        else:
+            cache_db.update_llm_batch(batch_id, job.processing_status)
+            counts = job.request_counts
+            print(f"⏳ Batch job {batch_id}: {job.processing_status} ({counts.processing} of "
+                  f"{counts.processing + counts.succeeded + counts.errored + counts.canceled + counts.expired} "
+                  f"requests processing)")
+    # Includes follow-up jobs submitted while ingesting
+    return len(cache_db.open_llm_batches(JOB_KIND))
+
+
+def wait(cache_db, matcher, interval=None):
+    """Poll until every job is ingested"""
+    interval = interval or BULK_POLL_INTERVAL
+    while poll(cache_db, matcher):
+        time.sleep(interval)
+
+
+def print_status(cache_db, limit=20):
+    print(f"\n{'Job':<34} {'Kind':<8} {'Technology':<12} {'Status':<12} {'Submitted':<20} Ingested")
+    print("-" * 110)
+    for batch_id, kind, technology_filter, status, submitted, ingested in cache_db.list_llm_batches(limit):
+        print(f"{batch_id:<34} {kind:<8} {technology_filter or '-':<12} {status:<12} {submitted:<20} {ingested or '-'}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk AI provider profiling with the Message Batches API")
+    parser.add_argument('command', choices=['submit', 'poll', 'status'])
+    parser.add_argument('--db', default='machinery_cache.db', help="Cache database file (holds the jobs)")
+    parser.add_argument('--technology', choices=sorted(TECHNOLOGY_KEYWORDS), default=FILTER_BY_TECHNOLOGY)
+    parser.add_argument('--limit', type=int, help="Profile at most this many providers (default: whole catalogue)")
+    parser.add_argument('--wait', action='store_true', help="poll: keep polling until every job is ingested")
+    parser.add_argument('--interval', type=float, default=BULK_POLL_INTERVAL, help="Seconds between polls")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache_db = CacheDB(args.db)
+
+    print("\n" + "="*70)
+    print(f"📦 BULK PROFILING: {args.command} ({args.db})")
+    print("="*70)
+
+    if args.command != 'status':
+        http_cache = open_http_cache()
+        matcher = FastMachineryMatcher(ANTHROPIC_API_KEY, cache_db, client=anthropic.Anthropic(api_key=ANTHROPIC_API_KEY),
+                                       http_cache=http_cache)
+        if args.command == 'submit':
+            k2025_scraper = K2025Scraper(cache_db, http_cache)
+            providers = k2025_scraper.scrape_all_exhibitors()
+            if len(providers) < 20:
+                providers = k2025_scraper.get_fallback_exhibitors()
+            submit(cache_db, matcher, providers, args.technology, args.limit)
+        elif args.wait:
+            try:
+                wait(cache_db, matcher, args.interval)
+            except KeyboardInterrupt:
+                print("\n⚠ Stopped polling (jobs keep running; poll again later)")
+        else:
+            poll(cache_db, matcher)
+
+    print_status(cache_db)
+    cache_db.conn.close()
+
+
+if __name__ == '__main__':
+    main()
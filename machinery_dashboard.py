@@ -2,25 +2,49 @@
 MACHINERY MATCHER - WEB DASHBOARD
 Version: 2.0 Final
 Description: Beautiful web interface for machinery matching
-Usage: python3 machinery_dashboard.py
+Usage: python3 machinery_dashboard.py              (development server)
+       python3 machinery_dashboard.py --production (waitress, multi-threaded)
 Then open: http://localhost:5000
+
+Analysis jobs and their progress events live in the serving process, so run
+one process with many threads (waitress, or gunicorn's gthread worker):
+    gunicorn -w 1 -k gthread --threads 16 -b 127.0.0.1:5000 machinery_dashboard:app
 """
 
-from flask import Flask, render_template_string, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 import pandas as pd
+import argparse
 import json
 import os
+import queue
+import hashlib
 from datetime import datetime
 import threading
 
+from machinery_matcher import (CacheDB, K2025Scraper, FastMachineryMatcher, open_http_cache,
+                               iter_run_json, export_run_to_excel)
+from machinery_progress import progress_bus, format_sse
+from machinery_metrics import metrics
+
 app = Flask(__name__)
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 7 * 24 * 3600  # Long-lived caching for /static assets
+
+UPLOAD_DIR = 'uploads'
+SSE_HEARTBEAT_SECONDS = 15
+MAX_PAGE_SIZE = 200
+EXPORT_DIR = 'exports'
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_MIMETYPES = {
+    'json': 'application/json',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
 
 # Global progress tracking
 progress_data = {
     'status': 'idle',
     'progress': 0,
     'message': '',
-    'results': None
+    'run_id': None
 }
 
 # HTML Template
@@ -260,6 +284,41 @@ HTML_TEMPLATE = """
             color: #667eea;
         }
         
+        .prospect-controls {
+            display: flex;
+            gap: 10px;
+            margin: 15px 0 10px;
+            flex-wrap: wrap;
+        }
+        
+        .prospect-controls select,
+        .prospect-controls input {
+            padding: 8px;
+            border: 2px solid #e0e0e0;
+            border-radius: 8px;
+        }
+        
+        .prospect-table {
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 0.95em;
+        }
+        
+        .prospect-table th,
+        .prospect-table td {
+            text-align: left;
+            padding: 8px;
+            border-bottom: 1px solid #eee;
+        }
+        
+        .pager {
+            display: flex;
+            gap: 10px;
+            align-items: center;
+            margin-top: 10px;
+            color: #666;
+        }
+        
         .download-btn {
             background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%);
             color: white;
@@ -343,8 +402,8 @@ HTML_TEMPLATE = """
                     </select>
                 </div>
                 
-                <button type="button" class="btn" id="startBtn" onclick="startDemo()">
-                    🚀 Start Analysis (DEMO)
+                <button type="button" class="btn" id="startBtn" onclick="startAnalysis()">
+                    🚀 Start Analysis
                 </button>
             </div>
         </div>
@@ -355,119 +414,603 @@ HTML_TEMPLATE = """
                 <div class="progress-fill" id="progressFill" style="width: 0%">0%</div>
             </div>
             <div class="status-message" id="statusMessage">Initializing...</div>
+            <div class="status-message" id="stageDetails"></div>
         </div>
         
         <div class="results-container card" id="resultsContainer">
             <h2>📊 Results - Top Machinery Providers</h2>
-            <button class="download-btn" onclick="alert('Excel file would download here!')">
-                📥 Download Excel Report
-            </button>
+            <a class="download-btn" id="downloadExcel" href="#">📥 Download Excel Report</a>
+            <a class="download-btn" id="downloadJson" href="#">📥 Download JSON</a>
             <div id="resultsContent"></div>
         </div>
     </div>
     
     <script>
-        function startDemo() {
-            document.getElementById('configSection').style.display = 'none';
-            document.getElementById('progressContainer').classList.add('active');
-            document.getElementById('resultsContainer').classList.remove('active');
+        const STAGE_LABELS = {
+            k2025_scrape: 'Scraping K2025 database',
+            enrich_prospects: 'Analyzing prospects',
+            provider_profiles: 'Profiling providers with AI',
+            matching: 'Running matching',
+            job: 'Analysis'
+        };
+        const STAGE_ORDER = ['k2025_scrape', 'enrich_prospects', 'provider_profiles', 'matching'];
+        const stages = {};
+        let eventSource = null;
+        
+        function formatEta(seconds) {
+            if (seconds === null || seconds === undefined) return '';
+            if (seconds < 60) return Math.round(seconds) + 's left';
+            return Math.round(seconds / 60) + ' min left';
+        }
+        
+        function startAnalysis() {
+            const form = new FormData();
+            form.append('api_key', document.getElementById('apiKey').value);
+            form.append('top_n', document.getElementById('topN').value);
+            form.append('max_prospects', document.getElementById('maxProspects').value);
+            form.append('tech_filter', document.getElementById('techFilter').value);
+            form.append('web_scraping', document.getElementById('webScraping').value);
+            const csv = document.getElementById('csvFile').files[0];
+            if (csv) form.append('csv_file', csv);
             
-            const messages = [
-                "Initializing AI engine...",
-                "Scraping K2025 database...",
-                "Analyzing prospects...",
-                "Running AI matching...",
-                "Generating results..."
-            ];
+            fetch('/api/start', {method: 'POST', body: form})
+                .then(r => r.json().then(body => ({ok: r.ok, body: body})))
+                .then(({ok, body}) => {
+                    if (!ok) { alert(body.error || 'Could not start analysis'); return; }
+                    document.getElementById('configSection').style.display = 'none';
+                    document.getElementById('progressContainer').classList.add('active');
+                    document.getElementById('resultsContainer').classList.remove('active');
+                    subscribeProgress();
+                });
+        }
+        
+        function subscribeProgress() {
+            if (eventSource) eventSource.close();
+            eventSource = new EventSource('/api/progress/stream');
+            eventSource.addEventListener('progress', (e) => updateProgress(JSON.parse(e.data)));
+        }
+        
+        function updateProgress(event) {
+            if (event.stage === 'job') {
+                if (event.status === 'done') finishAnalysis();
+                if (event.status === 'error') {
+                    eventSource.close();
+                    document.getElementById('statusMessage').textContent = '❌ ' + event.message;
+                }
+                return;
+            }
+            stages[event.stage] = event;
             
-            let progress = 0;
-            let messageIndex = 0;
+            // Overall progress: each pipeline stage is an equal share
+            const overall = STAGE_ORDER.reduce((sum, name) => {
+                const s = stages[name];
+                if (!s) return sum;
+                return sum + (s.status === 'done' ? 100 : s.percent) / STAGE_ORDER.length;
+            }, 0);
+            const pct = Math.min(100, Math.round(overall));
+            document.getElementById('progressFill').style.width = pct + '%';
+            document.getElementById('progressFill').textContent = pct + '%';
             
-            const interval = setInterval(() => {
-                progress += 5;
-                
-                if (progress > 100) {
-                    clearInterval(interval);
-                    setTimeout(() => {
-                        document.getElementById('progressContainer').classList.remove('active');
-                        document.getElementById('resultsContainer').classList.add('active');
-                        displayMockResults();
-                    }, 500);
+            const label = STAGE_LABELS[event.stage] || event.stage;
+            const eta = formatEta(event.eta_seconds);
+            document.getElementById('statusMessage').textContent =
+                `${label}: ${event.done}/${event.total}` + (eta ? ` (${eta})` : '');
+            document.getElementById('stageDetails').textContent =
+                event.message + (event.rate ? ` · ${event.rate}/s` : '');
+        }
+        
+        function finishAnalysis() {
+            eventSource.close();
+            fetch('/api/status').then(r => r.json()).then(data => {
+                document.getElementById('progressContainer').classList.remove('active');
+                document.getElementById('resultsContainer').classList.add('active');
+                if (!data.run_id) {
+                    displayResults(null);
                     return;
                 }
-                
-                document.getElementById('progressFill').style.width = progress + '%';
-                document.getElementById('progressFill').textContent = progress + '%';
-                
-                if (progress % 20 === 0 && messageIndex < messages.length) {
-                    document.getElementById('statusMessage').textContent = messages[messageIndex++];
-                }
-            }, 200);
+                fetch(`/api/runs/${data.run_id}`).then(r => r.json()).then(displayResults);
+            });
         }
         
-        function displayMockResults() {
-            const html = `
-                <div class="provider-card">
+        function displayResults(results) {
+            if (!results) {
+                document.getElementById('resultsContent').innerHTML = '<p>No providers matched.</p>';
+                return;
+            }
+            document.getElementById('downloadExcel').href = `/api/runs/${results.run_id}/export?format=xlsx`;
+            document.getElementById('downloadJson').href = `/api/runs/${results.run_id}/export?format=json`;
+            const container = document.getElementById('resultsContent');
+            container.innerHTML = '';
+            results.top_providers.forEach(p => {
+                const card = document.createElement('div');
+                card.className = 'provider-card';
+                card.innerHTML = `
                     <div class="provider-header">
-                        <div class="provider-rank">#1</div>
+                        <div class="provider-rank">#${p.rank}</div>
                         <div class="provider-name">
-                            <h3>ENGEL Austria GmbH</h3>
-                            <p>Austria</p>
+                            <h3></h3>
+                            <p></p>
                         </div>
                     </div>
                     <div class="provider-stats">
                         <div class="stat">
-                            <div class="stat-value">85%</div>
+                            <div class="stat-value">${p.coverage_pct}%</div>
                             <div>Coverage</div>
                         </div>
                         <div class="stat">
-                            <div class="stat-value">756</div>
+                            <div class="stat-value">${p.total_prospects_matched}</div>
                             <div>Prospects</div>
                         </div>
                     </div>
-                    <p><strong>Why Partner:</strong> Wide machine range, EU presence, sustainability features</p>
-                </div>
-                
-                <div class="provider-card">
-                    <div class="provider-header">
-                        <div class="provider-rank">#2</div>
-                        <div class="provider-name">
-                            <h3>Arburg GmbH + Co KG</h3>
-                            <p>Germany</p>
-                        </div>
-                    </div>
-                    <div class="provider-stats">
-                        <div class="stat">
-                            <div class="stat-value">79%</div>
-                            <div>Coverage</div>
-                        </div>
-                        <div class="stat">
-                            <div class="stat-value">698</div>
-                            <div>Prospects</div>
-                        </div>
+                    <p><strong>Why Partner:</strong> <span></span></p>
+                    <div class="prospect-controls">
+                        <select class="sort">
+                            <option value="match_score">Sort by match score</option>
+                            <option value="revenue">Sort by revenue</option>
+                        </select>
+                        <input class="country" placeholder="Country (e.g. DE)" size="12">
+                        <select class="technology">
+                            <option value="">All technologies</option>
+                            <option value="injection">Injection Molding</option>
+                            <option value="extrusion">Extrusion</option>
+                            <option value="blow_molding">Blow Molding</option>
+                            <option value="thermoforming">Thermoforming</option>
+                        </select>
+                        <button type="button" class="download-btn show">View prospects</button>
                     </div>
-                    <p><strong>Why Partner:</strong> Precision injection, medical grade, strong service network</p>
-                </div>
-            `;
-            
-            document.getElementById('resultsContent').innerHTML = html;
+                    <div class="prospects"></div>
+                `;
+                card.querySelector('h3').textContent = p.name;
+                card.querySelector('.provider-name p').textContent = p.country;
+                card.querySelector('span').textContent = (p.reasons || []).join(', ');
+                card.querySelector('.show').onclick = () => loadProspects(card, results.run_id, p.rank, 1);
+                container.appendChild(card);
+            });
+        }
+        
+        function loadProspects(card, runId, rank, page) {
+            const params = new URLSearchParams({
+                page: page,
+                per_page: 50,
+                sort: card.querySelector('.sort').value,
+                country: card.querySelector('.country').value.trim(),
+                technology: card.querySelector('.technology').value
+            });
+            fetch(`/api/runs/${runId}/providers/${rank}/prospects?${params}`)
+                .then(r => r.json())
+                .then(data => {
+                    const target = card.querySelector('.prospects');
+                    const table = document.createElement('table');
+                    table.className = 'prospect-table';
+                    table.innerHTML = '<tr><th>Company</th><th>Country</th><th>Revenue (EUR)</th><th>Score</th><th>Why</th></tr>';
+                    data.prospects.forEach(pr => {
+                        const row = table.insertRow();
+                        [pr.name, pr.country, Math.round(pr.revenue).toLocaleString(), pr.match_score,
+                         (pr.match_reasons || []).join('; ')].forEach(v => {
+                            row.insertCell().textContent = v;
+                        });
+                    });
+                    
+                    const pager = document.createElement('div');
+                    pager.className = 'pager';
+                    const prev = document.createElement('button');
+                    prev.textContent = '← Prev';
+                    prev.disabled = data.page <= 1;
+                    prev.onclick = () => loadProspects(card, runId, rank, data.page - 1);
+                    const next = document.createElement('button');
+                    next.textContent = 'Next →';
+                    next.disabled = data.page >= data.pages;
+                    next.onclick = () => loadProspects(card, runId, rank, data.page + 1);
+                    const info = document.createElement('span');
+                    info.textContent = `Page ${data.page} of ${Math.max(data.pages, 1)} · ${data.total} prospects`;
+                    pager.append(prev, info, next);
+                    
+                    target.replaceChildren(table, pager);
+                });
         }
     </script>
 </body>
 </html>
 """
 
+def run_analysis_job(csv_path, api_key, top_n, max_prospects, tech_filter, enable_scraping):
+    """Run the matching pipeline in a background thread, publishing progress"""
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    cache_db = CacheDB()
+    try:
+        df = pd.read_csv(csv_path, encoding='utf-8-sig')
+        df = df[df['Firma'].notna()].head(max_prospects)
+        
+        http_cache = open_http_cache()
+        k2025_scraper = K2025Scraper(cache_db, http_cache)
+        providers = k2025_scraper.scrape_all_exhibitors()
+        if len(providers) < 20:
+            providers = k2025_scraper.get_fallback_exhibitors()
+        
+        matcher = FastMachineryMatcher(api_key, cache_db, http_cache=http_cache)
+        enriched = matcher.analyze_prospects_batch(df, enable_scraping, tech_filter)
+        results = matcher.smart_match_analysis(enriched, providers, top_n, tech_filter)
+        
+        if results:
+            cache_db.save_run_results(run_id, results)
+            cache_db.save_run_metrics(run_id, metrics.summary())
+        progress_data.update(status='done', progress=100, message='Analysis complete',
+                             run_id=run_id if results else None)
+        progress_bus.publish('job', 1, 1, 'Analysis complete', status='done')
+    except Exception as e:
+        progress_data.update(status='error', message=str(e))
+        progress_bus.publish('job', 0, 1, f"Analysis failed: {e}", status='error')
+    finally:
+        cache_db.conn.close()
+
+
+class ExportJob:
+    """An export being generated in the background into <path>.part"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.part_path = path + '.part'
+        self.done = threading.Event()
+        self.error = None
+
+
+# Exports currently being generated, keyed by target path
+export_jobs = {}
+export_jobs_lock = threading.Lock()
+
+
+def export_cache_path(run, fmt, params):
+    """Cache file for a run export; re-saving a run changes created_at and so the key"""
+    key = json.dumps({'created_at': run['created_at'], 'format': fmt, **params}, sort_keys=True)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(EXPORT_DIR, f"{run['run_id']}_{digest}.{fmt}")
+
+
+def start_export(run_id, fmt, path, params):
+    """Start generating an export, or join the job already generating it"""
+    with export_jobs_lock:
+        job = export_jobs.get(path)
+        if job is None:
+            job = ExportJob(path)
+            export_jobs[path] = job
+            threading.Thread(target=build_export, args=(job, run_id, fmt, params), daemon=True).start()
+    return job
+
+
+def build_export(job, run_id, fmt, params):
+    """Write an export to its .part file, then move it into the cache"""
+    cache_db = CacheDB()
+    try:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        if fmt == 'json':
+            with open(job.part_path, 'w', encoding='utf-8') as f:
+                for chunk in iter_run_json(cache_db, run_id, **params):
+                    f.write(chunk)
+                    f.flush()
+        else:
+            export_run_to_excel(cache_db, run_id, job.part_path, **params)
+        os.replace(job.part_path, job.path)
+    except Exception as e:
+        job.error = e
+        if os.path.exists(job.part_path):
+            os.remove(job.part_path)
+    finally:
+        cache_db.conn.close()
+        with export_jobs_lock:
+            export_jobs.pop(job.path, None)
+        job.done.set()
+
+
+def stream_export(job, follow):
+    """Yield an export in chunks while it is written
+
+    JSON is append-only, so it is followed as it grows. XLSX is a zip whose
+    member headers are rewritten after each member, so it is only streamed
+    once the workbook has been saved.
+    """
+    if not follow:
+        job.done.wait()
+    else:
+        while not os.path.exists(job.part_path) and not job.done.is_set():
+            job.done.wait(0.05)
+    
+    if job.done.is_set():
+        if job.error or not os.path.exists(job.path):
+            return
+        path = job.path
+    else:
+        path = job.part_path
+    
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(EXPORT_CHUNK_SIZE)
+            if chunk:
+                yield chunk
+                continue
+            if job.done.is_set():
+                rest = f.read()
+                if rest:
+                    yield rest
+                break
+            job.done.wait(0.05)
+
+
+# Compiled once at import instead of on every request
+INDEX_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+
+
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    response = Response(INDEX_TEMPLATE.render(), mimetype='text/html')
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'  # Revalidate, answered with 304 while unchanged
+    return response.make_conditional(request)
+
+
+@app.after_request
+def add_cache_headers(response):
+    """Static assets are immutable between releases; API responses are never cached"""
+    if request.path.startswith('/static/'):
+        response.headers['Cache-Control'] = f"public, max-age={app.config['SEND_FILE_MAX_AGE_DEFAULT']}"
+    elif request.path.startswith('/api/'):
+        response.headers.setdefault('Cache-Control', 'no-store')
+    return response
+
+
+@app.route('/api/start', methods=['POST'])
+def start_analysis():
+    """Start an analysis run from the dashboard form"""
+    if progress_data['status'] == 'running':
+        return jsonify({'error': 'An analysis is already running'}), 409
+    
+    api_key = request.form.get('api_key', '').strip()
+    csv_file = request.files.get('csv_file')
+    if not api_key or not csv_file:
+        return jsonify({'error': 'API key and CSV file are required'}), 400
+    
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_path = os.path.join(UPLOAD_DIR, f"prospects_{timestamp}.csv")
+    csv_file.save(csv_path)
+    
+    progress_bus.reset()
+    metrics.reset()
+    progress_data.update(status='running', progress=0, message='Starting analysis', run_id=None)
+    
+    job = threading.Thread(
+        target=run_analysis_job,
+        args=(
+            csv_path,
+            api_key,
+            int(request.form.get('top_n', 10)),
+            int(request.form.get('max_prospects', 1500)),
+            request.form.get('tech_filter') or None,
+            request.form.get('web_scraping') == 'true'
+        ),
+        daemon=True
+    )
+    job.start()
+    
+    return jsonify({'status': 'started'})
+
+
+@app.route('/api/status')
+def status():
+    """Current job status, latest stage events and (when finished) the stored run ID"""
+    return jsonify({
+        'status': progress_data['status'],
+        'message': progress_data['message'],
+        'stages': progress_bus.snapshot(),
+        'run_id': progress_data['run_id']
+    })
+
+
+# One cache DB connection per server thread (schema setup runs once, not per request)
+thread_local = threading.local()
+
+
+def get_cache_db():
+    """Cache DB connection owned by the current server thread"""
+    if not hasattr(thread_local, 'cache_db'):
+        thread_local.cache_db = CacheDB()
+    return thread_local.cache_db
+
+
+@app.route('/api/runs')
+def list_runs():
+    """Stored runs, newest first"""
+    return jsonify({'runs': get_cache_db().list_runs()})
+
+
+@app.route('/api/runs/<run_id>')
+def get_run(run_id):
+    """Run summary and ranked providers (prospect lists are paged separately)"""
+    run = get_cache_db().get_run(run_id)
+    if not run:
+        return jsonify({'error': f'Unknown run: {run_id}'}), 404
+    return jsonify(run)
+
+
+@app.route('/api/runs/<run_id>/providers/<int:rank>/prospects')
+def run_prospects(run_id, rank):
+    """One page of a provider's matched prospects
+
+    Query parameters: page, per_page, sort (match_score|revenue), order (desc|asc),
+    country, technology (a TECHNOLOGY_KEYWORDS category such as 'injection').
+    """
+    sort = request.args.get('sort', 'match_score')
+    if sort not in ('match_score', 'revenue'):
+        return jsonify({'error': 'sort must be match_score or revenue'}), 400
+    
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 50)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+    
+    result = get_cache_db().query_run_matches(
+        run_id, rank,
+        sort=sort,
+        descending=request.args.get('order', 'desc') != 'asc',
+        country=request.args.get('country') or None,
+        technology=request.args.get('technology') or None,
+        page=page,
+        per_page=per_page
+    )
+    return jsonify(result)
+
+
+def list_arg(name):
+    """Comma-separated query parameter as a list (None when absent)"""
+    value = request.args.get(name, '')
+    return [v.strip() for v in value.split(',') if v.strip()] or None
+
+
+@app.route('/api/prospects')
+def query_prospects():
+    """Cached prospects selected in SQL
+    
+    Query parameters: region (EU), country, size (large|medium|small), technology,
+    brand (comma-separated lists), min_revenue, limit.
+    """
+    try:
+        prospects = get_cache_db().query_prospects(
+            region=request.args.get('region') or None,
+            countries=list_arg('country'),
+            sizes=list_arg('size'),
+            technologies=list_arg('technology'),
+            brands=list_arg('brand'),
+            min_revenue=request.args.get('min_revenue', type=float),
+            limit=min(request.args.get('limit', MAX_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'total': len(prospects), 'prospects': prospects})
+
+
+@app.route('/api/exhibitors')
+def query_exhibitors():
+    """Cached K2025 exhibitors selected in SQL
+    
+    Query parameters: region (EU), country, tier, technology (comma-separated lists), limit.
+    """
+    try:
+        exhibitors = get_cache_db().query_exhibitors(
+            region=request.args.get('region') or None,
+            countries=list_arg('country'),
+            tiers=list_arg('tier'),
+            technologies=list_arg('technology'),
+            limit=min(request.args.get('limit', MAX_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'total': len(exhibitors), 'exhibitors': exhibitors})
+
+
+@app.route('/api/runs/<run_id>/metrics')
+def run_metrics(run_id):
+    """Stored stage timings and counters of a run"""
+    summary = get_cache_db().get_run_metrics(run_id)
+    if summary is None:
+        return jsonify({'error': f'No metrics for run: {run_id}'}), 404
+    return jsonify(summary)
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Live metrics of the current/last dashboard run in Prometheus text format"""
+    return Response(metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/runs/<run_id>/export')
+def export_run(run_id):
+    """Download a run as Excel or JSON
+
+    Query parameters: format (xlsx|json), provider (rank), country, technology.
+    Exports are generated once per run and parameters and cached in EXPORT_DIR.
+    """
+    fmt = request.args.get('format', 'xlsx')
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({'error': 'format must be xlsx or json'}), 400
+    
+    run = get_cache_db().get_run(run_id)
+    if not run:
+        return jsonify({'error': f'Unknown run: {run_id}'}), 404
+    
+    params = {
+        'provider_rank': request.args.get('provider', type=int),
+        'country': request.args.get('country') or None,
+        'technology': request.args.get('technology') or None
+    }
+    path = export_cache_path(run, fmt, params)
+    download_name = f"machinery_partners_{run_id}.{fmt}"
+    
+    if os.path.exists(path):
+        return send_file(os.path.abspath(path), mimetype=EXPORT_MIMETYPES[fmt],
+                         as_attachment=True, download_name=download_name, max_age=0)
+    
+    job = start_export(run_id, fmt, path, params)
+    return Response(
+        stream_with_context(stream_export(job, follow=(fmt == 'json'))),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+    )
+
+
+@app.route('/api/progress/stream')
+def progress_stream():
+    """Server-Sent Events stream of pipeline progress"""
+    subscriber = progress_bus.subscribe()
+    
+    def generate():
+        try:
+            while True:
+                try:
+                    event = subscriber.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            progress_bus.unsubscribe(subscriber)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Machinery Matcher web dashboard")
+    parser.add_argument('--production', action='store_true',
+                        help="Serve with waitress (multi-threaded WSGI server, debug off)")
+    parser.add_argument('--debug', action='store_true', help="Development server with debugger and reloader")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=16, help="Worker threads in production mode")
+    return parser.parse_args()
+
 
 if __name__ == '__main__':
+    args = parse_args()
+    
     print("\n" + "="*70)
     print("🎯 MACHINERY MATCHER DASHBOARD")
     print("="*70)
-    print("\n📊 Starting web server...")
-    print("🌐 Open your browser: http://localhost:5000")
+    print(f"\n📊 Starting web server ({'production' if args.production else 'development'} mode)...")
+    print(f"🌐 Open your browser: http://localhost:{args.port}")
     print("\nPress Ctrl+C to stop\n")
     print("="*70 + "\n")
     
-    app.run(debug=True, port=5000, host='127.0.0.1')
+    if args.production:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("❌ waitress is not installed: pip3 install waitress")
+            raise SystemExit(1)
+        
+        # SSE streams hold a thread each, so leave headroom over the expected client count
+        serve(app, host=args.host, port=args.port, threads=args.threads, channel_timeout=120)
+    else:
+        app.run(debug=args.debug, port=args.port, host=args.host, threaded=True)
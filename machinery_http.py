@@ -0,0 +1,490 @@
+"""
+MACHINERY MATCHER - HTTP / HTML HELPERS
+Fast visible-text extraction and a bounded crawler for prospect websites.
+
+Pages are streamed into lxml's incremental HTML parser chunk by chunk;
+parsing stops as soon as enough visible text has been collected, and the
+download is capped at a byte budget so multi-MB homepages cannot stall a
+worker.
+
+SiteCrawler reads a prospect's homepage, picks the internal pages most
+likely to list the machine park (/equipment, /machinery, /about, ...) and
+fetches up to a per-prospect page budget of them concurrently, bounded by
+a global limit and by CachedSession's adaptive per-host limit
+(machinery_limits).
+
+HTTPCache keeps raw responses (zlib-compressed body, headers, ETag,
+Last-Modified, final URL after redirects, fetch time) in a SQLite file;
+CachedSession serves GETs from it while they are within their TTL,
+revalidates stale entries with If-None-Match/If-Modified-Since, and in
+offline mode replays the cache without touching the network. Changing the
+detection logic then only means re-parsing cached pages. A streamed GET is
+handed to the parser as it downloads and cached as far as it was read, so
+the early stop of extract_page also ends the download on a cache miss.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urldefrag, urlparse
+
+import requests
+from lxml import etree
+from requests.structures import CaseInsensitiveDict
+
+from machinery_limits import limiters, classify_exception, DeadlineExceeded
+from machinery_metrics import metrics, InstrumentedSession
+from machinery_profiling import InlineExecutor, run_inline
+
+
+# Elements whose text is never visible page content
+SKIP_TAGS = {'script', 'style', 'nav', 'footer', 'noscript', 'template', 'svg'}
+
+CHUNK_SIZE = 16 * 1024
+
+MAX_LINKS_PER_PAGE = 500
+
+# Response headers that no longer apply once the body is stored decoded
+DROP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+# URL path keywords of pages that tend to list a company's machines, best first
+CRAWL_KEYWORDS = [
+    'equipment', 'machinery', 'machine', 'maschinenpark', 'utilaje', 'echipamente', 'dotari',
+    'technology', 'technologie', 'tehnologie', 'production', 'productie', 'produktion',
+    'capabilities', 'about', 'despre', 'company', 'firma'
+]
+
+
+class VisibleTextCollector:
+    """lxml parser target that keeps visible text and stops once it has enough"""
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.skip_depth = 0
+        self.links = []
+
+    @property
+    def full(self):
+        return self.length >= self.max_chars
+
+    def start(self, tag, attrib):
+        # Links are kept even inside <nav>: that is where the sub-pages are listed
+        if tag == 'a' and attrib.get('href') and len(self.links) < MAX_LINKS_PER_PAGE:
+            self.links.append(attrib['href'])
+        if self.skip_depth or tag in SKIP_TAGS:
+            self.skip_depth += 1
+
+    def end(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= 1
+
+    def data(self, data):
+        if self.skip_depth or self.full:
+            return
+        text = ' '.join(data.split())
+        if text:
+            self.parts.append(text)
+            self.length += len(text) + 1
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return ' '.join(self.parts)[:self.max_chars]
+
+
+def _charset(response):
+    """Charset declared in the Content-Type header, if any (else lxml sniffs <meta>)"""
+    content_type = response.headers.get('Content-Type', '')
+    if 'charset=' in content_type:
+        return content_type.split('charset=')[-1].split(';')[0].strip().strip('"') or None
+    return None
+
+
+def extract_visible_text(response, max_chars=3000, max_bytes=1_000_000):
+    """Visible text of a streamed response (requests ..., stream=True)
+
+    Reads at most max_bytes and stops early once max_chars of text are
+    collected. Returns (text, bytes_read).
+    """
+    text, _, bytes_read = extract_page(response, max_chars, max_bytes)
+    return text, bytes_read
+
+
+def extract_page(response, max_chars=3000, max_bytes=1_000_000, deadline=None):
+    """Visible text and link targets of a streamed response
+
+    Same budgets as extract_visible_text; stops reading at deadline
+    (time.monotonic()) too. Returns (text, links, bytes_read).
+    """
+    collector = VisibleTextCollector(max_chars)
+    try:
+        parser = etree.HTMLParser(target=collector, encoding=_charset(response))
+    except LookupError:
+        parser = etree.HTMLParser(target=collector)
+
+    bytes_read = 0
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if not chunk:
+                continue
+            chunk = chunk[:max_bytes - bytes_read]
+            bytes_read += len(chunk)
+            with metrics.stage('html_parse'):
+                parser.feed(chunk)
+            if collector.full or bytes_read >= max_bytes:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                metrics.incr('pages_cut_by_deadline')
+                break
+    finally:
+        response.close()
+        # Responses from CachedSession were already counted when downloaded
+        if not hasattr(response, 'cache_status'):
+            metrics.incr('http_bytes_fetched', bytes_read)
+
+    with metrics.stage('html_parse'):
+        try:
+            text = parser.close()
+        except etree.XMLSyntaxError:
+            text = collector.close()
+    return text or '', collector.links, bytes_read
+
+
+def _host(url):
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def candidate_links(page_url, hrefs, keywords=CRAWL_KEYWORDS, limit=3):
+    """Internal links whose path contains a crawl keyword, best keyword first"""
+    host = _host(page_url)
+    page_url = urldefrag(page_url)[0]
+    ranked = {}
+    for href in hrefs:
+        url = urldefrag(urljoin(page_url, href.strip()))[0]
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or _host(url) != host or url == page_url:
+            continue
+        path = parsed.path.lower()
+        rank = next((i for i, keyword in enumerate(keywords) if keyword in path), None)
+        if rank is not None and url not in ranked:
+            ranked[url] = (rank, len(path))
+    return sorted(ranked, key=ranked.get)[:limit]
+
+
+class SiteCrawler:
+    """Fetches a prospect's homepage plus its most promising internal pages
+
+    max_pages: per-prospect page budget (homepage included)
+    max_concurrency: pages fetched at once over all prospects
+    Use a CachedSession to keep the pages (and revalidate them on re-runs);
+    it also adapts the number of pages fetched at once from each host.
+    """
+
+    def __init__(self, session, max_pages=4, max_concurrency=8,
+                 keywords=CRAWL_KEYWORDS, max_chars=3000, max_bytes=1_000_000, timeout=10):
+        self.session = session
+        self.max_pages = max_pages
+        self.keywords = keywords
+        self.max_chars = max_chars
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='crawl')
+
+    def crawl(self, url, deadline=None):
+        """Pages of one prospect site: [{'url', 'text', 'links'}], homepage first
+
+        Returns None when the homepage could not be loaded (network error,
+        timeout, error status), so callers can tell an unreachable site from
+        one without anything of interest.
+        deadline: time.monotonic() by which the crawl must be done; request
+        timeouts shrink to the time left and no page is started after it
+        """
+        home = self._fetch(url, deadline)
+        if home is None:
+            return None
+
+        links = candidate_links(home['url'], home['links'], self.keywords, self.max_pages - 1)
+        # A CPU-profiled stage fetches them in its own thread (see machinery_profiling)
+        executor = InlineExecutor() if run_inline() else self._executor
+        pages = [executor.submit(self._fetch, link, deadline) for link in links]
+        return [home] + [page for page in (future.result() for future in pages) if page is not None]
+
+    def _fetch(self, url, deadline=None):
+        """GET and parse one page; None on failure or once the deadline has passed"""
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
+        try:
+            # Waiting for a host slot counts against the deadline too
+            response = self.session.get(url, timeout=self.timeout, stream=True,
+                                        **({'deadline': deadline} if deadline is not None else {}))
+            if response.status_code != 200:
+                response.close()
+                return None
+            text, links, _ = extract_page(response, self.max_chars, self.max_bytes, deadline)
+        except (requests.RequestException, etree.Error):
+            return None
+
+        # Links resolve against where redirects ended (also for cached responses)
+        return {
+            'url': response.url,
+            'text': text,
+            'links': [urljoin(response.url, href.strip()) for href in links]
+        }
+
+
+class CacheMissError(requests.ConnectionError):
+    """Offline mode and the URL is not in the HTTP cache"""
+
+
+class HTTPCache:
+    """Disk-backed cache of raw GET responses, keyed by URL
+
+    ttl: {'default': seconds, '<host suffix>': seconds, ...}; the longest
+         matching host suffix wins
+    offline: replay cached responses whatever their age, never fetch
+    """
+
+    def __init__(self, path='http_cache.db', ttl=None, offline=False):
+        self.path = path
+        self.ttl = {'default': 24 * 3600, **(ttl or {})}
+        self.offline = offline
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER,
+                headers TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB,
+                size INTEGER,
+                truncated INTEGER,
+                fetched_at REAL,
+                final_url TEXT
+            )
+        ''')
+        # Caches written before redirects were recorded
+        if 'final_url' not in {row[1] for row in self.conn.execute("PRAGMA table_info(responses)")}:
+            self.conn.execute("ALTER TABLE responses ADD COLUMN final_url TEXT")
+        self.conn.commit()
+
+    def ttl_for(self, url):
+        """TTL in seconds for a URL"""
+        host = _host(url)
+        matches = [suffix for suffix in self.ttl if suffix != 'default' and
+                   (host == suffix or host.endswith('.' + suffix))]
+        return self.ttl[max(matches, key=len)] if matches else self.ttl['default']
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl_for(entry['url'])
+
+    @metrics.timed('http_cache')
+    def get(self, url):
+        """Cached response as a dict, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, headers, etag, last_modified, body, truncated, fetched_at, final_url "
+                "FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            'url': url,
+            'final_url': row[7] or url,
+            'status': row[0],
+            'headers': json.loads(row[1]),
+            'etag': row[2],
+            'last_modified': row[3],
+            'body': zlib.decompress(row[4]),
+            'truncated': bool(row[5]),
+            'fetched_at': row[6]
+        }
+
+    @metrics.timed('http_cache')
+    def store(self, url, status, headers, body, truncated=False, final_url=None):
+        """Save a response (headers as a dict, body as decoded bytes) under the requested URL
+
+        final_url: where redirects ended; cached responses report it as their url
+        """
+        headers = {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS}
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, status, json.dumps(headers), headers.get('ETag'), headers.get('Last-Modified'),
+                 zlib.compress(body, 6), len(body), int(truncated), time.time(), final_url or url)
+            )
+            self.conn.commit()
+
+    def touch(self, url):
+        """Mark a cached response as just revalidated"""
+        with self._lock:
+            self.conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def cached_response(entry, cache_status):
+    """requests.Response built from a cache entry (usable with or without stream=True)"""
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.headers = CaseInsensitiveDict({k: v for k, v in entry['headers'].items() if k.lower() not in DROP_HEADERS})
+    response.url = entry.get('final_url') or entry['url']
+    response._content = entry['body']
+    response._content_consumed = True
+    response.cache_status = cache_status
+    return response
+
+
+def _shrink_timeout(kwargs, deadline):
+    """Cut a request's timeout to the time left until deadline (time.monotonic()); Timeout once it has passed"""
+    if deadline is None:
+        return
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("Deadline passed before the request started")
+    timeout = kwargs.get('timeout')
+    kwargs['timeout'] = min(timeout, left) if isinstance(timeout, (int, float)) else left
+
+
+class CachedSession(InstrumentedSession):
+    """InstrumentedSession whose GETs go through an HTTPCache
+
+    Fresh entries are served without a request; stale ones are revalidated
+    with a conditional GET. Bodies are stored up to max_body_bytes.
+    Every response carries cache_status: 'hit', 'revalidated' or 'miss'.
+    A GET with stream=True that misses returns a TeeResponse: the body is
+    read from the network as the caller consumes it, and cached when the
+    response is closed, so it must be closed.
+    deadline=<time.monotonic()>: waiting for a host slot stops at the
+    deadline (DeadlineExceeded, a requests.Timeout), and the request timeout
+    shrinks to the time left once the slot is free.
+    """
+
+    def __init__(self, cache=None, max_body_bytes=1_000_000):
+        super().__init__()
+        self.cache = cache
+        self.max_body_bytes = max_body_bytes
+
+    def request(self, method, url, *args, **kwargs):
+        limiter = limiters.get('host', _host(url))
+        deadline = kwargs.pop('deadline', None)
+        if self.cache is None or method.upper() != 'GET':
+            with limiter.slot(deadline) as call:
+                _shrink_timeout(kwargs, deadline)
+                response = super().request(method, url, *args, **kwargs)
+                call.report(response)
+                return response
+
+        stream = kwargs.pop('stream', False)
+        entry = self.cache.get(url)
+        # A body cached only as far as a streaming parser read it does not serve a full read
+        if entry and not stream and not self.cache.offline and self._partial(entry):
+            entry = None
+        if entry and (self.cache.offline or self.cache.is_fresh(entry)):
+            metrics.incr('cache_hits', cache='http')
+            return cached_response(entry, 'hit')
+        if self.cache.offline:
+            metrics.incr('cache_misses', cache='http')
+            raise CacheMissError(f"Not in HTTP cache (offline mode): {url}")
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        # The host's adaptive limit covers the request and the body download
+        call = limiter.start(deadline)
+        try:
+            _shrink_timeout(kwargs, deadline)
+            response = super().request(method, url, *args, headers=headers, stream=True, **kwargs)
+        except BaseException as e:
+            call.outcome = classify_exception(e)
+            limiter.release(call)
+            raise
+        call.report(response)
+
+        if response.status_code == 304 and entry:
+            response.close()
+            limiter.release(call)
+            self.cache.touch(url)
+            metrics.incr('cache_hits', cache='http')
+            metrics.incr('http_not_modified')
+            return cached_response(entry, 'revalidated')
+
+        metrics.incr('cache_misses', cache='http')
+        tee = TeeResponse(response, self.cache if response.status_code == 200 else None, url,
+                          self.max_body_bytes, lambda: limiter.release(call))
+        if stream and response.status_code == 200:
+            return tee
+        # Non-streamed GETs (and error pages) are read at once, as requests would
+        body = tee.content
+        return cached_response({'url': url, 'final_url': response.url, 'status': response.status_code,
+                                'headers': dict(response.headers), 'body': body}, 'miss')
+
+    def _partial(self, entry):
+        """Whether the caller stopped reading the cached body before max_body_bytes"""
+        return entry['truncated'] and len(entry['body']) < self.max_body_bytes
+
+
+class TeeResponse(requests.Response):
+    """Response streamed from the network while its body is copied into an HTTPCache
+
+    The body is read only as far as the caller consumes it (up to
+    max_body_bytes); close() stores what was read, marked truncated unless
+    the whole body was, and runs on_close (frees the host's limiter slot).
+    """
+
+    def __init__(self, response, cache, url, max_body_bytes, on_close=None):
+        super().__init__()
+        self.__dict__.update({k: v for k, v in response.__dict__.items() if k != 'cache_status'})
+        self.cache = cache
+        self.cache_url = url
+        self.max_body_bytes = max_body_bytes
+        self.cache_status = 'miss'
+        self._on_close = on_close
+        self._chunks = []
+        self._size = 0
+        self._complete = False
+        self._closed = False
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        chunks = self._tee(super().iter_content(CHUNK_SIZE))
+        return requests.utils.stream_decode_response_unicode(chunks, self) if decode_unicode else chunks
+
+    def _tee(self, chunks):
+        try:
+            for chunk in chunks:
+                chunk = chunk[:self.max_body_bytes - self._size]
+                self._chunks.append(chunk)
+                self._size += len(chunk)
+                yield chunk
+                if self._size >= self.max_body_bytes:
+                    break
+            else:
+                self._complete = True
+        finally:
+            self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            super().close()
+        finally:
+            metrics.incr('http_bytes_fetched', self._size)
+            if self._on_close:
+                self._on_close()
+            if self.cache is not None:
+                self.cache.store(self.cache_url, self.status_code, dict(self.headers), b''.join(self._chunks),
+                                 truncated=not self._complete, final_url=self.url)
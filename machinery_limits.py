@@ -0,0 +1,233 @@
+"""
+MACHINERY MATCHER - ADAPTIVE CONCURRENCY
+AIMD limits for remote calls: one limiter per website host and one per API.
+
+While calls succeed within the latency target and use the whole limit, a
+limiter allows one more concurrent call after each full window of
+successes (additive increase).
+A 429, timeout or 5xx halves the limit (multiplicative decrease), at most
+once per round trip. At the floor of one call, further throttling adds a
+growing pause between calls instead; a Retry-After header is honoured.
+
+Limits that moved are exposed as gauges: concurrency_limit{target="host:..."}
+and call_delay_seconds{target=...}; API limits are always exposed.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from machinery_metrics import metrics
+
+
+OK, CONGESTED, FAILED = 'ok', 'congested', 'failed'
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The caller's deadline passed before the call started (says nothing about the remote side)"""
+
+DEFAULT_SETTINGS = {
+    # Websites: few calls per host to start, never more than 8
+    'host': {'initial': 2, 'minimum': 1, 'maximum': 8, 'latency_target': 5.0},
+    # LLM APIs: a long call is normal, only throttling / errors cut the limit
+    'api': {'initial': 2, 'minimum': 1, 'maximum': 8, 'latency_target': None}
+}
+
+
+def classify_status(status):
+    """OK, or CONGESTED for 429 and 5xx (other 4xx say nothing about load)"""
+    return CONGESTED if status == 429 or status >= 500 else OK
+
+
+def classify_exception(error):
+    """CONGESTED for timeouts and throttling/server errors, FAILED for anything else"""
+    if isinstance(error, DeadlineExceeded):
+        return FAILED
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return classify_status(status)
+    if isinstance(error, (requests.Timeout, TimeoutError)) or 'Timeout' in type(error).__name__:
+        return CONGESTED
+    return FAILED
+
+
+def retry_after(source):
+    """Seconds from a Retry-After header of a response, or of an exception's response"""
+    response = getattr(source, 'response', source)
+    value = (getattr(response, 'headers', None) or {}).get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class _Call:
+    """One call holding a limiter slot; report() its response if it did not raise"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.outcome = None
+        self.retry_after = None
+
+    def report(self, response):
+        self.outcome = classify_status(response.status_code)
+        if self.outcome == CONGESTED:
+            self.retry_after = retry_after(response)
+
+
+class AIMDLimiter:
+    """Concurrency limit for one remote side, adjusted by additive increase / multiplicative decrease"""
+
+    def __init__(self, name, initial=2, minimum=1, maximum=8, increase=1.0, decrease=0.5,
+                 latency_target=None, max_delay=30.0, publish=True):
+        self.name = name
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.max_delay = max_delay
+        self.limit = float(initial)
+        self.delay = 0.0
+        self.in_flight = 0
+        self._not_before = 0.0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        if publish:
+            self._publish()
+
+    @contextmanager
+    def slot(self, deadline=None):
+        """Hold one call slot: `with limiter.slot() as call: response = ...; call.report(response)`
+
+        An exception from the block is classified and re-raised.
+        deadline: see acquire()
+        """
+        self.acquire(deadline)
+        call = _Call()
+        try:
+            yield call
+        except BaseException as e:
+            call.outcome = call.outcome or classify_exception(e)
+            call.retry_after = call.retry_after or retry_after(e)
+            raise
+        finally:
+            self.release(call)
+
+    def start(self, deadline=None):
+        """Take a slot for a call that outlives a with-block (e.g. a streamed body)
+
+        Returns the call; set its outcome if it fails, then hand it to release().
+        deadline: see acquire()
+        """
+        self.acquire(deadline)
+        return _Call()
+
+    def acquire(self, deadline=None):
+        """Wait for a free slot (and for any backoff pause to pass)
+
+        deadline: time.monotonic() after which to stop waiting and raise
+        DeadlineExceeded (no slot is taken then)
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self._not_before - now
+                if wait <= 0 and self.in_flight < max(1, int(self.limit)):
+                    break
+                if deadline is not None:
+                    if now >= deadline:
+                        raise DeadlineExceeded(f"No {self.name} slot free before the deadline")
+                    wait = min(wait, deadline - now) if wait > 0 else deadline - now
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+            if self.delay:
+                self._not_before = time.monotonic() + self.delay
+
+    def pause_left(self):
+        """Seconds until the next call may start because of a backoff pause (0 if none)"""
+        with self._cond:
+            return max(0.0, self._not_before - time.monotonic())
+
+    def release(self, call):
+        """Free the slot and adjust the limit from the call's outcome and latency"""
+        now = time.monotonic()
+        outcome = call.outcome or OK
+        with self._cond:
+            self.in_flight -= 1
+            changed = False
+            if outcome == CONGESTED:
+                metrics.incr('throttled_calls', target=self.name)
+                # One cut per round trip: calls started before the last cut saw the old limit
+                if call.started >= self._last_decrease:
+                    if self.limit > self.minimum:
+                        self.limit = max(self.minimum, self.limit * self.decrease)
+                    else:
+                        self.delay = min(self.max_delay, max(self.delay * 2, 0.25))
+                    self._last_decrease = now
+                    self._successes = 0
+                    changed = True
+                if call.retry_after:
+                    self._not_before = max(self._not_before, now + min(call.retry_after, self.max_delay * 4))
+            elif outcome == OK and (self.latency_target is None or now - call.started <= self.latency_target):
+                if self.delay:
+                    self.delay = self.delay / 2 if self.delay > 0.05 else 0.0
+                    changed = True
+                elif self.in_flight + 1 >= int(self.limit):
+                    # Only a limit that is actually used has proven it can grow
+                    self._successes += 1
+                    if self._successes >= self.limit and self.limit < self.maximum:
+                        self.limit = min(self.maximum, self.limit + self.increase)
+                        self._successes = 0
+                        changed = True
+            if changed:
+                self._publish()
+            self._cond.notify_all()
+
+    def _publish(self):
+        metrics.set_gauge('concurrency_limit', round(self.limit, 2), target=self.name)
+        metrics.set_gauge('call_delay_seconds', round(self.delay, 3), target=self.name)
+
+
+class LimiterRegistry:
+    """One AIMDLimiter per (kind, key), e.g. ('host', 'example.com') or ('api', 'anthropic')"""
+
+    def __init__(self, settings=None):
+        self.settings = {kind: dict(values) for kind, values in DEFAULT_SETTINGS.items()}
+        self.configure(settings)
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def configure(self, settings=None):
+        """Override settings per kind, e.g. {'host': {'maximum': 4}}; applies to limiters created later"""
+        for kind, values in (settings or {}).items():
+            self.settings.setdefault(kind, {}).update(values)
+
+    def get(self, kind, key):
+        name = f"{kind}:{key}"
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                # Thousands of prospect hosts: only publish a host's gauges once its limit moves
+                limiter = AIMDLimiter(name, publish=kind != 'host', **self.settings.get(kind, {}))
+                self._limiters[name] = limiter
+            return limiter
+
+    def snapshot(self):
+        """{name: (limit, delay seconds)} of every limiter"""
+        with self._lock:
+            return {name: (limiter.limit, limiter.delay) for name, limiter in self._limiters.items()}
+
+
+# Process-wide limiters shared by every session and client
+limiters = LimiterRegistry()
@@ -0,0 +1,98 @@
+"""
+MACHINERY MATCHER - CACHE MAINTENANCE
+Keeps machinery_cache.db small and its lookups fast over months of runs.
+
+Usage:
+    python3 machinery_maintenance.py stats            # table sizes and cache freshness
+    python3 machinery_maintenance.py compact          # prune expired rows, VACUUM, ANALYZE
+    python3 machinery_maintenance.py migrate          # upgrade all payloads to the current format
+    python3 machinery_maintenance.py compact --db other_cache.db
+
+Expiry follows CACHE_TTL_DAYS / CACHE_MAX_STALE_DAYS in config.py. Old-format
+payloads are also upgraded one by one as runs read them; migrate does the rest
+in bulk and then compacts the file.
+"""
+
+import argparse
+
+from machinery_matcher import CacheDB, CACHE_SCHEMA_VERSION
+
+
+def format_bytes(size):
+    if size is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def print_stats(cache_db):
+    """Rows, size on disk and freshness per table"""
+    print(f"\n{'Table':<28} {'Rows':>10} {'Size':>10}  Freshness")
+    print("-" * 70)
+    for table in cache_db.table_sizes():
+        freshness = ''
+        if table['table'] in cache_db.ttl_days:
+            freshness = ', '.join(f"{count} {state}" for state, count in freshness_counts(cache_db, table['table']))
+        print(f"{table['table']:<28} {table['rows']:>10,} {format_bytes(table['bytes']):>10}  {freshness}")
+    used, free = cache_db.file_size()
+    print("-" * 70)
+    print(f"{'Database file':<28} {'':>10} {format_bytes(used):>10}  ({format_bytes(free)} free pages)")
+
+
+def freshness_counts(cache_db, table):
+    """[(state, rows)] for a cache table with a TTL policy"""
+    counts = {}
+    for (age,) in cache_db.conn.execute(f"SELECT {cache_db.AGE_DAYS} FROM {table}"):
+        state = cache_db.freshness(table, age)
+        counts[state] = counts.get(state, 0) + 1
+    return sorted(counts.items())
+
+
+def compact(cache_db):
+    """Prune expired rows, VACUUM and ANALYZE"""
+    used_before, _ = cache_db.file_size()
+    deleted = cache_db.prune_expired()
+    for table, rows in deleted.items():
+        print(f"🗑  {table}: {rows:,} expired rows removed")
+    print("🧹 VACUUM + ANALYZE...")
+    cache_db.compact()
+    used_after, _ = cache_db.file_size()
+    print(f"✓ {format_bytes(used_before)} → {format_bytes(used_after)}")
+
+
+def migrate(cache_db):
+    """Upgrade every cache payload to the current schema version, then compact"""
+    upgraded = cache_db.migrate_payloads()
+    for table, rows in upgraded.items():
+        print(f"⬆  {table}: {rows:,} rows upgraded to schema version {CACHE_SCHEMA_VERSION}")
+    if any(upgraded.values()):
+        compact(cache_db)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Machinery matcher cache maintenance")
+    parser.add_argument('command', choices=['stats', 'compact', 'migrate'])
+    parser.add_argument('--db', default='machinery_cache.db', help="Cache database file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache_db = CacheDB(args.db)
+
+    print("\n" + "="*70)
+    print(f"🗄  CACHE MAINTENANCE: {args.db}")
+    print("="*70)
+
+    if args.command == 'compact':
+        compact(cache_db)
+    elif args.command == 'migrate':
+        migrate(cache_db)
+    print_stats(cache_db)
+    cache_db.conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,4 @@
-def _calculate_match(self, prospect, provider, technology_filter=None):
-        """Calculate match score between prospect and provider"""
-        
-        score = 0
-        reasons = []
-        
-        # Technology matching (HIGH PRIORITY if filter is set)
-        if technology_filter:
-            prospect_processes = prospect.get('production_processes', [])
-            provider_techs = provider.get('technologies', []) + provider.get('processes', [])
-            tech_keywords = TECHNOLOGY_KEYWORDS.get(technology_filter, [])
-            
-            prospect_has_tech = any(
-                any(keyword.lower() in process.lower() for keyword in tech_keywords)
-                for process in prospect_processes
-            ) if prospect_processes else False
-            
-            provider_has_tech = any(
-                any(keyword.lower() in tech.lower() for keyword in tech_keywords)
-                for tech in provider_techs
-            ) if provider_techs else False
-            
-            if prospect_has_tech and provider_has_tech:
-                score += 35
-                reasons.append(f"Both use {technology_filter} technology")
-            elif provider_has_tech:
-                score += 20
-                reasons.append(f"Provider specializes in {technology_filter}")
-        
-        """
+"""
 SCALABLE MACHINERY MATCHER v2.0
 Optimized for 1500+ prospects and 1900+ K2025 exhibitors
 
@@ -51,13 +22,27 @@ from PIL import Image
 from io import BytesIO
 from urllib.parse import urljoin
 import time
+import math
+import random
+import argparse
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
 import sqlite3
 from pathlib import Path
 import hashlib
+import zlib
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl.cell import WriteOnlyCell
+from machinery_progress import progress_bus
+from machinery_metrics import metrics, record_llm_usage, print_summary
+from machinery_pipeline import StageGraph
+from machinery_profiling import StageProfiler, PROFILE_MODES, worker_pool
+from machinery_http import SiteCrawler, HTTPCache, CachedSession
+from machinery_limits import limiters, classify_exception, CONGESTED
+from machinery_brands import BrandDetector, DEFAULT_ALIAS_FILE, merge_detections, trie_regex
 
 # Configuration
 try:
@@ -71,6 +56,78 @@ except ImportError:
     ENABLE_WEB_SCRAPING = True
     FILTER_BY_TECHNOLOGY = None
 
+# Optional tuning settings (config.py files from older versions may not define them)
+try:
+    import config as user_config
+except ImportError:
+    user_config = None
+
+
+def config_value(name, default):
+    """Optional setting from config.py, or its default"""
+    return getattr(user_config, name, default)
+
+
+MAX_PAGE_BYTES = config_value('MAX_PAGE_BYTES', 1_000_000)
+MAX_PAGE_TEXT_CHARS = config_value('MAX_PAGE_TEXT_CHARS', 3000)
+BRAND_ALIAS_FILE = config_value('BRAND_ALIAS_FILE', DEFAULT_ALIAS_FILE)
+PROSPECT_TEXT_COLUMNS = config_value('PROSPECT_TEXT_COLUMNS', ['Activitate', 'Descriere', 'Domeniu', 'CAEN'])
+CRAWL_MAX_PAGES = config_value('CRAWL_MAX_PAGES', 4)
+CRAWL_CONCURRENCY = config_value('CRAWL_CONCURRENCY', 8)
+CRAWL_PER_HOST = config_value('CRAWL_PER_HOST', 2)  # Starting point of the adaptive per-host limit
+HTTP_CACHE_PATH = config_value('HTTP_CACHE_PATH', 'http_cache.db')
+HTTP_CACHE_TTL = config_value('HTTP_CACHE_TTL', {'default': 24 * 3600, 'k-online.com': 7 * 24 * 3600})
+HTTP_CACHE_OFFLINE = config_value('HTTP_CACHE_OFFLINE', False)
+K2025_MAX_PAGE_BYTES = 20_000_000  # Directory pages are large; keep them whole in the HTTP cache
+
+# Cache freshness per table, in days. Rows older than the TTL are still served
+# but refreshed in the background; past TTL + max stale they count as missing
+# and are removed by `python machinery_maintenance.py compact`.
+CACHE_TTL_DAYS = config_value('CACHE_TTL_DAYS', {'prospect_data': 30, 'k2025_exhibitors': 14, 'provider_data': 30})
+CACHE_MAX_STALE_DAYS = config_value('CACHE_MAX_STALE_DAYS', {'prospect_data': 60, 'k2025_exhibitors': 30,
+                                                             'provider_data': 0})
+CACHE_REFRESH_WORKERS = config_value('CACHE_REFRESH_WORKERS', 2)
+
+# Task queue (machinery_worker.py): a leased task returns to the queue when its
+# worker does not finish it in time; failed ones are retried with a growing delay
+TASK_LEASE_SECONDS = config_value('TASK_LEASE_SECONDS', 300)
+TASK_MAX_ATTEMPTS = config_value('TASK_MAX_ATTEMPTS', 5)
+TASK_RETRY_DELAY = config_value('TASK_RETRY_DELAY', 30)
+
+# Adaptive (AIMD) concurrency per website host and per LLM API, see machinery_limits
+ADAPTIVE_LIMITS = config_value('ADAPTIVE_LIMITS', {
+    'host': {'initial': CRAWL_PER_HOST, 'maximum': 8, 'latency_target': 5.0},
+    'api': {'initial': 2, 'maximum': 8}
+})
+limiters.configure(ADAPTIVE_LIMITS)
+LLM_MAX_RETRIES = config_value('LLM_MAX_RETRIES', 4)  # Retries of a throttled (429/529/5xx/timeout) LLM call
+LLM_RETRY_DELAY = config_value('LLM_RETRY_DELAY', 1.0)  # Backoff before the first retry; doubles per retry, jittered
+LLM_RETRY_MAX_DELAY = config_value('LLM_RETRY_MAX_DELAY', 30.0)
+
+# Provider profiling requests: batches are packed up to a token budget of
+# provider data, and to ~75% of max_tokens for the expected profiles
+PROFILE_INPUT_TOKEN_BUDGET = config_value('PROFILE_INPUT_TOKEN_BUDGET', 4000)
+PROFILE_MAX_OUTPUT_TOKENS = config_value('PROFILE_MAX_OUTPUT_TOKENS', 4096)
+PROFILE_TOKENS_PER_PROFILE = config_value('PROFILE_TOKENS_PER_PROFILE', 180)
+PROFILE_PROMPT_FIELDS = ('name', 'country', 'tier', 'specialty', 'products', 'technologies')
+
+# Bulk profiling with the Message Batches API (machinery_bulk.py)
+BULK_POLL_INTERVAL = config_value('BULK_POLL_INTERVAL', 60)  # Seconds between status checks with --wait
+BULK_MAX_ATTEMPTS = config_value('BULK_MAX_ATTEMPTS', 3)     # Submissions of an errored/expired request
+
+# Streaming runs (--stream): enriched prospects waiting for the scorer, and how
+# often a partial ranking is printed
+STREAM_QUEUE_SIZE = config_value('STREAM_QUEUE_SIZE', 200)
+STREAM_REPORT_EVERY = config_value('STREAM_REPORT_EVERY', 100)
+
+# Time-budgeted runs (--time-budget 45m): share of the budget kept for scoring
+# and export, and the assumed seconds per website enrichment until one is measured
+TIME_BUDGET_RESERVE = config_value('TIME_BUDGET_RESERVE', 0.1)
+TIME_BUDGET_SCRAPE_ESTIMATE = config_value('TIME_BUDGET_SCRAPE_ESTIMATE', 10.0)
+
+# Preview runs (--preview): prospects scored from the region/size strata
+PREVIEW_SAMPLE_SIZE = config_value('PREVIEW_SAMPLE_SIZE', 150)
+
 # K2025 Exhibitor scraping URL
 K2025_SEARCH_URL = "https://www.k-online.com/vis/v1/en/search"
 K2025_DIRECTORY_URL = "https://www.k-online.com/vis/v1/en/directory/{letter}"
@@ -88,7 +145,9 @@ TECHNOLOGY_KEYWORDS = {
         'vertical injection', 'horizontal injection', 'toggle injection',
         'hydraulic injection', 'electric injection', 'hybrid injection',
         'LSR injection', 'liquid silicone', 'rubber injection',
-        'reaction injection', 'RIM', 'structural foam', 'MuCell'
+        'reaction injection', 'RIM', 'structural foam', 'MuCell',
+        # Romanian / German (CSV activity fields, local websites)
+        'injectie', 'injecție', 'injectare', 'Spritzguss', 'Spritzgießen'
     ],
     
     # EXTRUSION - All types
@@ -99,7 +158,8 @@ TECHNOLOGY_KEYWORDS = {
         'wire coating', 'cable extrusion', 'tube extrusion', 'hose extrusion',
         'compounding', 'twin-screw', 'single-screw', 'counter-rotating',
         'window profile', 'PVC extrusion', 'WPC extrusion', 'foam extrusion',
-        'extrusion coating', 'extrusion lamination', 'strand pelletizing'
+        'extrusion coating', 'extrusion lamination', 'strand pelletizing',
+        'extrudare', 'extrudere'
     ],
     
     # BLOW MOLDING - All variations
@@ -110,7 +170,8 @@ TECHNOLOGY_KEYWORDS = {
         'PET blow', 'preform', 'preform injection', 'bottle production',
         'container blowing', 'HDPE bottle', 'multilayer blow',
         '3D blow molding', 'shuttle blow', 'continuous blow',
-        'accumulator head', 'rotary blow', 'linear blow'
+        'accumulator head', 'rotary blow', 'linear blow',
+        'suflare', 'Blasformen'
     ],
     
     # THERMOFORMING
@@ -118,7 +179,8 @@ TECHNOLOGY_KEYWORDS = {
         'thermoforming', 'vacuum forming', 'pressure forming',
         'twin-sheet thermoforming', 'plug-assist', 'drape forming',
         'matched mold', 'forming', 'vacuum thermoform', 'blister pack',
-        'clamshell', 'deep draw', 'skin packaging', 'roll-fed thermoform'
+        'clamshell', 'deep draw', 'skin packaging', 'roll-fed thermoform',
+        'termoformare', 'Thermoformen'
     ],
     
     # COMPRESSION MOLDING
@@ -183,7 +245,8 @@ TECHNOLOGY_KEYWORDS = {
         'recycling', 'regranulation', 'agglomeration', 'densification',
         'wash line', 'flake production', 'pelletizing', 'reprocessing',
         'post-consumer', 'PCR', 'regrind', 'reclaim', 'circular economy',
-        'mechanical recycling', 'chemical recycling', 'pyrolysis'
+        'mechanical recycling', 'chemical recycling', 'pyrolysis',
+        'reciclare'
     ],
     
     # DECORATING & FINISHING
@@ -201,6 +264,219 @@ for category, keywords in TECHNOLOGY_KEYWORDS.items():
     for keyword in keywords:
         TECHNOLOGY_CATEGORIES[keyword.lower()] = category
 
+# Word-boundary matchers per category (short acronyms like 'AM' or 'RIM' must not hit 'foam'/'trim')
+TECHNOLOGY_PATTERNS = {
+    category: re.compile(
+        r'\b(?:' + '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r')\b',
+        re.IGNORECASE
+    )
+    for category, keywords in TECHNOLOGY_KEYWORDS.items()
+}
+
+# All keywords in one trie-shaped pattern for tagging long page texts in a single pass
+PROCESS_PATTERN = re.compile(r'\b(?:' + trie_regex(sorted(TECHNOLOGY_CATEGORIES)) + r')\b', re.IGNORECASE)
+
+
+# Region lookups for the cache query API (prospects use codes, exhibitors country names)
+EU_COUNTRIES = {
+    'DE', 'FR', 'IT', 'ES', 'PL', 'RO', 'NL', 'BE', 'AT', 'CZ', 'HU', 'PT', 'SE', 'GR', 'DK', 'FI',
+    'SK', 'IE', 'HR', 'BG', 'LT', 'SI', 'LV', 'EE', 'LU', 'MT', 'CY',
+    'Germany', 'France', 'Italy', 'Spain', 'Poland', 'Romania', 'Netherlands', 'Belgium', 'Austria',
+    'Czech Republic', 'Czechia', 'Hungary', 'Portugal', 'Sweden', 'Greece', 'Denmark', 'Finland',
+    'Slovakia', 'Ireland', 'Croatia', 'Bulgaria', 'Lithuania', 'Slovenia', 'Latvia', 'Estonia',
+    'Luxembourg', 'Malta', 'Cyprus'
+}
+REGIONS = {'EU': EU_COUNTRIES}
+
+# Prospect size by 2024 revenue (EUR), largest first
+REVENUE_BUCKETS = [('large', 30_000_000), ('medium', 5_000_000), ('small', 0)]
+
+
+def revenue_bucket(revenue):
+    """'large', 'medium' or 'small' for a revenue in EUR"""
+    return next(bucket for bucket, minimum in REVENUE_BUCKETS if (revenue or 0) >= minimum)
+
+
+def classify_technologies(texts):
+    """Map free-text processes/descriptions to TECHNOLOGY_KEYWORDS categories"""
+    if isinstance(texts, str):
+        texts = [texts]
+    combined = ' '.join(t for t in texts if t)
+    if not combined:
+        return []
+    return [category for category, pattern in TECHNOLOGY_PATTERNS.items() if pattern.search(combined)]
+
+
+def detect_processes(texts):
+    """Production process keywords found in free text, e.g. ['injection molding', 'extrusion']"""
+    if isinstance(texts, str):
+        texts = [texts]
+    combined = ' '.join(t for t in texts if isinstance(t, str) and t)
+    return merge_unique(match.group().lower() for match in PROCESS_PATTERN.finditer(combined))
+
+
+def matches_technology(technologies, technology_filter):
+    """Whether a prospect/provider stays in a filtered run
+
+    Untagged ones stay (nothing is known about them); ones tagged only with
+    other technologies are skipped.
+    """
+    return not technology_filter or not technologies or technology_filter in technologies
+
+
+def provider_technologies(provider):
+    """Technology categories of a K2025 exhibitor from its name, specialty and products"""
+    texts = [provider.get('name', ''), provider.get('specialty', '')]
+    texts += list(provider.get('products') or []) + list(provider.get('technologies') or [])
+    return classify_technologies(texts)
+
+
+def merge_unique(*lists):
+    """Items of all lists in first-seen order, without duplicates"""
+    merged = []
+    for items in lists:
+        for item in items or []:
+            if item not in merged:
+                merged.append(item)
+    return merged
+
+
+def estimate_tokens(text):
+    """Rough token count of a text (~4 characters per token for JSON and English)"""
+    return (len(text) + 3) // 4
+
+
+def minified_json(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def prompt_record(provider):
+    """Provider fields worth sending to the AI, without empty values (URL, hall and stand add nothing)"""
+    return {field: provider[field] for field in PROFILE_PROMPT_FIELDS
+            if provider.get(field) not in (None, '', [], {}) and not (isinstance(provider[field], float)
+                                                                      and math.isnan(provider[field]))}
+
+
+class JSONArrayStream:
+    """Incremental reader of the first JSON array of objects in a streamed LLM answer
+
+    feed() takes text as it arrives and returns the array entries it
+    completed, as (index, object), with None for an entry that is not valid
+    JSON. Brackets in prose before the array are skipped: the array is the
+    first '[' followed by '{'. `complete` is set once the array closes.
+    """
+
+    def __init__(self):
+        self.state = 'before'  # before -> opened ('[' seen) -> array -> done
+        self.count = 0
+        self.complete = False
+        self._entry = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text):
+        entries = []
+        for char in text:
+            if self.state == 'before':
+                if char == '[':
+                    self.state = 'opened'
+            elif self.state == 'opened':
+                if char == '{':
+                    self.state = 'array'
+                    self._start_entry(char)
+                elif char == ']':
+                    self.state, self.complete = 'done', True
+                elif not char.isspace():
+                    self.state = 'opened' if char == '[' else 'before'
+            elif self.state == 'array':
+                if self._depth:
+                    self._entry.append(char)
+                    if self._in_string:
+                        if self._escaped:
+                            self._escaped = False
+                        elif char == '\\':
+                            self._escaped = True
+                        elif char == '"':
+                            self._in_string = False
+                    elif char == '"':
+                        self._in_string = True
+                    elif char in '{[':
+                        self._depth += 1
+                    elif char in '}]':
+                        self._depth -= 1
+                        if not self._depth:
+                            entries.append(self._finish_entry())
+                elif char == '{':
+                    self._start_entry(char)
+                elif char == ']':
+                    self.state, self.complete = 'done', True
+        return entries
+
+    def _start_entry(self, char):
+        self._entry, self._depth, self._in_string, self._escaped = [char], 1, False, False
+
+    def _finish_entry(self):
+        try:
+            value = json.loads(''.join(self._entry))
+        except ValueError:
+            value = None
+        index = self.count
+        self.count += 1
+        return index, value if isinstance(value, dict) else None
+
+
+PROFILE_LIST_FIELDS = ('technologies', 'processes', 'ideal_regions', 'company_size_focus', 'key_strengths')
+
+
+def valid_profile(profile):
+    """Whether a parsed provider profile has a name and fields of the expected types"""
+    if not isinstance(profile, dict) or not isinstance(profile.get('name'), str) or not profile['name'].strip():
+        return False
+    if any(not isinstance(profile.get(field) or [], list) or
+           not all(isinstance(item, str) for item in profile.get(field) or []) for field in PROFILE_LIST_FIELDS):
+        return False
+    return all(isinstance(profile.get(field) or '', str) for field in ('country', 'tier', 'ideal_for'))
+
+
+def split_in_halves(items):
+    """Non-empty halves of a list (first half the larger)"""
+    half = (len(items) + 1) // 2
+    return [part for part in (items[:half], items[half:]) if part]
+
+
+def has_website(website):
+    """Whether a Web1 value is a real website ('-', empty and NaN mean none; they share no cache row)"""
+    return isinstance(website, str) and website.strip() not in ('', '-')
+
+
+def wilson_interval(share, variance, sample_size, z=1.96):
+    """(low, high) Wilson score interval of a share estimated with the given variance
+
+    The sample size is scaled to the effective size share(1-share)/variance
+    (design effect of stratification), which keeps the interval inside
+    [0, 1] and non-empty when a sample has no or only matches.
+    """
+    if not sample_size:
+        return 0.0, 1.0
+    n = sample_size
+    if variance > 0:
+        n = min(max(share * (1 - share) / variance, 1.0), float(sample_size))
+    centre = (share + z * z / (2 * n)) / (1 + z * z / n)
+    margin = z / (1 + z * z / n) * math.sqrt(share * (1 - share) / n + z * z / (4 * n * n))
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def parse_duration(text):
+    """Seconds in a duration such as '45m', '1h30m', '90s' or '2h' (a bare number is minutes)"""
+    text = str(text).strip().lower()
+    if re.fullmatch(r'\d+(\.\d+)?', text):
+        return float(text) * 60
+    parts = re.findall(r'(\d+(?:\.\d+)?)\s*([hms])', text)
+    if not parts or re.sub(r'(\d+(?:\.\d+)?)\s*[hms]', '', text).strip():
+        raise argparse.ArgumentTypeError(f"invalid duration '{text}' (use e.g. 45m, 1h30m, 90s)")
+    return sum(float(value) * {'h': 3600, 'm': 60, 's': 1}[unit] for value, unit in parts)
+
 # User-friendly technology names
 TECHNOLOGY_DISPLAY_NAMES = {
     'injection': 'Injection Molding (all types)',
@@ -218,11 +494,51 @@ TECHNOLOGY_DISPLAY_NAMES = {
     'decorating': 'Decorating & Finishing'
 }
 
+# Cache payload format per table. Version 1 (NULL in old rows) is plain JSON
+# text; version 2 is zlib-compressed JSON. Rows are upgraded when read, or
+# all at once with `python machinery_maintenance.py migrate`.
+CACHE_SCHEMA_VERSION = 2
+
+# Content changes between versions: {(table, from_version): upgrade(payload) -> payload}
+PAYLOAD_UPGRADES = {}
+
+
+def encode_payload(value):
+    """Compact binary form of a cache value (current schema version)"""
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def decode_payload(table, blob, version):
+    """Cache value from a stored payload of any schema version, upgraded to the current one"""
+    if blob is None:
+        return None
+    version = version or 1
+    if version == 1:
+        value = json.loads(blob)
+    else:
+        value = json.loads(zlib.decompress(blob))
+    while version < CACHE_SCHEMA_VERSION:
+        upgrade = PAYLOAD_UPGRADES.get((table, version))
+        if upgrade:
+            value = upgrade(value)
+        version += 1
+    return value
+
+
 class CacheDB:
     """SQLite cache for scraped data to avoid re-scraping"""
     
-    def __init__(self, db_path="machinery_cache.db"):
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+    # Cache tables and their payload column
+    PAYLOAD_COLUMNS = {'prospect_data': 'data', 'k2025_exhibitors': 'products'}
+    
+    AGE_DAYS = "julianday('now') - julianday(scraped_at)"
+    
+    def __init__(self, db_path="machinery_cache.db", ttl_days=None, max_stale_days=None):
+        self.db_path = db_path
+        self.ttl_days = {**CACHE_TTL_DAYS, **(ttl_days or {})}
+        self.max_stale_days = {**CACHE_MAX_STALE_DAYS, **(max_stale_days or {})}
+        # Generous lock timeout: shard processes may share one cache file
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
         self.setup_tables()
     
     def setup_tables(self):
@@ -231,8 +547,9 @@ class CacheDB:
             CREATE TABLE IF NOT EXISTS prospect_data (
                 url TEXT PRIMARY KEY,
                 company TEXT,
-                data TEXT,
-                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                data BLOB,
+                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                schema_version INTEGER
             )
         ''')
         self.conn.execute('''
@@ -250,52 +567,734 @@ class CacheDB:
                 hall TEXT,
                 stand TEXT,
                 country TEXT,
-                products TEXT,
-                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                products BLOB,
+                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                schema_version INTEGER
+            )
+        ''')
+        
+        # Stored run results (queried page by page by the dashboard)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                total_prospects INTEGER,
+                total_providers_analyzed INTEGER,
+                technology_filter TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS run_providers (
+                run_id TEXT,
+                rank INTEGER,
+                name TEXT,
+                country TEXT,
+                technologies TEXT,
+                coverage_pct REAL,
+                total_prospects_matched INTEGER,
+                reasons TEXT,
+                ideal_for TEXT,
+                PRIMARY KEY (run_id, rank)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS run_matches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT,
+                provider_rank INTEGER,
+                name TEXT,
+                country TEXT,
+                revenue REAL,
+                match_score INTEGER,
+                data TEXT
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS run_match_technologies (
+                match_id INTEGER,
+                run_id TEXT,
+                provider_rank INTEGER,
+                technology TEXT
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS run_metrics (
+                run_id TEXT PRIMARY KEY,
+                summary TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Normalized, indexed attributes of cached prospects/exhibitors (see query_prospects)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS prospect_technologies (
+                url TEXT,
+                technology TEXT,
+                PRIMARY KEY (url, technology)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS prospect_brands (
+                url TEXT,
+                brand TEXT,
+                PRIMARY KEY (url, brand)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS exhibitor_technologies (
+                name TEXT,
+                technology TEXT,
+                PRIMARY KEY (name, technology)
+            )
+        ''')
+        
+        # Durable work queue shared by `machinery_worker.py worker` processes
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT,
+                key TEXT,
+                payload BLOB,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (kind, key)
+            )
+        ''')
+        
+        # Asynchronous Message Batches jobs (machinery_bulk.py) until their results are ingested
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_batches (
+                batch_id TEXT PRIMARY KEY,
+                kind TEXT,
+                technology_filter TEXT,
+                requests BLOB,
+                status TEXT DEFAULT 'in_progress',
+                submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                checked_at TIMESTAMP,
+                ingested_at TIMESTAMP
+            )
+        ''')
+        
+        # Caches created before payloads were versioned / attributes were indexed
+        added = self._add_columns('prospect_data', schema_version='INTEGER', country='TEXT',
+                                  revenue='REAL', revenue_bucket='TEXT')
+        self._add_columns('k2025_exhibitors', schema_version='INTEGER', tier='TEXT')
+        
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_prospect_country ON prospect_data (country, revenue_bucket)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_prospect_bucket ON prospect_data (revenue_bucket, revenue)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_prospect_tech ON prospect_technologies (technology, url)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_prospect_brand ON prospect_brands (brand, url)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_exhibitor_country ON k2025_exhibitors (country)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_exhibitor_tier ON k2025_exhibitors (tier)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_exhibitor_tech ON exhibitor_technologies (technology, name)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_run_matches_score ON run_matches (run_id, provider_rank, match_score)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_run_matches_revenue ON run_matches (run_id, provider_rank, revenue)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_run_matches_country ON run_matches (run_id, provider_rank, country, match_score)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_run_match_tech ON run_match_technologies (run_id, provider_rank, technology, match_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, lease_expires)")
         self.conn.commit()
+        
+        if 'revenue_bucket' in added:
+            self.reindex()
     
-    def get_prospect_cache(self, url):
-        """Get cached prospect data"""
-        cursor = self.conn.execute(
-            "SELECT data FROM prospect_data WHERE url = ?", (url,)
+    def _add_columns(self, table, **columns):
+        """Add missing columns to an existing table; returns the names added"""
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        added = [name for name in columns if name not in existing]
+        for name in added:
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {columns[name]}")
+        return added
+    
+    def _index_prospect(self, url, data):
+        """Write the indexed attributes of one prospect (caller commits)"""
+        revenue = data.get('revenue_2024', 0) or 0
+        self.conn.execute(
+            "UPDATE prospect_data SET country = ?, revenue = ?, revenue_bucket = ? WHERE url = ?",
+            (data.get('country', ''), revenue, revenue_bucket(revenue), url)
         )
-        row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
+        technologies = classify_technologies([data.get('name', '')] + list(data.get('production_processes', [])))
+        brands = {m.get('brand') for m in data.get('existing_machinery', []) if isinstance(m, dict) and m.get('brand')}
+        self.conn.execute("DELETE FROM prospect_technologies WHERE url = ?", (url,))
+        self.conn.execute("DELETE FROM prospect_brands WHERE url = ?", (url,))
+        self.conn.executemany("INSERT INTO prospect_technologies VALUES (?, ?)", [(url, t) for t in technologies])
+        self.conn.executemany("INSERT INTO prospect_brands VALUES (?, ?)", [(url, b) for b in sorted(brands)])
     
+    def _index_exhibitor(self, name, products):
+        """Write the technology tags of one exhibitor (caller commits)"""
+        self.conn.execute("DELETE FROM exhibitor_technologies WHERE name = ?", (name,))
+        self.conn.executemany(
+            "INSERT INTO exhibitor_technologies VALUES (?, ?)",
+            [(name, t) for t in classify_technologies([name] + list(products or []))]
+        )
+    
+    def reindex(self):
+        """Rebuild the indexed attributes of every cached prospect and exhibitor"""
+        for url, blob, version in self.conn.execute("SELECT url, data, schema_version FROM prospect_data").fetchall():
+            self._index_prospect(url, decode_payload('prospect_data', blob, version) or {})
+        for name, blob, version in self.conn.execute("SELECT name, products, schema_version FROM k2025_exhibitors").fetchall():
+            self._index_exhibitor(name, decode_payload('k2025_exhibitors', blob, version))
+        self.conn.commit()
+    
+    def freshness(self, table, age_days):
+        """'fresh', 'stale' (serve, refresh in the background) or 'expired' (treat as missing)"""
+        ttl = self.ttl_days.get(table)
+        if age_days is None:
+            return 'expired'
+        if ttl is None or age_days < ttl:
+            return 'fresh'
+        if age_days < ttl + self.max_stale_days.get(table, 0):
+            return 'stale'
+        return 'expired'
+    
+    @metrics.timed('sqlite')
+    def lookup_prospect_cache(self, url):
+        """Cached prospect data with its freshness: (data, state); data is None when missing or expired"""
+        row = self.conn.execute(
+            f"SELECT data, {self.AGE_DAYS}, schema_version FROM prospect_data WHERE url = ?", (url,)
+        ).fetchone()
+        if not row:
+            return None, 'missing'
+        state = self.freshness('prospect_data', row[1])
+        if state == 'expired':
+            return None, state
+        data = decode_payload('prospect_data', row[0], row[2])
+        if row[2] != CACHE_SCHEMA_VERSION:
+            self._upgrade_rows('prospect_data', 'url', [(url, data)])
+        return data, state
+    
+    def get_prospect_cache(self, url):
+        """Get cached prospect data (None when missing or expired)"""
+        return self.lookup_prospect_cache(url)[0]
+    
+    @metrics.timed('sqlite')
     def save_prospect_cache(self, url, company, data):
         """Save prospect data to cache"""
         self.conn.execute(
-            "INSERT OR REPLACE INTO prospect_data (url, company, data) VALUES (?, ?, ?)",
-            (url, company, json.dumps(data))
+            "INSERT OR REPLACE INTO prospect_data (url, company, data, schema_version) VALUES (?, ?, ?, ?)",
+            (url, company, encode_payload(data), CACHE_SCHEMA_VERSION)
         )
+        self._index_prospect(url, data)
         self.conn.commit()
     
+    @staticmethod
+    def _profile_key(name, technology_filter=None):
+        """provider_data key: profiles made with a technology focus are kept apart"""
+        return f"{name}|{technology_filter}" if technology_filter else name
+    
+    @metrics.timed('sqlite')
+    def get_provider_profiles(self, names, technology_filter=None):
+        """Cached AI provider profiles by name (missing and expired ones left out)"""
+        keys = {self._profile_key(name, technology_filter): name for name in names}
+        profiles = {}
+        for start in range(0, len(keys), 500):
+            chunk = list(keys)[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT name, data, {self.AGE_DAYS} FROM provider_data WHERE name IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for key, data, age in rows:
+                if self.freshness('provider_data', age) != 'expired':
+                    profiles[keys[key]] = json.loads(data)
+        return profiles
+    
+    @metrics.timed('sqlite')
+    def save_provider_profiles(self, profiles, technology_filter=None):
+        """Cache AI provider profiles (one row per provider and technology focus)
+        
+        Basic fallback profiles are skipped: the provider stays uncached, so
+        the next run profiles it again instead of serving the fallback.
+        """
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO provider_data (name, data) VALUES (?, ?)",
+            [(self._profile_key(p['name'], technology_filter), json.dumps(p, ensure_ascii=False))
+             for p in profiles if p.get('name') and not p.get('basic')]
+        )
+        self.conn.commit()
+    
+    # Task queue: pending -> leased (until lease_expires) -> done, or back to
+    # pending after a failure / expired lease; failed after TASK_MAX_ATTEMPTS
+    
+    @metrics.timed('sqlite')
+    def enqueue_task(self, kind, key, payload, commit=True):
+        """Queue a task once per (kind, key); finished ones are queued again. True if queued"""
+        cursor = self.conn.execute('''
+            INSERT INTO tasks (kind, key, payload) VALUES (?, ?, ?)
+            ON CONFLICT (kind, key) DO UPDATE SET
+                payload = excluded.payload, status = 'pending', attempts = 0,
+                lease_owner = NULL, lease_expires = NULL, last_error = NULL
+            WHERE tasks.status IN ('done', 'failed')
+        ''', (kind, key, encode_payload(payload)))
+        if commit:
+            self.conn.commit()
+        return cursor.rowcount > 0
+    
+    @metrics.timed('sqlite')
+    def lease_tasks(self, owner, kinds=None, limit=1, lease_seconds=None):
+        """Claim up to limit runnable tasks for owner: [(id, kind, key, payload)]
+        
+        Pending tasks and leased ones whose lease has expired (crashed worker)
+        are claimed in a single UPDATE, so two workers never get the same task.
+        """
+        now = time.time()
+        kinds = list(kinds or [])
+        kind_filter = f"AND kind IN ({', '.join('?' * len(kinds))})" if kinds else ""
+        rows = self.conn.execute(f'''
+            UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM tasks
+                WHERE ((status = 'pending' AND COALESCE(lease_expires, 0) <= ?)
+                       OR (status = 'leased' AND lease_expires <= ?)) {kind_filter}
+                ORDER BY id LIMIT ?
+            )
+            RETURNING id, kind, key, payload, attempts
+        ''', [owner, now + (lease_seconds or TASK_LEASE_SECONDS), now, now, *kinds, limit]).fetchall()
+        self.conn.commit()
+        for row in rows:
+            if row[4] > 1:
+                metrics.incr('tasks_retried', kind=row[1])
+        return [(task_id, kind, key, decode_payload('tasks', payload, CACHE_SCHEMA_VERSION))
+                for task_id, kind, key, payload, _ in sorted(rows)]
+    
+    @metrics.timed('sqlite')
+    def complete_task(self, task_id, owner):
+        """Mark a leased task done; False if the lease was lost to another worker"""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = 'done', lease_expires = NULL WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (task_id, owner)
+        )
+        self.conn.commit()
+        return cursor.rowcount > 0
+    
+    @metrics.timed('sqlite')
+    def fail_task(self, task_id, owner, error):
+        """Release a task after an error: pending again after a backoff, failed after TASK_MAX_ATTEMPTS"""
+        cursor = self.conn.execute('''
+            UPDATE tasks SET
+                status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                lease_expires = ? + ? * attempts,
+                last_error = ?
+            WHERE id = ? AND lease_owner = ? AND status = 'leased'
+        ''', (TASK_MAX_ATTEMPTS, time.time(), TASK_RETRY_DELAY, str(error)[:500], task_id, owner))
+        self.conn.commit()
+        return cursor.rowcount > 0
+    
+    def task_counts(self):
+        """{kind: {status: tasks}}"""
+        counts = {}
+        for kind, status, count in self.conn.execute("SELECT kind, status, COUNT(*) FROM tasks GROUP BY kind, status"):
+            counts.setdefault(kind, {})[status] = count
+        return counts
+    
+    # Message Batches jobs: status follows the API's processing_status
+    # (in_progress, canceling, ended), then 'ingested' once results are cached
+    
+    def save_llm_batch(self, batch_id, kind, technology_filter, job_requests, commit=True):
+        """Remember a submitted batch job with its {custom_id: request} map"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO llm_batches (batch_id, kind, technology_filter, requests) VALUES (?, ?, ?, ?)",
+            (batch_id, kind, technology_filter, encode_payload(job_requests))
+        )
+        if commit:
+            self.conn.commit()
+    
+    def update_llm_batch(self, batch_id, status, commit=True):
+        self.conn.execute(
+            "UPDATE llm_batches SET status = ?, checked_at = CURRENT_TIMESTAMP, "
+            "ingested_at = CASE WHEN ? = 'ingested' THEN CURRENT_TIMESTAMP ELSE ingested_at END WHERE batch_id = ?",
+            (status, status, batch_id)
+        )
+        if commit:
+            self.conn.commit()
+    
+    def open_llm_batches(self, kind=None):
+        """Jobs not ingested yet, oldest first: [(batch_id, kind, technology_filter, requests, status)]"""
+        rows = self.conn.execute(
+            "SELECT batch_id, kind, technology_filter, requests, status FROM llm_batches "
+            "WHERE status != 'ingested' AND (? IS NULL OR kind = ?) ORDER BY submitted_at, rowid",
+            (kind, kind)
+        ).fetchall()
+        return [(batch_id, job_kind, technology_filter, decode_payload('llm_batches', job_requests, CACHE_SCHEMA_VERSION),
+                 status) for batch_id, job_kind, technology_filter, job_requests, status in rows]
+    
+    def list_llm_batches(self, limit=20):
+        """Most recent jobs: [(batch_id, kind, technology_filter, status, submitted_at, ingested_at)]"""
+        return self.conn.execute(
+            "SELECT batch_id, kind, technology_filter, status, submitted_at, ingested_at FROM llm_batches "
+            "ORDER BY submitted_at DESC, rowid DESC LIMIT ?", (limit,)
+        ).fetchall()
+    
+    @metrics.timed('sqlite')
     def get_k2025_exhibitors(self):
-        """Get all cached K2025 exhibitors"""
-        cursor = self.conn.execute("SELECT * FROM k2025_exhibitors")
-        return cursor.fetchall()
+        """Get all cached K2025 exhibitors (products decoded to a list)"""
+        rows = []
+        outdated = []
+        for row in self.conn.execute(
+            "SELECT id, name, url, hall, stand, country, products, scraped_at, schema_version FROM k2025_exhibitors"
+        ):
+            products = decode_payload('k2025_exhibitors', row[6], row[8]) or []
+            if row[8] != CACHE_SCHEMA_VERSION:
+                outdated.append((row[0], products))
+            rows.append(row[:6] + (products, row[7]))
+        if outdated:
+            self._upgrade_rows('k2025_exhibitors', 'id', outdated)
+        return rows
+    
+    @metrics.timed('sqlite')
+    def k2025_cache_state(self):
+        """(row count, freshness of the last exhibitor scrape)"""
+        count, age = self.conn.execute(f"SELECT COUNT(*), MIN({self.AGE_DAYS}) FROM k2025_exhibitors").fetchone()
+        return count, self.freshness('k2025_exhibitors', age) if count else 'missing'
     
-    def save_k2025_exhibitor(self, name, url, hall, stand, country, products):
-        """Save K2025 exhibitor"""
+    @metrics.timed('sqlite')
+    def save_k2025_exhibitor(self, name, url, hall, stand, country, products, tier=None):
+        """Save K2025 exhibitor (products: list)"""
         self.conn.execute(
-            "INSERT OR REPLACE INTO k2025_exhibitors (name, url, hall, stand, country, products) VALUES (?, ?, ?, ?, ?, ?)",
-            (name, url, hall, stand, country, products)
+            "INSERT OR REPLACE INTO k2025_exhibitors (name, url, hall, stand, country, products, schema_version, tier) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, url, hall, stand, country, encode_payload(products), CACHE_SCHEMA_VERSION, tier)
+        )
+        self._index_exhibitor(name, products)
+        self.conn.commit()
+    
+    def _upgrade_rows(self, table, key_column, rows):
+        """Rewrite decoded payloads [(key, value)] in the current format (scraped_at is kept)"""
+        column = self.PAYLOAD_COLUMNS[table]
+        self.conn.executemany(
+            f"UPDATE {table} SET {column} = ?, schema_version = ? WHERE {key_column} = ?",
+            [(encode_payload(value), CACHE_SCHEMA_VERSION, key) for key, value in rows]
+        )
+        self.conn.commit()
+        metrics.incr('cache_payload_upgrades', len(rows), cache=table)
+    
+    def migrate_payloads(self, batch_size=500):
+        """Upgrade every outdated cache payload; returns {table: rows upgraded}"""
+        upgraded = {}
+        for table, column in self.PAYLOAD_COLUMNS.items():
+            upgraded[table] = 0
+            while True:
+                rows = self.conn.execute(
+                    f"SELECT rowid, {column}, schema_version FROM {table} "
+                    f"WHERE schema_version IS NULL OR schema_version != ? LIMIT ?",
+                    (CACHE_SCHEMA_VERSION, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                self._upgrade_rows(table, 'rowid', [(rowid, decode_payload(table, blob, version))
+                                                     for rowid, blob, version in rows])
+                upgraded[table] += len(rows)
+        return upgraded
+    
+    @staticmethod
+    def _in(column, values, where, params):
+        """Add a `column IN (...)` condition"""
+        values = list(values)
+        where.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    
+    def _location_filter(self, column, region, countries, where, params):
+        if region:
+            if region not in REGIONS:
+                raise ValueError(f"Unknown region: {region}")
+            self._in(column, REGIONS[region], where, params)
+        if countries:
+            self._in(column, countries, where, params)
+    
+    @metrics.timed('sqlite')
+    def query_prospects(self, region=None, countries=None, sizes=None, technologies=None, brands=None,
+                        min_revenue=None, limit=None):
+        """Cached prospects matching every given filter, largest revenue first
+        
+        e.g. EU large injection prospects:
+            query_prospects(region='EU', sizes=['large'], technologies=['injection'])
+        technologies/brands match prospects having any of the values.
+        """
+        where, params = ['1 = 1'], []
+        self._location_filter('country', region, countries, where, params)
+        if sizes:
+            self._in('revenue_bucket', sizes, where, params)
+        if min_revenue is not None:
+            where.append("revenue >= ?")
+            params.append(min_revenue)
+        if technologies:
+            sub_where, sub_params = [], []
+            self._in('technology', technologies, sub_where, sub_params)
+            where.append(f"url IN (SELECT url FROM prospect_technologies WHERE {sub_where[0]})")
+            params.extend(sub_params)
+        if brands:
+            sub_where, sub_params = [], []
+            self._in('brand', brands, sub_where, sub_params)
+            where.append(f"url IN (SELECT url FROM prospect_brands WHERE {sub_where[0]})")
+            params.extend(sub_params)
+        
+        sql = f"SELECT data, schema_version FROM prospect_data WHERE {' AND '.join(where)} ORDER BY revenue DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [decode_payload('prospect_data', blob, version) for blob, version in self.conn.execute(sql, params)]
+    
+    @metrics.timed('sqlite')
+    def query_exhibitors(self, region=None, countries=None, tiers=None, technologies=None, limit=None):
+        """Cached K2025 exhibitors matching every given filter, by name"""
+        where, params = ['1 = 1'], []
+        self._location_filter('e.country', region, countries, where, params)
+        if tiers:
+            self._in('e.tier', tiers, where, params)
+        if technologies:
+            sub_where, sub_params = [], []
+            self._in('technology', technologies, sub_where, sub_params)
+            where.append(f"e.name IN (SELECT name FROM exhibitor_technologies WHERE {sub_where[0]})")
+            params.extend(sub_params)
+        
+        sql = (
+            "SELECT e.name, e.url, e.hall, e.stand, e.country, e.tier, e.products, e.schema_version, "
+            "(SELECT GROUP_CONCAT(technology) FROM exhibitor_technologies t WHERE t.name = e.name) "
+            f"FROM k2025_exhibitors e WHERE {' AND '.join(where)} ORDER BY e.name"
         )
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [
+            {
+                'name': row[0], 'url': row[1], 'hall': row[2], 'stand': row[3], 'country': row[4],
+                'tier': row[5], 'products': decode_payload('k2025_exhibitors', row[6], row[7]) or [],
+                'technologies': row[8].split(',') if row[8] else []
+            }
+            for row in self.conn.execute(sql, params)
+        ]
+    
+    def prune_expired(self):
+        """Delete cache rows past TTL + max stale; returns {table: rows deleted}"""
+        deleted = {}
+        for table, ttl in self.ttl_days.items():
+            max_age = ttl + self.max_stale_days.get(table, 0)
+            cursor = self.conn.execute(f"DELETE FROM {table} WHERE {self.AGE_DAYS} >= ?", (max_age,))
+            deleted[table] = cursor.rowcount
+        for tags in ('prospect_technologies', 'prospect_brands'):
+            self.conn.execute(f"DELETE FROM {tags} WHERE url NOT IN (SELECT url FROM prospect_data)")
+        self.conn.execute("DELETE FROM exhibitor_technologies WHERE name NOT IN (SELECT name FROM k2025_exhibitors)")
         self.conn.commit()
+        return deleted
+    
+    def compact(self):
+        """Reclaim free pages and refresh the query planner statistics"""
+        self.conn.execute("VACUUM")
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+    
+    def table_sizes(self):
+        """Rows and bytes on disk per table (bytes are None if SQLite lacks dbstat)"""
+        tables = [row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        try:
+            sizes = dict(self.conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+        except sqlite3.OperationalError:
+            sizes = {}
+        return [
+            {'table': table, 'rows': self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0],
+             'bytes': sizes.get(table)}
+            for table in tables
+        ]
+    
+    def file_size(self):
+        """(bytes used by the database file, bytes of that on the freelist)"""
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return pages * page_size, free * page_size
+    
+    def save_run_results(self, run_id, results):
+        """Store a run's results in indexed tables (replaces an existing run with the same ID)"""
+        self.delete_run(run_id, commit=False)
+        self.conn.execute(
+            "INSERT INTO runs (run_id, total_prospects, total_providers_analyzed, technology_filter) VALUES (?, ?, ?, ?)",
+            (run_id, results['total_prospects'], results['total_providers_analyzed'], results.get('technology_filter'))
+        )
+        
+        for provider in results['top_providers']:
+            self.conn.execute(
+                "INSERT INTO run_providers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, provider['rank'], provider['name'], provider['country'],
+                 json.dumps(provider.get('technologies', [])), provider['coverage_pct'],
+                 provider['total_prospects_matched'], json.dumps(provider.get('reasons', [])),
+                 provider.get('ideal_for', ''))
+            )
+            
+            for prospect in provider['matched_prospects_full_list']:
+                cursor = self.conn.execute(
+                    "INSERT INTO run_matches (run_id, provider_rank, name, country, revenue, match_score, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, provider['rank'], prospect['name'], prospect.get('country', ''),
+                     prospect.get('revenue', 0) or 0, prospect.get('match_score', 0), json.dumps(prospect))
+                )
+                technologies = classify_technologies(prospect.get('production_processes', []))
+                self.conn.executemany(
+                    "INSERT INTO run_match_technologies VALUES (?, ?, ?, ?)",
+                    [(cursor.lastrowid, run_id, provider['rank'], tech) for tech in technologies]
+                )
+        
+        self.conn.commit()
+    
+    def save_run_metrics(self, run_id, summary):
+        """Store the timing/counter summary of a run"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO run_metrics (run_id, summary) VALUES (?, ?)",
+            (run_id, json.dumps(summary))
+        )
+        self.conn.commit()
+    
+    def get_run_metrics(self, run_id):
+        """Stored timing/counter summary of a run"""
+        row = self.conn.execute("SELECT summary FROM run_metrics WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def delete_run(self, run_id, commit=True):
+        """Remove a stored run"""
+        for table in ('runs', 'run_providers', 'run_matches', 'run_match_technologies'):
+            self.conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+        if commit:
+            self.conn.commit()
+    
+    def list_runs(self):
+        """All stored runs, newest first"""
+        cursor = self.conn.execute(
+            "SELECT run_id, total_prospects, total_providers_analyzed, technology_filter, created_at FROM runs ORDER BY run_id DESC"
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def get_run(self, run_id):
+        """Run summary with its ranked providers (without prospect lists)"""
+        cursor = self.conn.execute(
+            "SELECT run_id, total_prospects, total_providers_analyzed, technology_filter, created_at FROM runs WHERE run_id = ?",
+            (run_id,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        run = dict(zip([c[0] for c in cursor.description], row))
+        
+        cursor = self.conn.execute(
+            "SELECT rank, name, country, technologies, coverage_pct, total_prospects_matched, reasons, ideal_for "
+            "FROM run_providers WHERE run_id = ? ORDER BY rank",
+            (run_id,)
+        )
+        run['top_providers'] = [
+            {
+                'rank': r[0], 'name': r[1], 'country': r[2], 'technologies': json.loads(r[3]),
+                'coverage_pct': r[4], 'total_prospects_matched': r[5], 'reasons': json.loads(r[6]),
+                'ideal_for': r[7]
+            }
+            for r in cursor.fetchall()
+        ]
+        return run
+    
+    def query_run_matches(self, run_id, provider_rank, sort='match_score', descending=True,
+                          country=None, technology=None, page=1, per_page=50):
+        """One page of a provider's matched prospects, sorted and filtered in SQL"""
+        if sort not in ('match_score', 'revenue'):
+            raise ValueError(f"Unsupported sort column: {sort}")
+        
+        where, params = self._run_match_filter(run_id, provider_rank, country, technology)
+        total = self.conn.execute(f"SELECT COUNT(*) FROM run_matches WHERE {where}", params).fetchone()[0]
+        
+        direction = 'DESC' if descending else 'ASC'
+        cursor = self.conn.execute(
+            f"SELECT data FROM run_matches WHERE {where} ORDER BY {sort} {direction}, id LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page]
+        )
+        
+        return {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page,
+            'prospects': [json.loads(row[0]) for row in cursor.fetchall()]
+        }
+    
+    def iter_run_matches(self, run_id, provider_rank, country=None, technology=None):
+        """Yield a provider's matched prospects in original order without loading them all"""
+        where, params = self._run_match_filter(run_id, provider_rank, country, technology)
+        cursor = self.conn.execute(f"SELECT data FROM run_matches WHERE {where} ORDER BY id", params)
+        for row in cursor:
+            yield json.loads(row[0])
+    
+    def _run_match_filter(self, run_id, provider_rank, country=None, technology=None):
+        """WHERE clause and parameters shared by the run match queries"""
+        where = "run_id = ? AND provider_rank = ?"
+        params = [run_id, provider_rank]
+        if country:
+            where += " AND country = ?"
+            params.append(country)
+        if technology:
+            where += (" AND id IN (SELECT match_id FROM run_match_technologies "
+                      "WHERE run_id = ? AND provider_rank = ? AND technology = ?)")
+            params.extend([run_id, provider_rank, technology])
+        return where, params
+
+
+class CacheRefresher:
+    """Refreshes stale cache rows in background threads (serve-stale-while-revalidate)
+
+    Each refresh gets its own CacheDB connection to the same file; a key that
+    is already being refreshed is not queued twice.
+    """
+    
+    def __init__(self, db_path, workers=CACHE_REFRESH_WORKERS):
+        self.db_path = db_path
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cache-refresh')
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+    
+    def submit(self, key, refresh):
+        """Run refresh(cache_db) in the background unless key is already queued"""
+        with self.lock:
+            if key in self.pending:
+                return False
+            self.pending.add(key)
+        self.executor.submit(self._run, key, refresh)
+        return True
+    
+    def _run(self, key, refresh):
+        try:
+            if not hasattr(self.local, 'cache_db'):
+                self.local.cache_db = CacheDB(self.db_path)
+            refresh(self.local.cache_db)
+            metrics.incr('cache_refreshes')
+        except Exception as e:
+            metrics.incr('cache_refresh_errors')
+            print(f"  ⚠ Background refresh of {key} failed: {e}")
+        finally:
+            with self.lock:
+                self.pending.discard(key)
+    
+    def wait(self):
+        """Block until queued refreshes are done"""
+        self.executor.shutdown(wait=True)
+
+
+def open_http_cache(offline=None):
+    """HTTP response cache shared by the scrapers (offline: replay only, never fetch)"""
+    return HTTPCache(HTTP_CACHE_PATH, HTTP_CACHE_TTL, HTTP_CACHE_OFFLINE if offline is None else offline)
 
 
 class K2025Scraper:
     """Scrapes K2025 exhibitor database"""
     
-    def __init__(self, cache_db):
+    DIRECTORY_LETTERS = ['a', 'b', 'e', 'k', 'm', 's']
+    
+    def __init__(self, cache_db, http_cache=None):
         self.cache = cache_db
-        self.session = requests.Session()
+        self.refresher = CacheRefresher(cache_db.db_path)
+        self.session = CachedSession(http_cache or open_http_cache(), max_body_bytes=K2025_MAX_PAGE_BYTES)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
     
+    @metrics.timed('scrape_all_exhibitors')
     def scrape_all_exhibitors(self, category_filter="machinery"):
         """Scrape all K2025 exhibitors - focuses on machinery/equipment"""
         
@@ -303,35 +1302,71 @@ class K2025Scraper:
         print("🏭 SCRAPING K2025 EXHIBITOR DATABASE")
         print("="*90)
         
-        # Check cache first
-        cached = self.cache.get_k2025_exhibitors()
-        if cached and len(cached) > 100:
-            print(f"✓ Found {len(cached)} exhibitors in cache")
+        # Check cache first: fresh rows are used as they are, stale rows are
+        # served while a background refresh re-scrapes the exhibitor list
+        count, state = self.cache.k2025_cache_state()
+        if count > 100 and state in ('fresh', 'stale'):
+            cached = self.cache.get_k2025_exhibitors()
+            metrics.incr('cache_hits', cache='k2025')
+            if state == 'stale':
+                metrics.incr('cache_stale', cache='k2025')
+                self.refresher.submit('k2025_exhibitors', self._refresh_exhibitors)
+                print(f"✓ Found {len(cached)} exhibitors in cache (stale, refreshing in background)")
+            else:
+                print(f"✓ Found {len(cached)} exhibitors in cache")
+            progress_bus.publish('k2025_scrape', len(cached), len(cached),
+                                 f"{len(cached)} exhibitors from cache", status='done')
             return self._format_exhibitors(cached)
         
+        metrics.incr('cache_misses', cache='k2025')
         print("🔍 Fetching fresh data from K2025 website...")
-        exhibitors = []
+        total_steps = 1 + len(self.DIRECTORY_LETTERS)
+        progress_bus.start_stage('k2025_scrape', total_steps, "Fetching K2025 exhibitors")
+        exhibitors = self._fetch_exhibitors(total_steps)
+        
+        if not exhibitors and count:
+            # Scraping failed: an expired cache is better than nothing
+            print(f"⚠ Scraping failed, using {count} expired exhibitors from cache")
+            progress_bus.finish_stage('k2025_scrape', f"{count} expired exhibitors from cache")
+            return self._format_exhibitors(self.cache.get_k2025_exhibitors())
+        
+        self._save_exhibitors(self.cache, exhibitors)
         
+        print(f"\n✓ Scraped {len(exhibitors)} machinery providers from K2025")
+        progress_bus.finish_stage('k2025_scrape', f"Scraped {len(exhibitors)} exhibitors")
+        return exhibitors
+    
+    def _fetch_exhibitors(self, progress_total=None):
+        """Exhibitors from the K2025 website (progress is published when progress_total is set)"""
         # Method 1: Try catalogue/category approach
-        exhibitors.extend(self._scrape_by_category())
+        exhibitors = self._scrape_by_category()
+        if progress_total:
+            progress_bus.publish('k2025_scrape', 1, progress_total, f"{len(exhibitors)} exhibitors from category search")
         
         # Method 2: Try alphabetical directory
         if len(exhibitors) < 100:
-            exhibitors.extend(self._scrape_by_directory())
-        
-        # Save to cache
+            exhibitors.extend(self._scrape_by_directory(progress_offset=1, progress_total=progress_total,
+                                                        publish_progress=bool(progress_total)))
+        return exhibitors
+    
+    def _save_exhibitors(self, cache_db, exhibitors):
+        """Save scraped exhibitors to cache"""
         for exhibitor in exhibitors:
-            self.cache.save_k2025_exhibitor(
+            cache_db.save_k2025_exhibitor(
                 exhibitor['name'],
                 exhibitor.get('url', ''),
                 exhibitor.get('hall', ''),
                 exhibitor.get('stand', ''),
                 exhibitor.get('country', ''),
-                json.dumps(exhibitor.get('products', []))
+                exhibitor.get('products', []),
+                exhibitor.get('tier')
             )
-        
-        print(f"\n✓ Scraped {len(exhibitors)} machinery providers from K2025")
-        return exhibitors
+    
+    def _refresh_exhibitors(self, cache_db):
+        """Background refresh of a stale exhibitor cache (keeps the old rows if scraping fails)"""
+        exhibitors = self._fetch_exhibitors()
+        if exhibitors:
+            self._save_exhibitors(cache_db, exhibitors)
     
     def _scrape_by_category(self):
         """Scrape machinery category from K2025"""
@@ -341,7 +1376,8 @@ class K2025Scraper:
             # Try to get machinery category (category 03)
             url = "https://www.k-online.com/vis/v1/en/search?f_prod=k2025.03*"
             response = self.session.get(url, timeout=15)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            with metrics.stage('html_parse'):
+                soup = BeautifulSoup(response.content, 'html.parser')
             
             # Find exhibitor cards/listings
             exhibitor_elements = soup.find_all(['div', 'article'], class_=re.compile('exhibitor|company|profile'))
@@ -355,7 +1391,7 @@ class K2025Scraper:
                         # Try to find additional info
                         link = elem.find('a', href=True)
                         if link:
-                            exhibitor['url'] = urljoin(url, link['href'])
+                            exhibitor['url'] = urljoin(response.url, link['href'])
                         
                         exhibitors.append(exhibitor)
                 except:
@@ -368,16 +1404,18 @@ class K2025Scraper:
         
         return exhibitors
     
-    def _scrape_by_directory(self):
+    def _scrape_by_directory(self, progress_offset=0, progress_total=None, publish_progress=True):
         """Scrape alphabetical directory"""
         exhibitors = []
+        progress_total = progress_total or len(self.DIRECTORY_LETTERS)
         
         # Try a few letters to get sample
-        for letter in ['a', 'b', 'e', 'k', 'm', 's']:
+        for step, letter in enumerate(self.DIRECTORY_LETTERS, 1):
             try:
                 url = f"https://www.k-online.com/vis/v1/en/directory/{letter}"
                 response = self.session.get(url, timeout=15)
-                soup = BeautifulSoup(response.content, 'html.parser')
+                with metrics.stage('html_parse'):
+                    soup = BeautifulSoup(response.content, 'html.parser')
                 
                 # Find company listings
                 companies = soup.find_all(['li', 'div'], class_=re.compile('company|exhibitor|entry'))
@@ -390,10 +1428,12 @@ class K2025Scraper:
                             'url': name_elem.get('href', '')
                         })
                 
-                time.sleep(0.5)  # Rate limiting
-                
             except:
                 continue
+            finally:
+                if publish_progress:
+                    progress_bus.publish('k2025_scrape', progress_offset + step, progress_total,
+                                         f"Directory letter '{letter.upper()}': {len(exhibitors)} exhibitors")
         
         print(f"   Found {len(exhibitors)} from directory")
         return exhibitors
@@ -407,12 +1447,13 @@ class K2025Scraper:
                 'hall': row[3],
                 'stand': row[4],
                 'country': row[5],
-                'products': json.loads(row[6]) if row[6] else []
+                'products': row[6]
             }
             for row in cached_data
         ]
     
-    def get_fallback_exhibitors(self):
+    @staticmethod
+    def get_fallback_exhibitors():
         """Return comprehensive list of major machinery manufacturers"""
         return [
             # Top Tier - Premium
@@ -445,105 +1486,333 @@ class K2025Scraper:
         ]
 
 
+class TimeBudget:
+    """Deadline for prospect enrichment in a --time-budget run
+
+    A share of the budget (TIME_BUDGET_RESERVE) is kept for scoring and
+    export. The average cost of a full (website) and a fast (CSV only)
+    enrichment is measured as the run goes, so a full enrichment is only
+    started while it still fits next to the fast path for everyone left.
+    """
+
+    def __init__(self, seconds, reserve=TIME_BUDGET_RESERVE, scrape_estimate=TIME_BUDGET_SCRAPE_ESTIMATE):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds * (1 - reserve)
+        self.scrape_estimate = scrape_estimate
+        self.costs = {'full': [0.0, 0], 'fast': [0.0, 0]}
+
+    def remaining(self):
+        """Seconds left for enrichment"""
+        return self.deadline - time.monotonic()
+
+    def estimate(self, mode):
+        total, count = self.costs[mode]
+        if count:
+            return total / count
+        return self.scrape_estimate if mode == 'full' else 0.0
+
+    def record(self, mode, seconds):
+        self.costs[mode][0] += seconds
+        self.costs[mode][1] += 1
+        metrics.incr('prospects_enriched', mode=mode)
+
+    def allows_full(self, left_after):
+        """Whether one more full enrichment fits, keeping time for the fast path of left_after prospects"""
+        return self.remaining() >= self.estimate('full') + left_after * self.estimate('fast')
+    
+    def full_deadline(self, left_after):
+        """time.monotonic() by which a started website check must end (it is cut off there)"""
+        return self.deadline - left_after * self.estimate('fast')
+
+    def count(self, mode):
+        return self.costs[mode][1]
+
+
 class FastMachineryMatcher:
     """Optimized matcher for large-scale analysis"""
     
-    def __init__(self, api_key, cache_db):
-        self.client = anthropic.Anthropic(api_key=api_key)
+    def __init__(self, api_key, cache_db, client=None, http_cache=None):
+        # Retries are left to _stream_message, so the API limiter sees every throttled call
+        self.client = client or anthropic.Anthropic(api_key=api_key, max_retries=0)
         self.cache = cache_db
-        self.session = requests.Session()
+        self.refresher = CacheRefresher(cache_db.db_path) if cache_db is not None else None
+        self._brand_detector = None
+        self.live_scorer = None  # Set during a streaming run (partial rankings)
+        self.session = CachedSession(http_cache or open_http_cache(), max_body_bytes=MAX_PAGE_BYTES)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.crawler = SiteCrawler(
+            self.session, max_pages=CRAWL_MAX_PAGES, max_concurrency=CRAWL_CONCURRENCY,
+            max_chars=MAX_PAGE_TEXT_CHARS, max_bytes=MAX_PAGE_BYTES
+        )
+    
+    @property
+    def brand_detector(self):
+        """Brand dictionary from the K2025 exhibitor cache + curated aliases (built on first use)"""
+        if self._brand_detector is None:
+            names = [e['name'] for e in K2025Scraper.get_fallback_exhibitors()]
+            if self.cache is not None:
+                names += [row[1] for row in self.cache.get_k2025_exhibitors()]
+            self._brand_detector = BrandDetector.build(names, BRAND_ALIAS_FILE)
+        return self._brand_detector
+    
+    @metrics.timed('analyze_prospects_batch')
+    def analyze_prospects_batch(self, prospects_df, enable_scraping=False, technology_filter=None, budget=None):
+        """Analyze prospects in batches for efficiency
+        
+        technology_filter: prospects tagged only with other technologies are
+        skipped before any scraping (see tag_prospects)
+        budget: TimeBudget; prospects are enriched most valuable first, but
+        returned in CSV order
+        """
+        if budget is None:
+            return list(self.iter_prospects(prospects_df, enable_scraping, technology_filter))
+        order = {label: position for position, label in enumerate(prospects_df.index)}
+        enriched = self.iter_prospects(prospects_df, enable_scraping, technology_filter, with_rows=True, budget=budget)
+        return [prospect for _, prospect in sorted(enriched, key=lambda item: order[item[0]])]
+    
+    def stream_prospects(self, prospects_df, stream, enable_scraping=False, technology_filter=None, budget=None):
+        """Producer side of a streaming run: enrich prospects into a ProspectStream
+        
+        put() blocks while the stream is full, so enrichment never runs more
+        than the stream's size ahead of scoring. Prospects go in as (CSV
+        position, prospect), so a budgeted run that enriches them out of order
+        is still ranked in CSV order. Returns the number enriched.
+        """
+        order = {label: position for position, label in enumerate(prospects_df.index)}
+        count = 0
+        try:
+            with metrics.stage('analyze_prospects_batch'):
+                for label, prospect in self.iter_prospects(prospects_df, enable_scraping, technology_filter,
+                                                           with_rows=True, budget=budget):
+                    if not stream.put((order[label], prospect)):
+                        break  # Consumer gave up
+                    count += 1
+        finally:
+            stream.close()
+        return count
     
-    def analyze_prospects_batch(self, prospects_df, enable_scraping=False):
-        """Analyze prospects in batches for efficiency"""
+    def iter_prospects(self, prospects_df, enable_scraping=False, technology_filter=None, with_rows=False,
+                       budget=None):
+        """Enriched prospects one by one, as soon as each is analyzed
+        
+        with_rows: yield (DataFrame index label, prospect) pairs instead
+        budget: TimeBudget; prospects are taken by expected value and get the
+        website check while it fits, the rest take the fast path
+        """
         
         print("\n" + "="*90)
         print("📊 ANALYZING PROSPECTS")
         print("="*90)
         
-        enriched = []
-        total = len(prospects_df)
+        tagged = self.tag_prospects(prospects_df, technology_filter)
+        if budget is not None:
+            # Cache rows read for the priorities are used again below
+            tagged = self.prioritize_prospects(tagged, technology_filter)
+            print(f"⏱  Time budget: {budget.remaining():.0f}s for enrichment, most valuable prospects first")
+        else:
+            tagged = [(row, processes, None) for row, processes in tagged]
+        
+        enriched = 0
+        total = len(tagged)
+        done = 0
+        progress_bus.start_stage('enrich_prospects', total, "Analyzing prospects")
         
         # Process in batches
         batch_size = 10 if enable_scraping else 50
         
         for i in range(0, total, batch_size):
-            batch = prospects_df.iloc[i:i+batch_size]
+            batch = tagged[i:i+batch_size]
             print(f"\nBatch {i//batch_size + 1}/{(total + batch_size - 1)//batch_size}")
             
-            for _, row in batch.iterrows():
+            for row, processes, lookup in batch:
                 company = row.get('Firma', '')
                 website = row.get('Web1', '')
-                
-                if not company:
-                    continue
+                done += 1
                 
                 # Check cache first
-                cached = self.cache.get_prospect_cache(website) if website else None
+                cached, state = lookup or self._lookup_prospect(website)
+                
+                if has_website(website):
+                    metrics.incr('cache_hits' if cached else 'cache_misses', cache='prospect')
+                
+                # Budgeted runs: a website check replaces a cached CSV-only record while time allows
+                full = deadline = None
+                if budget is not None and self._needs_website_check(website, cached):
+                    full = budget.allows_full(total - done)
+                    if full:
+                        deadline = budget.full_deadline(total - done)
+                    if full or not cached:
+                        cached = None
                 
                 if cached:
-                    enriched.append(cached)
-                    print(f"  ✓ {company} (cached)")
+                    prospect_data = cached
+                    prospect_data['production_processes'] = merge_unique(cached.get('production_processes', []), processes)
+                    if state == 'stale':
+                        # Serve the stale row now, refresh it for the next run
+                        metrics.incr('cache_stale', cache='prospect')
+                        self._refresh_prospect(row, processes, 'existing_machinery' in cached
+                                               or (enable_scraping and budget is None))
+                    print(f"  ✓ {company} (cached{', stale' if state == 'stale' else ''})")
+                    progress_bus.publish('enrich_prospects', done, total, f"{company} (cached)")
                 else:
                     # Analyze prospect
-                    prospect_data = {
-                        'name': company,
-                        'country': row.get('Jud', ''),
-                        'revenue_2024': float(row.get('Cifra2024EUR', 0)) if pd.notna(row.get('Cifra2024EUR')) else 0,
-                        'website': website
-                    }
-                    
-                    # Optional: detect machinery
-                    if enable_scraping and website and website != '-':
-                        machinery = self._quick_detect_machinery(company, website)
-                        if machinery:
-                            prospect_data['existing_machinery'] = machinery
-                    
-                    enriched.append(prospect_data)
+                    started = time.monotonic()
+                    prospect_data = self._prospect_record(row, processes, enable_scraping if full is None else full,
+                                                          deadline)
+                    if budget is not None:
+                        budget.record('full' if full else 'fast', time.monotonic() - started)
                     
                     # Cache it
-                    if website:
+                    if has_website(website):
                         self.cache.save_prospect_cache(website, company, prospect_data)
                     
                     print(f"  ✓ {company}")
-                    time.sleep(0.3)  # Rate limiting
+                    progress_bus.publish('enrich_prospects', done, total, company)
+                
+                # Scraped pages can reveal a different technology than the CSV
+                if matches_technology(classify_technologies(prospect_data['production_processes']), technology_filter):
+                    enriched += 1
+                    yield (row.name, prospect_data) if with_rows else prospect_data
+                else:
+                    metrics.incr('prospects_skipped', reason='technology')
         
-        return enriched
+        if budget is not None:
+            print(f"\n⏱  Website-checked {budget.count('full')} prospects within the budget, "
+                  f"{budget.count('fast')} took the fast path ({max(0, budget.remaining()):.0f}s to spare)")
+        progress_bus.finish_stage('enrich_prospects', f"Enriched {enriched} prospects")
+    
+    @staticmethod
+    def _needs_website_check(website, cached):
+        """Whether a prospect has a website that was not checked yet"""
+        return has_website(website) and not (cached and 'existing_machinery' in cached)
+    
+    def prospect_value(self, row, processes, cached=None, technology_filter=None):
+        """Expected value of a website check: revenue, weighted by technology fit; 0 if nothing to check"""
+        if not self._needs_website_check(row.get('Web1', ''), cached):
+            return 0.0
+        revenue = row.get('Cifra2024EUR', 0)
+        revenue = float(revenue) if pd.notna(revenue) else 0.0
+        technologies = classify_technologies(processes)
+        if technology_filter:
+            fit = 2.0 if technology_filter in technologies else 1.0
+        else:
+            fit = 1.5 if technologies else 1.0
+        return (1 + math.log10(1 + max(revenue, 0.0))) * fit
     
-    def _quick_detect_machinery(self, company, url):
-        """Fast machinery detection (text only, no images for speed)"""
+    def prioritize_prospects(self, tagged, technology_filter=None):
+        """tag_prospects() output ordered by prospect_value, most valuable first (ties keep CSV order)
+        
+        Returns [(row, processes, (cached, state))]: the cache lookup made for the value
+        """
+        entries, values = [], []
+        for row, processes in tagged:
+            lookup = self._lookup_prospect(row.get('Web1', ''))
+            entries.append((row, processes, lookup))
+            values.append(self.prospect_value(row, processes, lookup[0], technology_filter))
+        order = sorted(range(len(entries)), key=lambda i: -values[i])
+        return [entries[i] for i in order]
+    
+    def _lookup_prospect(self, website):
+        """Cached prospect data and its freshness, (None, 'missing') without a website"""
+        return self.cache.lookup_prospect_cache(website) if has_website(website) else (None, 'missing')
+    
+    @metrics.timed('tag_prospects')
+    def tag_prospects(self, prospects_df, technology_filter=None):
+        """Production processes of each prospect from its name and CSV text fields
+        
+        Runs before scraping and AI stages so filtered runs drop prospects
+        tagged only with other technologies up front. Returns [(row, processes)].
+        """
+        text_columns = [c for c in PROSPECT_TEXT_COLUMNS if c in prospects_df.columns]
+        tagged = []
+        skipped = 0
+        for _, row in prospects_df.iterrows():
+            if not row.get('Firma', ''):
+                continue
+            processes = detect_processes([row.get('Firma', '')] + [row.get(c) for c in text_columns])
+            if matches_technology(classify_technologies(processes), technology_filter):
+                tagged.append((row, processes))
+            else:
+                skipped += 1
+        
+        if technology_filter:
+            metrics.incr('prospects_skipped', skipped, reason='technology')
+            print(f"🏷  {len(tagged)} prospects kept for {technology_filter} ({skipped} tagged with other technologies skipped)")
+        return tagged
+    
+    def _prospect_record(self, row, processes=(), enable_scraping=False, deadline=None):
+        """Prospect data from a CSV row, with detected machinery when scraping
+        
+        deadline: time.monotonic() at which the website check is cut off (budgeted runs)
+        """
+        company = row.get('Firma', '')
+        website = row.get('Web1', '')
+        prospect_data = {
+            'name': company,
+            'country': row.get('Jud', ''),
+            'revenue_2024': float(row.get('Cifra2024EUR', 0)) if pd.notna(row.get('Cifra2024EUR')) else 0,
+            'website': website,
+            'production_processes': list(processes)
+        }
+        
+        # Optional: detect machinery (and processes mentioned on the website)
+        if enable_scraping and has_website(website):
+            detected = self._quick_detect_machinery(company, website, deadline)
+            if detected is not None:
+                machinery, page_processes = detected
+                prospect_data['existing_machinery'] = machinery or []  # Present = website was checked
+                prospect_data['production_processes'] = merge_unique(processes, page_processes)
+        
+        return prospect_data
+    
+    def _refresh_prospect(self, row, processes, enable_scraping):
+        """Re-analyze a prospect with a stale cache row in the background"""
+        website = row.get('Web1', '')
+        
+        def refresh(cache_db):
+            data = self._prospect_record(row, processes, enable_scraping)
+            if enable_scraping and 'existing_machinery' not in data:
+                # Keep the stale row (and its machinery) until the site answers again
+                raise RuntimeError(f"homepage {website} unreachable")
+            cache_db.save_prospect_cache(website, row.get('Firma', ''), data)
+        
+        self.refresher.submit(('prospect', website), refresh)
+    
+    @metrics.timed('_quick_detect_machinery')
+    def _quick_detect_machinery(self, company, url, deadline=None):
+        """Fast machinery detection (text only, no images for speed)
+        
+        Returns (machinery or None, production processes found on the pages),
+        or None when the homepage could not be loaded
+        """
         try:
-            response = self.session.get(url, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove unnecessary elements
-            for tag in soup(["script", "style", "nav", "footer"]):
-                tag.decompose()
-            
-            text = soup.get_text(separator=' ', strip=True)
-            text = ' '.join(text.split())[:3000]  # Limit text
-            
-            # Quick keyword search for brands
-            brands_found = []
-            keywords = ['ENGEL', 'Arburg', 'KraussMaffei', 'Sumitomo', 'Demag', 
-                       'Husky', 'Wittmann', 'Battenfeld', 'Haitian', 'Negri Bossi']
-            
-            for brand in keywords:
-                if brand.lower() in text.lower():
-                    brands_found.append(brand)
-            
-            if brands_found:
-                return [{'brand': b, 'confidence': 'medium'} for b in brands_found]
-            
-        except:
-            pass
+            # Homepage plus the pages most likely to list the machine park
+            pages = self.crawler.crawl(url, deadline)
+        except (requests.RequestException, ValueError):
+            pages = None  # Malformed URLs and links
+        if pages is None:
+            metrics.incr('sites_unreachable')
+            return None
         
-        return None
+        # One pass over each page's text finds every known brand and model line
+        brands_found = merge_detections(
+            (page['url'], self.brand_detector.detect(page['text'])) for page in pages
+        )
+        
+        # The same pages often name the production processes ("injecție", "extrusion")
+        processes = detect_processes(page['text'] for page in pages)
+        
+        return brands_found or None, processes
     
-    def smart_match_analysis(self, prospects, providers, top_n=10, technology_filter=None):
-        """Use AI to match prospects with providers - returns FULL prospect lists"""
+    @metrics.timed('smart_match_analysis')
+    def smart_match_analysis(self, prospects, providers, top_n=10, technology_filter=None, provider_profiles=None):
+        """Use AI to match prospects with providers - returns FULL prospect lists
+        
+        provider_profiles: already computed profiles; skips the AI profiling step
+        """
         
         print("\n" + "="*90)
         print("🤖 AI MATCHING ANALYSIS")
@@ -558,7 +1827,9 @@ class FastMachineryMatcher:
         prospect_categories = self._categorize_prospects(prospects)
         
         # Get AI analysis of provider capabilities
-        provider_profiles = self._analyze_provider_profiles(providers[:50], technology_filter)
+        if provider_profiles is None:
+            provider_profiles = self.profile_providers(self.provider_candidates(providers, technology_filter),
+                                                       technology_filter)
         
         if not provider_profiles:
             print("⚠ No providers found matching the technology filter!")
@@ -567,64 +1838,165 @@ class FastMachineryMatcher:
         # Second pass: Match ALL prospects to ALL providers
         print(f"\n🎯 Phase 2: Matching ALL {len(prospects)} prospects to {len(provider_profiles)} providers...")
         
-        all_matches = []
+        scorer = IncrementalScorer(self, provider_profiles, technology_filter)
+        progress_bus.start_stage('matching', len(prospects), "Matching prospects to providers")
         
-        for provider in provider_profiles:
-            print(f"\n  📊 Analyzing {provider['name']}...")
-            
-            matched_prospects = []
-            
-            for prospect in prospects:
-                score, reasons = self._calculate_match(prospect, provider, technology_filter)
-                
-                if score >= 50:  # Threshold for good match
-                    matched_prospects.append({
-                        'name': prospect['name'],
-                        'country': prospect.get('country', ''),
-                        'revenue': prospect.get('revenue_2024', 0),
-                        'website': prospect.get('website', ''),
-                        'production_processes': prospect.get('production_processes', []),
-                        'existing_machinery': prospect.get('existing_machinery', []),
-                        'match_score': score,
-                        'match_reasons': reasons
-                    })
-            
-            coverage_pct = (len(matched_prospects) / len(prospects) * 100) if prospects else 0
-            
-            all_matches.append({
-                'provider': provider,
-                'matched_prospects': matched_prospects,
-                'coverage_pct': coverage_pct,
-                'total_matched': len(matched_prospects)
-            })
-            
-            print(f"     ✓ Matched {len(matched_prospects)} prospects ({coverage_pct:.1f}%)")
+        for done, prospect in enumerate(prospects, 1):
+            scorer.add(prospect)
+            if done % 100 == 0 or done == len(prospects):
+                progress_bus.publish('matching', done, len(prospects), prospect['name'])
+        
+        for provider, matched in zip(provider_profiles, scorer.matches):
+            print(f"  📊 {provider['name']}: matched {len(matched)} prospects ({scorer.coverage(matched):.1f}%)")
+        
+        progress_bus.finish_stage('matching', f"Matched {len(prospects)} prospects to {len(provider_profiles)} providers")
+        
+        return scorer.ranking(top_n)
+    
+    def stream_match_analysis(self, stream, provider_profiles, top_n=10, technology_filter=None, report_every=None,
+                              scorer=None):
+        """Consumer side of a streaming run: score prospects as they arrive from a ProspectStream
+        
+        Per-provider counts and match lists are updated online, so
+        self.live_scorer.ranking() gives a partial ranking at any time and the
+        final one is ready as soon as the last prospect is scored.
+        scorer: an IncrementalScorer(keep_prospects=True) that receives the
+        provider profiles while they are made (add_provider) instead of
+        provider_profiles; the caller reorders it once profiling is done
+        """
+        report_every = report_every or STREAM_REPORT_EVERY
+        live = scorer is not None
+        scorer = scorer or IncrementalScorer(self, provider_profiles or [], technology_filter)
+        self.live_scorer = scorer
+        
+        print("\n" + "="*90)
+        print(f"🤖 STREAMING MATCH ANALYSIS ({'providers arriving while profiled' if live else f'{len(scorer.providers)} providers'})")
+        print("="*90)
+        
+        try:
+            with metrics.stage('smart_match_analysis'):
+                for position, prospect in stream:
+                    scorer.add(prospect, position)
+                    if scorer.total % report_every == 0:
+                        leaders = scorer.ranking(3)['top_providers']
+                        summary = ', '.join(f"{p['name']} {p['coverage_pct']}%" for p in leaders)
+                        print(f"  ⏩ {scorer.total} prospects scored — leading: {summary or 'none yet'}")
+                        progress_bus.publish('matching', scorer.total, 0, f"Leading: {summary}")
+        except BaseException:
+            stream.abort()  # Unblock the producer
+            raise
+        
+        if not scorer.providers and not live:
+            print("⚠ No providers found matching the technology filter!")
+            return None
+        if not live:
+            scorer.reorder(list(scorer.providers))  # Match lists back in CSV order (budgeted runs)
+        return scorer.ranking(top_n)
+    
+    def stratified_sample(self, prospects_df, sample_size=None, technology_filter=None, seed=0):
+        """Rows of a preview sample, drawn from the _categorize_prospects strata
+        
+        Each stratum gets a share of the sample proportional to its size (at
+        least 2 prospects where it has them, so its variance can be
+        estimated). The same CSV gives the same sample, so a repeated preview
+        is served from the cache. Returns (sample rows in CSV order,
+        {stratum: (prospects in the run, prospects sampled)}).
+        """
+        sample_size = sample_size or PREVIEW_SAMPLE_SIZE
+        tagged = self.tag_prospects(prospects_df, technology_filter)
+        records = []
+        for position, (row, processes) in enumerate(tagged):
+            record = self._prospect_record(row, processes)
+            record['_position'] = position
+            records.append(record)
+        strata = self._categorize_prospects(records)
+        sizes = {key: len(members) for key, members in strata.items()}
+        total = sum(sizes.values())
+        
+        # Proportional allocation, largest remainders first
+        quotas = {key: sample_size * size / total for key, size in sizes.items()} if total else {}
+        allocation = {key: min(sizes[key], max(int(quota), 2)) for key, quota in quotas.items()}
+        for key in sorted(quotas, key=lambda k: quotas[k] - int(quotas[k]), reverse=True):
+            if sum(allocation.values()) >= min(sample_size, total):
+                break
+            allocation[key] = min(sizes[key], allocation[key] + 1)
         
-        # Sort by coverage
-        all_matches.sort(key=lambda x: x['coverage_pct'], reverse=True)
+        rng = random.Random(seed)
+        positions = sorted(
+            record['_position'] for key, members in strata.items()
+            for record in rng.sample(members, allocation.get(key, 0))
+        )
+        sample = prospects_df.loc[[tagged[position][0].name for position in positions]]
+        print(f"🎲 Preview sample: {len(sample)} of {total} prospects from "
+              f"{sum(1 for size in sizes.values() if size)} region/size strata")
+        return sample, {key: (size, allocation.get(key, 0)) for key, size in sizes.items()}
+    
+    @metrics.timed('smart_match_analysis')
+    def preview_match_analysis(self, prospects, provider_profiles, strata_sizes, top_n=10, technology_filter=None,
+                               z=1.96):
+        """Estimated coverage_pct (with a 95% confidence interval) of each provider from a stratified sample
+        
+        Per stratum h with N_h prospects, n_h scored and a share p_h of them
+        matched, the coverage is sum(W_h * p_h) with W_h = N_h/N and its
+        variance sum(W_h² * p_h(1-p_h)/(n_h-1) * (1 - n_h/N_h)); see
+        wilson_interval for the interval.
+        
+        strata_sizes: {stratum: (N_h, prospects sampled)} from stratified_sample.
+        Sampled prospects the technology filter drops after scraping are not
+        in a full run either: N_h is scaled by the share of the stratum's
+        sample that was kept, so the weights follow the filtered population.
+        """
+        strata = self._categorize_prospects(prospects)
+        scorers = {key: IncrementalScorer(self, provider_profiles or [], technology_filter) for key in strata}
+        for key, members in strata.items():
+            for prospect in members:
+                scorers[key].add(prospect)
+        
+        kept_sizes = {}
+        for key, (size, drawn) in strata_sizes.items():
+            n = scorers[key].total if key in scorers else 0
+            kept_sizes[key] = size * n / drawn if drawn else 0.0
+        population = sum(kept_sizes.values())
+        estimates = []
+        for index, provider in enumerate(provider_profiles or []):
+            coverage = variance = 0.0
+            sample_matches = []
+            for key, scorer in scorers.items():
+                n, size = scorer.total, kept_sizes.get(key, 0)
+                if not n or not size:
+                    continue
+                matched = scorer.matches[index]
+                sample_matches += matched
+                weight = size / population
+                share = len(matched) / n
+                coverage += weight * share
+                variance += weight ** 2 * share * (1 - share) / max(n - 1, 1) * max(0.0, 1 - n / size)
+            estimates.append((coverage, *wilson_interval(coverage, variance, len(prospects), z),
+                              provider, sample_matches))
         
-        # Format for output
+        # Sort by estimated coverage (stable: ties keep the profile order)
+        estimates.sort(key=lambda item: item[0], reverse=True)
         results = {
-            'total_prospects': len(prospects),
-            'total_providers_analyzed': len(provider_profiles),
+            'preview': True,
+            'total_prospects': round(population),  # Estimated after the technology filter
+            'sample_size': len(prospects),
+            'total_providers_analyzed': len(provider_profiles or []),
             'technology_filter': technology_filter,
             'top_providers': []
         }
-        
-        for rank, match in enumerate(all_matches[:top_n], 1):
-            provider_result = {
+        for rank, (coverage, low, high, provider, sample_matches) in enumerate(estimates[:top_n], 1):
+            results['top_providers'].append({
                 'rank': rank,
-                'name': match['provider']['name'],
-                'country': match['provider'].get('country', ''),
-                'technologies': match['provider'].get('technologies', []),
-                'coverage_pct': round(match['coverage_pct'], 1),
-                'total_prospects_matched': match['total_matched'],
-                'reasons': match['provider'].get('key_strengths', []),
-                'ideal_for': match['provider'].get('ideal_for', ''),
-                'matched_prospects_full_list': match['matched_prospects']  # FULL LIST
-            }
-            results['top_providers'].append(provider_result)
-        
+                'name': provider['name'],
+                'country': provider.get('country', ''),
+                'technologies': provider.get('technologies', []),
+                'coverage_pct': round(coverage * 100, 1),
+                'coverage_ci': [round(low * 100, 1), round(high * 100, 1)],
+                'total_prospects_matched': round(coverage * population),  # Estimated
+                'reasons': provider.get('key_strengths', []),
+                'ideal_for': provider.get('ideal_for', ''),
+                'sample_matches': sample_matches
+            })
         return results
     
     def _categorize_prospects(self, prospects):
@@ -646,12 +2018,7 @@ class FastMachineryMatcher:
             country = p.get('country', '')
             
             # Determine size
-            if revenue >= 30_000_000:
-                size = 'large'
-            elif revenue >= 5_000_000:
-                size = 'medium'
-            else:
-                size = 'small'
+            size = revenue_bucket(revenue)
             
             # Determine region
             region = 'eu' if country in eu_countries else 'non_eu'
@@ -662,27 +2029,237 @@ class FastMachineryMatcher:
         
         return categories
     
-    def _analyze_provider_profiles(self, providers, technology_filter=None):
-        """Use AI to analyze each provider's capabilities, optionally filtered by technology"""
+    @staticmethod
+    def provider_candidates(providers, technology_filter=None, limit=50):
+        """Providers sent to AI profiling; ones tagged only with other technologies never reach it"""
+        candidates = [p for p in providers if matches_technology(provider_technologies(p), technology_filter)]
+        if technology_filter:
+            metrics.incr('providers_skipped', len(providers) - len(candidates), reason='technology')
+        return candidates[:limit]
+    
+    def profile_providers(self, providers, technology_filter=None, on_profile=None):
+        """AI profiles of providers, reusing cached ones (e.g. made by queue workers) and caching new ones
+        
+        on_profile: called with each profile as soon as it is available (cached ones first)
+        """
+        cached = self.cache.get_provider_profiles([p['name'] for p in providers], technology_filter) if self.cache else {}
+        missing = [p for p in providers if p['name'] not in cached]
+        if cached:
+            metrics.incr('cache_hits', len(cached), cache='provider_profile')
+            print(f"  ✓ {len(cached)} provider profiles from cache")
+            if on_profile:
+                for p in providers:
+                    if p['name'] in cached:
+                        on_profile(cached[p['name']])
+        
+        new_profiles = self._analyze_provider_profiles(missing, technology_filter, on_profile) if missing else []
+        if missing and self.cache is not None:
+            metrics.incr('cache_misses', len(missing), cache='provider_profile')
+            self.cache.save_provider_profiles(new_profiles, technology_filter)
+        if not cached:
+            return new_profiles
+        
+        # Keep the candidates' order; profiles the AI returned under another name go last
+        by_name = {**cached, **{p['name']: p for p in new_profiles}}
+        names = {p['name'] for p in providers}
+        return ([by_name[p['name']] for p in providers if p['name'] in by_name] +
+                [p for p in new_profiles if p['name'] not in names])
+    
+    @metrics.timed('_analyze_provider_profiles')
+    def _analyze_provider_profiles(self, providers, technology_filter=None, on_profile=None):
+        """Use AI to analyze each provider's capabilities, optionally filtered by technology
+        
+        Batches run concurrently; how many at once follows the adaptive API limit.
+        on_profile: called (from the request threads) with each profile as soon
+        as its JSON object has streamed in complete and valid
+        """
         
         print("  📋 Analyzing provider capabilities with AI...")
         if technology_filter:
             print(f"     🎯 Focusing on {technology_filter} specialists...")
         
         profiles = []
+        progress_bus.start_stage('provider_profiles', len(providers), "Profiling providers with AI")
         
-        # Batch providers for efficiency
-        for i in range(0, len(providers), 10):
-            batch = providers[i:i+10]
-            
-            tech_context = ""
-            if technology_filter:
-                tech_context = f"\nIMPORTANT: Focus on providers that specialize in {technology_filter}. Prioritize those with strong capabilities in this technology."
-            
-            prompt = f"""Analyze these machinery providers and determine their ideal customer profiles.
+        # As many providers per request as fit the token budgets
+        batches = self.pack_profile_batches(providers)
+        workers = max(1, min(len(batches), limiters.settings['api'].get('maximum', 1)))
+        done = 0
+        with worker_pool(workers, thread_name_prefix='llm') as executor:
+            results = executor.map(lambda batch: self._profile_batch(batch, technology_filter, on_profile), batches)
+            for batch, batch_profiles in zip(batches, results):
+                profiles.extend(batch_profiles)
+                done += len(batch)
+                progress_bus.publish('provider_profiles', done, len(providers),
+                                     f"{len(profiles)} provider profiles ready")
+        
+        progress_bus.finish_stage('provider_profiles', f"Profiled {len(profiles)} providers")
+        return profiles
+    
+    def _stream_message(self, on_text, **kwargs):
+        """messages.stream under the adaptive API limit; on_text gets each piece of text as it arrives
+        
+        A throttled call (or one that could not connect) is retried as long as
+        nothing has streamed yet, after a jittered exponential backoff; a
+        pause the limiter already imposes (Retry-After, backoff at the floor)
+        counts towards it.
+        Returns the final message (usage, stop_reason).
+        """
+        limiter = limiters.get('api', 'anthropic')
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            received = False
+            try:
+                with limiter.slot(), metrics.stage('llm_call'):
+                    with self.client.messages.stream(**kwargs) as stream:
+                        for text in stream.text_stream:
+                            received = True
+                            on_text(text)
+                        message = stream.get_final_message()
+            except Exception as e:
+                retryable = classify_exception(e) == CONGESTED or isinstance(e, anthropic.APIConnectionError)
+                if received or not retryable or attempt == LLM_MAX_RETRIES:
+                    raise
+                metrics.incr('llm_retries')
+                backoff = random.uniform(0.5, 1.0) * min(LLM_RETRY_MAX_DELAY, LLM_RETRY_DELAY * 2 ** attempt)
+                time.sleep(max(0.0, backoff - limiter.pause_left()))
+                continue
+            record_llm_usage(message)
+            return message
+    
+    @staticmethod
+    def pack_profile_batches(providers, input_budget=None, output_budget=None, tokens_per_profile=None):
+        """Providers split into request batches, in order, each filled up to the token budgets
+        
+        input_budget: estimated tokens of provider data (minified, pruned JSON) per request
+        output_budget: expected profile tokens per request, by default 75% of
+        PROFILE_MAX_OUTPUT_TOKENS so an answer longer than expected still fits
+        """
+        input_budget = input_budget or PROFILE_INPUT_TOKEN_BUDGET
+        output_budget = output_budget or int(PROFILE_MAX_OUTPUT_TOKENS * 0.75)
+        tokens_per_profile = tokens_per_profile or PROFILE_TOKENS_PER_PROFILE
+        
+        batches, batch, batch_tokens = [], [], 0
+        for provider in providers:
+            tokens = estimate_tokens(minified_json(prompt_record(provider))) + 1
+            if batch and (batch_tokens + tokens > input_budget or
+                          (len(batch) + 1) * tokens_per_profile > output_budget):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(provider)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    @staticmethod
+    def _basic_profile(provider):
+        """Profile of a provider the AI could not analyze (marked basic, so it is never cached)"""
+        return {
+            'name': provider['name'],
+            'country': provider.get('country', ''),
+            'tier': provider.get('tier', 'mid'),
+            'technologies': ['general'],
+            'ideal_regions': ['EU'],
+            'key_strengths': ['Quality machinery'],
+            'ideal_for': 'General manufacturing',
+            'basic': True
+        }
+    
+    def _profile_batch(self, batch, technology_filter=None, on_profile=None):
+        """AI profiles of one packed batch of providers, read from the streamed answer
+        
+        Each profile is validated and passed to on_profile as soon as its
+        object is complete. A malformed entry is retried for its provider
+        alone; when the answer is cut off (max_tokens or a broken stream) the
+        complete profiles are kept and the remaining providers retried in two
+        halves. Providers the AI could not profile get basic profiles.
+        """
+        parser = JSONArrayStream()
+        slots = {}  # Batch position -> profiles, so results keep the prompt order
+        malformed = []
+        
+        def release(index, profiles):
+            slots[index] = profiles
+            if on_profile:
+                for profile in profiles:
+                    on_profile(profile)
+        
+        def on_text(text):
+            for index, profile in parser.feed(text):
+                if not valid_profile(profile):
+                    malformed.append(index)
+                else:
+                    release(index, [profile] if self._keeps_profile(profile, technology_filter) else [])
+        
+        message = None
+        try:
+            message = self._stream_message(on_text, **self._profile_request(batch, technology_filter))
+        except Exception as e:
+            if not parser.count:
+                print(f"    ⚠ Error analyzing batch: {e}")
+                # Use basic profiles
+                profiles = [self._basic_profile(p) for p in batch]
+                release(0, profiles)
+                return profiles
+            print(f"    ⚠ Answer broke off after {parser.count} profiles: {e}")
+        
+        truncated = message is None or not parser.complete or getattr(message, 'stop_reason', None) == 'max_tokens'
+        if not parser.count and not truncated:
+            print("    ⚠ Error analyzing batch: no JSON array of profiles in the AI response")
+            profiles = [self._basic_profile(p) for p in batch]
+            release(0, profiles)
+            return profiles
+        
+        # Entries come back in prompt order: a malformed one belongs to the provider at its position
+        for index in malformed:
+            if index >= len(batch):
+                continue
+            metrics.incr('llm_malformed_profiles')
+            if len(batch) == 1:
+                print(f"    ⚠ Malformed profile for {batch[0]['name']}, using a basic profile")
+                release(index, [self._basic_profile(batch[0])])
+            else:
+                slots[index] = self._profile_batch([batch[index]], technology_filter, on_profile)
+        
+        rest = batch[parser.count:] if truncated else []
+        if rest:
+            metrics.incr('llm_truncated_batches')
+            if len(batch) == 1:
+                print(f"    ⚠ Profile of {batch[0]['name']} cut off at {PROFILE_MAX_OUTPUT_TOKENS} tokens")
+                release(0, [self._basic_profile(batch[0])])
+            else:
+                print(f"    ✂ Answer for {len(batch)} providers cut off: {parser.count} kept, "
+                      f"retrying {len(rest)} in smaller batches")
+                for number, part in enumerate(split_in_halves(rest)):
+                    slots[len(batch) + number] = self._profile_batch(part, technology_filter, on_profile)
+        
+        profiles = [profile for index in sorted(slots) for profile in slots[index]]
+        if technology_filter and profiles:
+            print(f"     ✓ Found {len(profiles)} {technology_filter} specialists in this batch")
+        return profiles
+    
+    @staticmethod
+    def _keeps_profile(profile, technology_filter=None):
+        """Whether a profile supports the technology filter (every profile does without one)"""
+        if not technology_filter:
+            return True
+        tech_keywords = TECHNOLOGY_KEYWORDS.get(technology_filter, [])
+        provider_techs = (profile.get('technologies') or []) + (profile.get('processes') or [])
+        provider_techs_str = ' '.join(provider_techs).lower()
+        
+        # Check if provider supports this technology
+        return any(keyword.lower() in provider_techs_str for keyword in tech_keywords)
+    
+    def _profile_request(self, batch, technology_filter=None):
+        """messages.create parameters for profiling one batch of providers"""
+        tech_context = ""
+        if technology_filter:
+            tech_context = f"\nIMPORTANT: Focus on providers that specialize in {technology_filter}. Prioritize those with strong capabilities in this technology."
+        
+        prompt = f"""Analyze these machinery providers and determine their ideal customer profiles.
 
 PROVIDERS:
-{json.dumps(batch, indent=1)}
+{minified_json([prompt_record(p) for p in batch])}
 {tech_context}
 
 For EACH provider, return their profile in this format:
@@ -700,64 +2277,73 @@ For EACH provider, return their profile in this format:
 }}
 
 Return as JSON array."""
-
-            try:
-                message = self.client.messages.create(
-                    model="claude-sonnet-4-5-20250929",
-                    max_tokens=2048,
-                    temperature=0.3,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                
-                response_text = message.content[0].text
-                json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-                
-                if json_match:
-                    batch_profiles = json.loads(json_match.group())
-                    
-                    # Filter by technology if specified
-                    if technology_filter:
-                        filtered_batch = []
-                        tech_keywords = TECHNOLOGY_KEYWORDS.get(technology_filter, [])
-                        
-                        for profile in batch_profiles:
-                            provider_techs = profile.get('technologies', []) + profile.get('processes', [])
-                            provider_techs_str = ' '.join(provider_techs).lower()
-                            
-                            # Check if provider supports this technology
-                            if any(keyword.lower() in provider_techs_str for keyword in tech_keywords):
-                                profiles.append(profile)
-                                filtered_batch.append(profile)
-                        
-                        if filtered_batch:
-                            print(f"     ✓ Found {len(filtered_batch)} {technology_filter} specialists in this batch")
-                    else:
-                        profiles.extend(batch_profiles)
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"    ⚠ Error analyzing batch: {e}")
-                # Use basic profiles
-                for p in batch:
-                    profiles.append({
-                        'name': p['name'],
-                        'country': p.get('country', ''),
-                        'tier': p.get('tier', 'mid'),
-                        'technologies': ['general'],
-                        'ideal_regions': ['EU'],
-                        'key_strengths': ['Quality machinery'],
-                        'ideal_for': 'General manufacturing'
-                    })
         
-        return profiles
+        return {
+            'model': "claude-sonnet-4-5-20250929",
+            'max_tokens': PROFILE_MAX_OUTPUT_TOKENS,
+            'temperature': 0.3,
+            'messages': [{"role": "user", "content": prompt}]
+        }
+    
+    def _read_profiles(self, batch, message, technology_filter=None):
+        """(profiles kept after the technology filter, provider batches to retry) from a complete answer
+        
+        Retries are a single provider per malformed entry, plus the providers
+        after a cut (max_tokens) in two halves. Raises ValueError for an answer
+        without profiles, or a single provider's profile that was cut off.
+        """
+        parser = JSONArrayStream()
+        entries = parser.feed(message.content[0].text)
+        truncated = not parser.complete or getattr(message, 'stop_reason', None) == 'max_tokens'
+        if not entries and not truncated:
+            raise ValueError("no JSON array of profiles in the AI response")
+        
+        profiles, retry = [], []
+        for index, profile in entries:
+            if valid_profile(profile):
+                if self._keeps_profile(profile, technology_filter):
+                    profiles.append(profile)
+            elif index < len(batch):
+                metrics.incr('llm_malformed_profiles')
+                retry.append([batch[index]])
+        
+        rest = batch[parser.count:] if truncated else []
+        if rest:
+            metrics.incr('llm_truncated_batches')
+            if len(batch) == 1:
+                raise ValueError(f"answer cut off at {PROFILE_MAX_OUTPUT_TOKENS} tokens")
+            retry.extend(split_in_halves(rest))
+        return profiles, retry
     
-    def _calculate_match(self, prospect, provider):
+    def _calculate_match(self, prospect, provider, technology_filter=None):
         """Calculate match score between prospect and provider"""
         
         score = 0
         reasons = []
         
+        # Technology matching (HIGH PRIORITY if filter is set)
+        if technology_filter:
+            prospect_processes = prospect.get('production_processes', [])
+            provider_techs = provider.get('technologies', []) + provider.get('processes', [])
+            tech_keywords = TECHNOLOGY_KEYWORDS.get(technology_filter, [])
+            
+            prospect_has_tech = any(
+                any(keyword.lower() in process.lower() for keyword in tech_keywords)
+                for process in prospect_processes
+            ) if prospect_processes else False
+            
+            provider_has_tech = any(
+                any(keyword.lower() in tech.lower() for keyword in tech_keywords)
+                for tech in provider_techs
+            ) if provider_techs else False
+            
+            if prospect_has_tech and provider_has_tech:
+                score += 35
+                reasons.append(f"Both use {technology_filter} technology")
+            elif provider_has_tech:
+                score += 20
+                reasons.append(f"Provider specializes in {technology_filter}")
+        
         # Revenue matching
         prospect_revenue = prospect.get('revenue_2024', 0)
         provider_tier = provider.get('tier', 'mid')
@@ -794,7 +2380,8 @@ Return as JSON array."""
         existing = prospect.get('existing_machinery', [])
         if existing:
             existing_brands = [m.get('brand', '') for m in existing if isinstance(m, dict)]
-            if provider['name'] in ' '.join(existing_brands):
+            manufacturers = [m.get('manufacturer', '') for m in existing if isinstance(m, dict)]
+            if provider['name'] in ' '.join(existing_brands + manufacturers):
                 score += 10
                 reasons.append("Already customer (expansion opportunity)")
             elif any(brand in ['Haitian', 'Chen Hsong'] for brand in existing_brands):
@@ -808,6 +2395,227 @@ Return as JSON array."""
         return score, reasons[:3]  # Return top 3 reasons
 
 
+class IncrementalScorer:
+    """Online per-provider match counts and lists; prospects are scored as they arrive
+    
+    ranking() at any point gives the same result smart_match_analysis would
+    give for the prospects added so far. With keep_prospects, providers can
+    also arrive while prospects are scored (add_provider): each new provider
+    is scored against the prospects seen so far.
+    """
+    
+    MATCH_THRESHOLD = 50  # Score for a good match
+    
+    def __init__(self, matcher, provider_profiles, technology_filter=None, keep_prospects=False):
+        self.matcher = matcher
+        self.providers = list(provider_profiles)
+        self.technology_filter = technology_filter
+        self.matches = [[] for _ in self.providers]
+        self.positions = [[] for _ in self.providers]
+        self.total = 0
+        self.prospects = [] if keep_prospects else None  # [(position, prospect)] for add_provider
+        self.lock = threading.Lock()
+    
+    @classmethod
+    def from_partials(cls, provider_profiles, partials, technology_filter=None):
+        """Combine partial() outputs of scorers that saw disjoint prospects
+        
+        Match lists are put back in prospect position order, so the merged
+        ranking equals the one a single scorer would have produced.
+        """
+        scorer = cls(None, provider_profiles, technology_filter)
+        for partial in partials:
+            if len(partial['matches']) != len(scorer.providers):
+                raise ValueError("Partial results were scored against different provider profiles")
+            scorer.total += partial['total']
+            for index, entries in enumerate(partial['matches']):
+                for position, match in entries:
+                    scorer.positions[index].append(position)
+                    scorer.matches[index].append(match)
+        for index in range(len(scorer.providers)):
+            order = sorted(range(len(scorer.matches[index])), key=scorer.positions[index].__getitem__)
+            scorer.positions[index] = [scorer.positions[index][i] for i in order]
+            scorer.matches[index] = [scorer.matches[index][i] for i in order]
+        return scorer
+    
+    def partial(self):
+        """Counts and [(position, match)] lists per provider, for from_partials()"""
+        with self.lock:
+            return {
+                'total': self.total,
+                'matches': [list(zip(positions, matches)) for positions, matches in zip(self.positions, self.matches)]
+            }
+    
+    def add(self, prospect, position=None):
+        """Score one prospect against every provider
+        
+        position: its place in the full prospect list (defaults to arrival order)
+        """
+        if self.prospects is None:
+            providers = self.providers
+        else:
+            # Providers added later score this prospect themselves (add_provider)
+            with self.lock:
+                position = self.total if position is None else position
+                self.total += 1
+                self.prospects.append((position, prospect))
+                providers = list(self.providers)
+        found = []
+        with metrics.stage('scoring'):
+            for index, provider in enumerate(providers):
+                match = self._match(prospect, provider)
+                if match:
+                    found.append((index, match))
+        with self.lock:
+            if self.prospects is None:
+                position = self.total if position is None else position
+                self.total += 1
+            for index, match in found:
+                self.matches[index].append(match)
+                self.positions[index].append(position)
+    
+    def add_provider(self, provider):
+        """Score one more provider against the prospects added so far (needs keep_prospects)"""
+        with self.lock:
+            index = len(self.providers)
+            self.providers.append(provider)
+            self.matches.append([])
+            self.positions.append([])
+            prospects = list(self.prospects)
+        found = []
+        with metrics.stage('scoring'):
+            for position, prospect in prospects:
+                match = self._match(prospect, provider)
+                if match:
+                    found.append((position, match))
+        with self.lock:
+            for position, match in found:
+                self.matches[index].append(match)
+                self.positions[index].append(position)
+    
+    def reorder(self, provider_profiles):
+        """Make the providers exactly provider_profiles, in that order, with match lists in prospect order
+        
+        Providers that arrived through add_provider (in whatever order their
+        profiles were ready) are matched by identity; missing ones are scored.
+        The ranking then equals the one of a scorer built with provider_profiles.
+        """
+        with self.lock:
+            known = {id(provider): index for index, provider in enumerate(self.providers)}
+        for provider in provider_profiles:
+            if id(provider) not in known:
+                self.add_provider(provider)
+        with self.lock:
+            known = {id(provider): index for index, provider in enumerate(self.providers)}
+            indexes = [known[id(provider)] for provider in provider_profiles]
+            self.providers = list(provider_profiles)
+            matches, positions = [], []
+            for index in indexes:
+                order = sorted(range(len(self.positions[index])), key=self.positions[index].__getitem__)
+                positions.append([self.positions[index][i] for i in order])
+                matches.append([self.matches[index][i] for i in order])
+            self.matches, self.positions = matches, positions
+    
+    def _match(self, prospect, provider):
+        """Match entry of a prospect for a provider, or None below the threshold"""
+        score, reasons = self.matcher._calculate_match(prospect, provider, self.technology_filter)
+        if score < self.MATCH_THRESHOLD:
+            return None
+        return {
+            'name': prospect['name'],
+            'country': prospect.get('country', ''),
+            'revenue': prospect.get('revenue_2024', 0),
+            'website': prospect.get('website', ''),
+            'production_processes': prospect.get('production_processes', []),
+            'existing_machinery': prospect.get('existing_machinery', []),
+            'fully_enriched': 'existing_machinery' in prospect,  # Website was checked
+            'match_score': score,
+            'match_reasons': reasons
+        }
+    
+    def coverage(self, matched):
+        return (len(matched) / self.total * 100) if self.total else 0
+    
+    def ranking(self, top_n=10):
+        """Results dict (as smart_match_analysis returns) for the prospects scored so far"""
+        with self.lock:
+            total = self.total
+            providers = list(self.providers)
+            matches = [list(m) for m in self.matches]
+        
+        # Sort by coverage (stable: ties keep the profile order)
+        ranked = sorted(zip(providers, matches), key=lambda item: len(item[1]), reverse=True)
+        
+        results = {
+            'total_prospects': total,
+            'total_providers_analyzed': len(providers),
+            'technology_filter': self.technology_filter,
+            'top_providers': []
+        }
+        
+        for rank, (provider, matched) in enumerate(ranked[:top_n], 1):
+            coverage_pct = (len(matched) / total * 100) if total else 0
+            results['top_providers'].append({
+                'rank': rank,
+                'name': provider['name'],
+                'country': provider.get('country', ''),
+                'technologies': provider.get('technologies', []),
+                'coverage_pct': round(coverage_pct, 1),
+                'total_prospects_matched': len(matched),
+                'reasons': provider.get('key_strengths', []),
+                'ideal_for': provider.get('ideal_for', ''),
+                'matched_prospects_full_list': matched  # FULL LIST
+            })
+        
+        return results
+
+
+class ProspectStream:
+    """Bounded hand-off of enriched prospects from enrichment to scoring
+    
+    The producer blocks while the queue is full (backpressure keeps memory
+    bounded); abort() releases it if the consumer fails. Iterating yields
+    prospects until the producer calls close(), or stops once the stream
+    is aborted (another stage failed), so neither side can hang.
+    """
+    
+    _END = object()
+    
+    def __init__(self, maxsize=None):
+        self.queue = queue.Queue(STREAM_QUEUE_SIZE if maxsize is None else maxsize)
+        self.aborted = threading.Event()
+    
+    def put(self, prospect):
+        """Queue a prospect, waiting for room; False once the stream is aborted"""
+        while not self.aborted.is_set():
+            try:
+                self.queue.put(prospect, timeout=0.2)
+                metrics.set_gauge('stream_queue_depth', self.queue.qsize())
+                return True
+            except queue.Full:
+                metrics.incr('stream_backpressure_waits')
+        return False
+    
+    def close(self):
+        self.put(self._END)
+    
+    def abort(self):
+        self.aborted.set()
+    
+    def __iter__(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                if self.aborted.is_set():
+                    return
+                continue
+            if item is self._END:
+                return
+            yield item
+
+
+@metrics.timed('export_to_excel')
 def export_to_excel(results, output_file="machinery_partners_full_lists.xlsx"):
     """Export results with FULL prospect lists to Excel"""
     
@@ -867,6 +2675,7 @@ def export_to_excel(results, output_file="machinery_partners_full_lists.xlsx"):
                     'Revenue (EUR)': prospect['revenue'],
                     'Website': prospect['website'],
                     'Existing Machinery': machinery_str,
+                    'Enrichment': 'Full' if prospect.get('fully_enriched') else 'Fast',
                     'Match Score': prospect.get('match_score', 0),
                     'Why Good Match': reasons_str
                 })
@@ -881,8 +2690,9 @@ def export_to_excel(results, output_file="machinery_partners_full_lists.xlsx"):
             worksheet.column_dimensions['C'].width = 15  # Revenue
             worksheet.column_dimensions['D'].width = 40  # Website
             worksheet.column_dimensions['E'].width = 30  # Existing machinery
-            worksheet.column_dimensions['F'].width = 12  # Score
-            worksheet.column_dimensions['G'].width = 60  # Why match
+            worksheet.column_dimensions['F'].width = 12  # Enrichment (website checked or CSV only)
+            worksheet.column_dimensions['G'].width = 12  # Score
+            worksheet.column_dimensions['H'].width = 60  # Why match
             
             # Header formatting
             for cell in worksheet[1]:
@@ -896,9 +2706,9 @@ def export_to_excel(results, output_file="machinery_partners_full_lists.xlsx"):
             worksheet['A1'].font = Font(size=14, bold=True)
             worksheet['A2'] = f"Coverage: {provider['coverage_pct']}% ({provider['total_prospects_matched']} prospects)"
             worksheet['A3'] = f"Why Partner: {', '.join(provider['reasons'][:3])}"
-            worksheet.merge_cells('A1:G1')
-            worksheet.merge_cells('A2:G2')
-            worksheet.merge_cells('A3:G3')
+            worksheet.merge_cells('A1:H1')
+            worksheet.merge_cells('A2:H2')
+            worksheet.merge_cells('A3:H3')
     
     print(f"✓ Excel file created: {output_file}")
     print(f"  - Summary sheet with all providers")
@@ -906,6 +2716,7 @@ def export_to_excel(results, output_file="machinery_partners_full_lists.xlsx"):
     print(f"  - Full prospect lists with contact info and match reasons")
 
 
+@metrics.timed('export_to_json')
 def export_to_json(results, output_file="machinery_partners_full_data.json"):
     """Export complete results to JSON"""
     
@@ -915,9 +2726,146 @@ def export_to_json(results, output_file="machinery_partners_full_data.json"):
     print(f"✓ JSON file created: {output_file}")
 
 
-def main():
+def iter_run_json(cache_db, run_id, provider_rank=None, country=None, technology=None):
+    """Yield a stored run as JSON text chunks (same layout as export_to_json)"""
+    run = cache_db.get_run(run_id)
+    providers = [p for p in run['top_providers'] if provider_rank is None or p['rank'] == provider_rank]
+    
+    yield '{"total_prospects": %s, "total_providers_analyzed": %s, "technology_filter": %s, "top_providers": [' % (
+        json.dumps(run['total_prospects']), json.dumps(run['total_providers_analyzed']),
+        json.dumps(run['technology_filter'])
+    )
+    
+    for i, provider in enumerate(providers):
+        header = json.dumps(provider, ensure_ascii=False)[:-1]  # Reopen the object to append the list
+        yield (', ' if i else '') + header + ', "matched_prospects_full_list": ['
+        
+        chunk = []
+        for j, prospect in enumerate(cache_db.iter_run_matches(run_id, provider['rank'], country, technology)):
+            chunk.append((', ' if j else '') + json.dumps(prospect, ensure_ascii=False))
+            if len(chunk) >= 500:
+                yield ''.join(chunk)
+                chunk = []
+        yield ''.join(chunk) + ']}'
+    
+    yield ']}'
+
+
+@metrics.timed('export_run_to_excel')
+def export_run_to_excel(cache_db, run_id, output_file, provider_rank=None, country=None, technology=None):
+    """Export a stored run to Excel row by row (write-only workbook, constant memory)"""
+    run = cache_db.get_run(run_id)
+    providers = [p for p in run['top_providers'] if provider_rank is None or p['rank'] == provider_rank]
+    
+    wb = openpyxl.Workbook(write_only=True)
+    
+    def header_row(ws, values, color):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+            cell.alignment = Alignment(horizontal='center', wrap_text=True)
+            cells.append(cell)
+        return cells
+    
+    # Sheet 1: Summary
+    ws = wb.create_sheet('Summary')
+    for col, width in zip('ABCDEF', (8, 35, 15, 12, 15, 50)):
+        ws.column_dimensions[col].width = width
+    ws.append(header_row(ws, ['Rank', 'Provider Name', 'Country', 'Coverage %', 'Total Prospects', 'Ideal For'], "4472C4"))
+    for provider in providers:
+        ws.append([provider['rank'], provider['name'], provider['country'], provider['coverage_pct'],
+                   provider['total_prospects_matched'], provider['ideal_for']])
+    
+    # Sheet 2+: One sheet per provider with FULL prospect list
+    for provider in providers:
+        ws = wb.create_sheet(f"#{provider['rank']} {provider['name'][:25]}")
+        for col, width in zip('ABCDEFGH', (40, 12, 15, 40, 30, 12, 12, 60)):
+            ws.column_dimensions[col].width = width
+        
+        title = WriteOnlyCell(ws, value=f"Provider: {provider['name']}")
+        title.font = Font(size=14, bold=True)
+        ws.append([title])
+        ws.append([f"Coverage: {provider['coverage_pct']}% ({provider['total_prospects_matched']} prospects)"])
+        ws.append([f"Why Partner: {', '.join(provider['reasons'][:3])}"])
+        ws.append(header_row(ws, ['Company Name', 'Country', 'Revenue (EUR)', 'Website', 'Existing Machinery',
+                                  'Enrichment', 'Match Score', 'Why Good Match'], "70AD47"))
+        
+        for prospect in cache_db.iter_run_matches(run_id, provider['rank'], country, technology):
+            existing_machinery = prospect.get('existing_machinery', [])
+            machinery_str = ', '.join([
+                m.get('brand', '') if isinstance(m, dict) else str(m)
+                for m in existing_machinery
+            ]) if existing_machinery else 'None detected'
+            
+            ws.append([prospect['name'], prospect['country'], prospect['revenue'], prospect['website'],
+                       machinery_str, 'Full' if prospect.get('fully_enriched') else 'Fast',
+                       prospect.get('match_score', 0), '; '.join(prospect.get('match_reasons', []))])
+    
+    wb.save(output_file)
+
+
+def print_preview(results, top_n=10):
+    """Provisional top-N of a preview run with coverage confidence intervals"""
+    print("\n" + "="*90)
+    print(f"🔭 PREVIEW: PROVISIONAL TOP {top_n} MACHINERY PROVIDERS")
+    if results.get('technology_filter'):
+        print(f"🎯 FILTERED BY: {results['technology_filter'].upper()}")
+    print(f"   Estimated from {results['sample_size']} of {results['total_prospects']} prospects "
+          f"(95% confidence intervals)")
+    print("="*90)
+    print(f"\n{'#':<4} {'Provider':<40} {'Coverage':>9}   {'95% CI':<15} {'Est. prospects':>14}")
+    for p in results['top_providers']:
+        low, high = p['coverage_ci']
+        print(f"{p['rank']:<4} {p['name'][:40]:<40} {p['coverage_pct']:>8}%   {f'{low}–{high}%':<15} "
+              f"{p['total_prospects_matched']:>14,}")
+
+
+def load_prospects(csv_file):
+    """Prospect rows with a company name, limited to MAX_PROSPECTS_TO_ANALYZE"""
+    print(f"\n📁 Loading prospects from {csv_file}...")
+    df = pd.read_csv(csv_file, encoding='utf-8-sig')
+    df = df[df['Firma'].notna()]
+    print(f"✓ Loaded {len(df)} prospects")
+    
+    # Limit if needed
+    if len(df) > MAX_PROSPECTS_TO_ANALYZE:
+        print(f"⚡ Analyzing first {MAX_PROSPECTS_TO_ANALYZE} for performance")
+        df = df.head(MAX_PROSPECTS_TO_ANALYZE)
+    return df
+
+
+def parse_args(argv=None):
+    """Command line options for a run"""
+    parser = argparse.ArgumentParser(description="Match prospects with K2025 machinery providers")
+    parser.add_argument('--profile', action='append', choices=PROFILE_MODES, default=[],
+                        help="Profile each pipeline stage: cpu (cProfile .pstats) and/or memory "
+                             "(tracemalloc top allocations); repeat for both")
+    parser.add_argument('--offline', action='store_true',
+                        help="Replay websites and K2025 pages from the HTTP cache without fetching")
+    parser.add_argument('--technology', choices=sorted(TECHNOLOGY_KEYWORDS),
+                        help="Only keep prospects and providers tagged with this technology "
+                             "(default: FILTER_BY_TECHNOLOGY in config.py)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Score prospects as they are enriched (bounded queue) and print partial rankings")
+    parser.add_argument('--time-budget', type=parse_duration, metavar='DURATION',
+                        help="Finish within this time (e.g. 45m, 1h30m): the most valuable prospects get the "
+                             "website check first, the rest the fast path once the budget runs low")
+    parser.add_argument('--preview', nargs='?', type=int, const=PREVIEW_SAMPLE_SIZE, metavar='SAMPLE',
+                        help="Score a stratified sample (default %(const)s prospects) and print estimated "
+                             "coverage with 95%% confidence intervals; a later full run reuses its cached work")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main execution for 1500+ prospects"""
     
+    args = parse_args(argv)
+    budget = TimeBudget(args.time_budget) if args.time_budget else None
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    profiler = StageProfiler(args.profile, output_prefix=f"machinery_partners_{timestamp}_profile")
+    
     print("\n" + "="*90)
     print("🎯 SCALABLE MACHINERY MATCHER v2.0")
     print("   Optimized for 1500+ prospects & 1900+ K2025 exhibitors")
@@ -927,14 +2875,23 @@ def main():
     api_key = ANTHROPIC_API_KEY or input("\nEnter Anthropic API key: ").strip()
     csv_file = CSV_FILE_PATH or input("Enter CSV path: ").strip()
     
-    enable_scraping = input("\nDetect existing machinery from websites? (SLOW for 1500 prospects) [y/N]: ").strip().lower() == 'y'
+    if budget is not None:
+        # The budget decides how many websites get checked
+        enable_scraping = True
+        print(f"\n⏱  Time budget: {args.time_budget / 60:.1f} min (website checks while time allows)")
+    else:
+        enable_scraping = input("\nDetect existing machinery from websites? (SLOW for 1500 prospects) [y/N]: ").strip().lower() == 'y'
     
     top_n = int(input(f"How many top providers? (default 10): ").strip() or "10")
     
+    tech_filter = args.technology or FILTER_BY_TECHNOLOGY
+    
     # Initialize
     print("\n🔧 Initializing...")
+    metrics.reset()
     cache_db = CacheDB()
-    client = anthropic.Anthropic(api_key=api_key)
+    http_cache = open_http_cache(offline=args.offline or None)
+    client = anthropic.Anthropic(api_key=api_key, max_retries=0)
     
     # Test API
     try:
@@ -948,47 +2905,119 @@ def main():
         print(f"❌ API Error: {e}")
         return
     
-    # Load prospects
-    print(f"\n📁 Loading prospects from {csv_file}...")
-    df = pd.read_csv(csv_file, encoding='utf-8-sig')
-    df = df[df['Firma'].notna()]
-    print(f"✓ Loaded {len(df)} prospects")
+    if profiler.enabled:
+        print(f"🔬 Profiling stages: {', '.join(sorted(profiler.modes))}")
     
-    # Limit if needed
-    if len(df) > MAX_PROSPECTS_TO_ANALYZE:
-        print(f"⚡ Analyzing first {MAX_PROSPECTS_TO_ANALYZE} for performance")
-        df = df.head(MAX_PROSPECTS_TO_ANALYZE)
+    matcher = FastMachineryMatcher(api_key, cache_db, client=client, http_cache=http_cache)
+    
+    strata_sizes = {}
+    
+    def ingest():
+        """Load prospects (only a stratified sample of them in a preview)"""
+        prospects_df = load_prospects(csv_file)
+        if args.preview:
+            prospects_df, sizes = matcher.stratified_sample(prospects_df, args.preview, tech_filter)
+            strata_sizes.update(sizes)
+        return prospects_df
+    
+    def crawl():
+        """Scrape K2025 exhibitors (own DB connection, enrichment writes concurrently)"""
+        k2025_scraper = K2025Scraper(CacheDB(cache_db.db_path), http_cache)
+        providers = k2025_scraper.scrape_all_exhibitors()
+        
+        # Fallback to curated list if scraping fails
+        if len(providers) < 20:
+            print("⚠ Using fallback provider list")
+            providers = k2025_scraper.get_fallback_exhibitors()
+        
+        print(f"✓ {len(providers)} machinery providers loaded")
+        return providers
+    
+    # --stream: each provider profile is scored against the prospects seen so
+    # far as soon as its JSON object has streamed in (live.add_provider)
+    live = IncrementalScorer(matcher, [], tech_filter, keep_prospects=True) if args.stream and not args.preview else None
     
-    # Scrape K2025 exhibitors
-    k2025_scraper = K2025Scraper(cache_db)
-    providers = k2025_scraper.scrape_all_exhibitors()
+    def profile(crawl):
+        """AI profiles of the providers, while prospects are still being enriched"""
+        return matcher.profile_providers(matcher.provider_candidates(crawl, tech_filter), tech_filter,
+                                         on_profile=live.add_provider if live else None)
     
-    # Fallback to curated list if scraping fails
-    if len(providers) < 20:
-        print("⚠ Using fallback provider list")
-        providers = k2025_scraper.get_fallback_exhibitors()
+    def enrich(ingest, **_):
+        """Analyze prospects"""
+        return matcher.analyze_prospects_batch(ingest, enable_scraping, tech_filter, budget=budget)
     
-    print(f"✓ {len(providers)} machinery providers loaded")
+    def score(enrich, profile, crawl):
+        """Match analysis once both branches are done"""
+        if not enrich:
+            return None
+        if args.preview:
+            return matcher.preview_match_analysis(enrich, profile, strata_sizes, top_n, tech_filter)
+        return matcher.smart_match_analysis(enrich, crawl, top_n, tech_filter, provider_profiles=profile)
+    
+    # --stream: enrich feeds a bounded queue and scoring starts with the
+    # profiles instead of waiting for the last prospect. Sequential (profiled)
+    # runs need an unbounded queue since the scorer only starts afterwards.
+    stream = ProspectStream(maxsize=0 if profiler.enabled else None) if args.stream and not args.preview else None
+    
+    def stream_enrich(ingest, **_):
+        """Analyze prospects into the stream"""
+        return matcher.stream_prospects(ingest, stream, enable_scraping, tech_filter, budget=budget)
+    
+    def stream_score(**_):
+        """Score prospects as they arrive, against the provider profiles ready so far"""
+        return matcher.stream_match_analysis(stream, None, top_n, tech_filter, scorer=live)
+    
+    def rank(profile, **_):
+        """Final ranking once every prospect and provider is scored, in the profile order"""
+        live.reorder(profile)
+        if not live.providers:
+            print("⚠ No providers found matching the technology filter!")
+            return None
+        return live.ranking(top_n)
+    
+    # Prospect and provider branches run side by side; profiling keeps stages
+    # sequential so each report covers one stage only
+    pipeline = StageGraph(max_workers=1 if profiler.enabled else 4, stage_context=profiler.stage,
+                          on_error=stream.abort if stream else None)
+    pipeline.add('ingest', ingest).add('crawl', crawl).add('profile', profile, after=['crawl'])
+    # Website detection builds its brand dictionary from the crawled exhibitor list
+    pipeline.add('enrich', stream_enrich if stream else enrich,
+                 after=['ingest', 'crawl'] if enable_scraping else ['ingest'])
+    if stream:
+        # Scoring starts with the prospects, not after profiling
+        pipeline.add('score', stream_score, after=['ingest', 'crawl'] if enable_scraping else ['ingest'])
+        pipeline.add('rank', rank, after=['score', 'profile'])
+    else:
+        pipeline.add('score', score, after=['enrich', 'profile', 'crawl'])
+    outputs = pipeline.run()
+    pipeline.print_timeline()
     
-    # Analyze prospects
-    matcher = FastMachineryMatcher(api_key, cache_db)
-    enriched_prospects = matcher.analyze_prospects_batch(df, enable_scraping, tech_filter)
+    results = outputs['rank'] if stream else outputs['score']
+    prospect_count = outputs['enrich'] if stream else len(outputs['enrich'])
     
-    if not enriched_prospects:
+    if not prospect_count:
         print("\n❌ No prospects match the technology filter!")
         print("Try running without filter or enable web scraping for better detection.")
         return
     
-    # Match analysis
-    results = matcher.smart_match_analysis(enriched_prospects, providers, top_n, tech_filter)
-    
-    if results:
+    if results and args.preview:
+        print_preview(results, top_n)
+        tech_suffix = f"_{tech_filter}" if tech_filter else ""
+        json_file = f"machinery_preview{tech_suffix}_{timestamp}.json"
+        export_to_json(results, json_file)
+        print_summary(metrics.summary())
+        print(f"\n💡 Full ranking: run again without --preview. The {results['sample_size']} sampled prospects "
+              f"and the provider profiles are cached and will not be analyzed again.")
+    elif results:
         # Display summary
         print("\n" + "="*90)
         print(f"📊 TOP {top_n} MACHINERY PROVIDERS")
         if tech_filter:
             print(f"🎯 FILTERED BY: {tech_filter.upper()}")
-        print(f"   Analyzed: {len(enriched_prospects)} prospects")
+        print(f"   Analyzed: {prospect_count} prospects")
+        if budget is not None:
+            print(f"   Website-checked: {budget.count('full')} prospects "
+                  f"({time.monotonic() - budget.started:.0f}s of the {budget.seconds:.0f}s budget used)")
         print("="*90)
         
         for p in results['top_providers']:
@@ -999,8 +3028,6 @@ def main():
             print(f"   Top reasons: {', '.join(p['reasons'][:2])}")
         
         # Export to files
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
         print("\n" + "="*90)
         print("💾 EXPORTING RESULTS")
         print("="*90)
@@ -1009,8 +3036,16 @@ def main():
         excel_file = f"machinery_partners{tech_suffix}_{timestamp}.xlsx"
         json_file = f"machinery_partners{tech_suffix}_{timestamp}.json"
         
-        export_to_excel(results, excel_file)
-        export_to_json(results, json_file)
+        with profiler.stage('export'):
+            export_to_excel(results, excel_file)
+            export_to_json(results, json_file)
+        
+        # Store in the cache DB so the dashboard can page through the results
+        cache_db.save_run_results(timestamp, results)
+        run_summary = metrics.summary()
+        cache_db.save_run_metrics(timestamp, run_summary)
+        print(f"✓ Stored results as run {timestamp} in machinery_cache.db")
+        print_summary(run_summary)
         
         print("\n" + "="*90)
         print("✅ ANALYSIS COMPLETE!")
@@ -1026,17 +3061,19 @@ def main():
         print(f"      → Complete data in JSON format")
         print(f"\n   3. machinery_cache.db")
         print(f"      → Cached data for faster future runs")
+        print(f"      → Run {timestamp} browsable in the dashboard")
         
         print(f"\n💼 Next Steps:")
         print(f"   1. Open {excel_file}")
         print(f"   2. Review each provider's sheet")
         if tech_filter:
             print(f"   3. Contact {tech_filter} machinery specialists")
-            print(f"   4. Show them your {len(enriched_prospects)} {tech_filter} prospects!")
+            print(f"   4. Show them your {prospect_count} {tech_filter} prospects!")
         else:
             print(f"   3. Contact providers with their specific prospect lists")
             print(f"   4. Show them exactly which companies they can reach through you!")
-        
+    
+    profiler.print_summary()
     cache_db.conn.close()
 
 
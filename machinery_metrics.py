@@ -0,0 +1,203 @@
+"""
+MACHINERY MATCHER - METRICS
+Lightweight stage timing and counters for a pipeline run.
+
+Stage timings are inclusive (a stage nested in another is counted in both).
+The per-run summary is stored in the cache DB and the live values are
+exposed by the dashboard in Prometheus text format at /metrics.
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+
+class Metrics:
+    """Thread-safe stage timers, counters and gauges for one run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new run"""
+        with self._lock:
+            self.started_at = time.time()
+            self._stages = {}
+            self._counters = {}
+            self._gauges = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work under a stage name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator form of stage()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds):
+        """Add one timed call to a stage"""
+        with self._lock:
+            stats = self._stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def incr(self, name, value=1, **labels):
+        """Increase a counter, optionally labelled (e.g. cache='prospect')"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to its current value"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def counter(self, name, **labels):
+        """Current value of a counter (summed over labels when none are given)"""
+        with self._lock:
+            if labels:
+                return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+            return sum(v for (n, _), v in self._counters.items() if n == name)
+
+    def summary(self):
+        """Plain-dict summary of the run, suitable for JSON"""
+        with self._lock:
+            stages = {
+                name: {
+                    'calls': s['calls'],
+                    'seconds': round(s['seconds'], 4),
+                    'avg_ms': round(s['seconds'] / s['calls'] * 1000, 3) if s['calls'] else 0.0,
+                    'max_ms': round(s['max_seconds'] * 1000, 3)
+                }
+                for name, s in self._stages.items()
+            }
+            counters = {_format_key(k): v for k, v in self._counters.items()}
+            gauges = {_format_key(k): v for k, v in self._gauges.items()}
+            wall = time.time() - self.started_at
+
+        hits = self.counter('cache_hits')
+        misses = self.counter('cache_misses')
+        return {
+            'wall_seconds': round(wall, 3),
+            'stages': stages,
+            'counters': counters,
+            'gauges': gauges,
+            'cache_hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None
+        }
+
+    def to_prometheus(self, prefix='machinery'):
+        """Render the current values in Prometheus text exposition format"""
+        with self._lock:
+            stages = {name: dict(s) for name, s in self._stages.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Wall time spent in each pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter"
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {s["seconds"]:.6f}' for name, s in sorted(stages.items())]
+        lines += [
+            f"# HELP {prefix}_stage_calls_total Calls of each pipeline stage.",
+            f"# TYPE {prefix}_stage_calls_total counter"
+        ]
+        lines += [f'{prefix}_stage_calls_total{{stage="{name}"}} {s["calls"]}' for name, s in sorted(stages.items())]
+
+        for kind, values in (('counter', counters), ('gauge', gauges)):
+            names = sorted({name for name, _ in values})
+            for name in names:
+                metric = f"{prefix}_{name}_total" if kind == 'counter' else f"{prefix}_{name}"
+                lines.append(f"# TYPE {metric} {kind}")
+                for (n, labels), value in sorted(values.items()):
+                    if n == name:
+                        lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        hits = sum(v for (n, _), v in counters.items() if n == 'cache_hits')
+        misses = sum(v for (n, _), v in counters.items() if n == 'cache_misses')
+        if hits + misses:
+            lines.append(f"# TYPE {prefix}_cache_hit_ratio gauge")
+            lines.append(f"{prefix}_cache_hit_ratio {hits / (hits + misses):.4f}")
+
+        return '\n'.join(lines) + '\n'
+
+
+class InstrumentedSession(requests.Session):
+    """requests.Session that records HTTP time, status classes and bytes fetched"""
+
+    def request(self, method, url, *args, **kwargs):
+        try:
+            with metrics.stage('http_fetch'):
+                response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            metrics.incr('http_errors')
+            raise
+
+        metrics.incr('http_requests', status=f"{response.status_code // 100}xx")
+        if not kwargs.get('stream'):
+            metrics.incr('http_bytes_fetched', len(response.content))
+        return response
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+def _format_key(key):
+    name, labels = key
+    return name + _format_labels(labels)
+
+
+def record_llm_usage(message):
+    """Count tokens of an Anthropic Messages API response"""
+    usage = getattr(message, 'usage', None)
+    metrics.incr('llm_requests')
+    if usage is not None:
+        metrics.incr('llm_tokens', getattr(usage, 'input_tokens', 0) or 0, direction='input')
+        metrics.incr('llm_tokens', getattr(usage, 'output_tokens', 0) or 0, direction='output')
+
+
+def print_summary(summary, top=12):
+    """Print the slowest stages of a run"""
+    print("\n⏱  Stage timings (inclusive):")
+    stages = sorted(summary['stages'].items(), key=lambda item: item[1]['seconds'], reverse=True)
+    for name, s in stages[:top]:
+        print(f"   {name:<28} {s['seconds']:>9.2f}s  {s['calls']:>7} calls  avg {s['avg_ms']:.1f}ms")
+    if summary['cache_hit_ratio'] is not None:
+        print(f"   Cache hit ratio: {summary['cache_hit_ratio'] * 100:.1f}%")
+    tokens_in = summary['counters'].get('llm_tokens{direction="input"}', 0)
+    tokens_out = summary['counters'].get('llm_tokens{direction="output"}', 0)
+    if tokens_in or tokens_out:
+        print(f"   LLM tokens: {tokens_in:,} in / {tokens_out:,} out")
+    fetched = summary['counters'].get('http_bytes_fetched', 0)
+    if fetched:
+        print(f"   HTTP: {fetched / 1_048_576:.1f} MB fetched")
+    limits = {key[len('concurrency_limit{target="'):-2]: value for key, value in summary['gauges'].items()
+              if key.startswith('concurrency_limit{')}
+    if limits:
+        apis = ', '.join(f"{name[4:]} {value:g}" for name, value in sorted(limits.items()) if name.startswith('api:'))
+        hosts = [value for name, value in limits.items() if name.startswith('host:')]
+        print(f"   Adaptive limits: {apis or 'no API calls'}"
+              + (f"; {len(hosts)} hosts adjusted (lowest {min(hosts):g})" if hosts else ''))
+
+
+# Process-wide metrics for the current run
+metrics = Metrics()
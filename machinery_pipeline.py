@@ -0,0 +1,95 @@
+"""
+MACHINERY MATCHER - STAGE SCHEDULER
+Runs the pipeline as a DAG of stages instead of one long sequence:
+
+    ingest ──► enrich ───┐
+                         ├──► score
+    crawl  ──► profile ──┘
+
+A stage starts as soon as every stage it depends on has finished, so
+independent branches overlap and the wall time approaches the longest
+branch instead of the sum of all stages. Each stage receives the results
+of its dependencies as keyword arguments named after them.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+
+from machinery_metrics import metrics
+
+
+class StageGraph:
+    """Small DAG scheduler for pipeline stages"""
+
+    def __init__(self, max_workers=4, stage_context=None, on_error=None):
+        """stage_context: optional context manager factory wrapped around each stage (e.g. StageProfiler.stage)
+        on_error: called as soon as a stage fails, e.g. to release stages blocked on a queue
+        """
+        self.max_workers = max_workers
+        self.stage_context = stage_context
+        self.on_error = on_error
+        self.stages = {}
+        self.timeline = {}
+
+    def add(self, name, func, after=()):
+        """Register a stage; its dependencies must already be registered (keeps the graph acyclic)"""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already registered")
+        missing = [dep for dep in after if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stage(s): {', '.join(missing)}")
+        self.stages[name] = (func, tuple(after))
+        return self
+
+    def run(self):
+        """Run every stage, each once its dependencies are done; returns {stage: result}
+
+        The first failing stage's exception is re-raised once the stages
+        already running have finished; stages depending on it never start.
+        """
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+        self.timeline = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage') as executor:
+            def launch_ready():
+                for name, (func, after) in list(pending.items()):
+                    if all(dep in results for dep in after):
+                        del pending[name]
+                        inputs = {dep: results[dep] for dep in after}
+                        running[executor.submit(self._run_stage, name, func, inputs, started)] = name
+
+            launch_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None and self.on_error is not None:
+                        self.on_error()
+                    results[name] = future.result()
+                launch_ready()
+
+        return results
+
+    def _run_stage(self, name, func, inputs, started):
+        begin = time.perf_counter()
+        try:
+            with metrics.stage(f"pipeline_{name}"), (self.stage_context(name) if self.stage_context else nullcontext()):
+                return func(**inputs)
+        finally:
+            self.timeline[name] = (begin - started, time.perf_counter() - started)
+
+    def print_timeline(self, width=40):
+        """When each stage ran, relative to the start of the run"""
+        if not self.timeline:
+            return
+        total = max(end for _, end in self.timeline.values()) or 1.0
+        busy = sum(end - begin for begin, end in self.timeline.values())
+        print(f"\n⏱  Stage timeline ({total:.1f}s wall, {busy:.1f}s of stage work):")
+        for name, (begin, end) in sorted(self.timeline.items(), key=lambda item: item[1]):
+            offset = int(begin / total * width)
+            length = max(1, int((end - begin) / total * width))
+            print(f"   {name:<10} {' ' * offset}{'█' * length:<{width - offset}}  {begin:6.1f}s → {end:6.1f}s")
@@ -0,0 +1,181 @@
+"""
+MACHINERY MATCHER - PROFILING
+Per-stage cProfile / tracemalloc hooks, enabled with --profile cpu|memory.
+
+Each stage writes its own report next to the run's Excel/JSON outputs:
+    <prefix>_<stage>.pstats          (cpu; open with pstats or snakeviz)
+    <prefix>_<stage>_memory.txt      (memory; top allocation sites)
+and print_summary() shows the top hotspots over the whole run.
+
+cProfile only sees the thread it was enabled in, so while a stage is CPU
+profiled the worker pools that crawl websites and call the LLM
+(worker_pool, run_inline) run their tasks one by one in the stage's own
+thread. The .pstats then hold the real work, at the cost of stage timings
+that are sequential rather than concurrent. Background cache refreshes
+stay in their threads and are not profiled.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import tracemalloc
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+PROFILE_MODES = ('cpu', 'memory')
+
+# Keep the profilers' own bookkeeping out of the allocation reports
+MEMORY_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, __file__)
+]
+
+
+_inline = threading.Event()  # Set while a CPU-profiled stage runs
+
+
+def run_inline():
+    """Whether worker pools should run their tasks in the calling thread (a stage is CPU profiled)"""
+    return _inline.is_set()
+
+
+class InlineExecutor(Executor):
+    """Executor running each task in the submitting thread, before submit() returns"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def worker_pool(max_workers, thread_name_prefix=''):
+    """ThreadPoolExecutor, or an InlineExecutor while a stage is CPU profiled"""
+    if run_inline():
+        return InlineExecutor()
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+
+class StageProfiler:
+    """Wraps pipeline stages with cProfile and/or tracemalloc"""
+
+    def __init__(self, modes=(), output_prefix='machinery_profile', top=20):
+        unknown = set(modes) - set(PROFILE_MODES)
+        if unknown:
+            raise ValueError(f"Unknown profile mode(s): {', '.join(sorted(unknown))}")
+        self.modes = set(modes)
+        self.output_prefix = output_prefix
+        self.top = top
+        self.files = []
+        self._cpu_stats = None
+        self._memory = {}
+
+    @property
+    def enabled(self):
+        return bool(self.modes)
+
+    @contextmanager
+    def stage(self, name):
+        """Profile one stage; a no-op when profiling is off"""
+        if not self.modes:
+            yield
+            return
+
+        profiler = None
+        before = None
+        started_tracing = False
+        if 'memory' in self.modes:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                started_tracing = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot().filter_traces(MEMORY_FILTERS)
+        if 'cpu' in self.modes:
+            profiler = cProfile.Profile()
+            _inline.set()
+            profiler.enable()
+
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _inline.clear()
+                self._save_cpu(name, profiler)
+            if before is not None:
+                self._save_memory(name, before)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def _save_cpu(self, name, profiler):
+        path = f"{self.output_prefix}_{name}.pstats"
+        profiler.dump_stats(path)
+        self.files.append(path)
+
+        if self._cpu_stats is None:
+            self._cpu_stats = pstats.Stats(profiler, stream=io.StringIO())
+        else:
+            self._cpu_stats.add(profiler)
+
+    def _save_memory(self, name, before):
+        after = tracemalloc.take_snapshot().filter_traces(MEMORY_FILTERS)
+        _, peak = tracemalloc.get_traced_memory()
+        diffs = after.compare_to(before, 'lineno')
+
+        path = f"{self.output_prefix}_{name}_memory.txt"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"Stage: {name}\n")
+            f.write(f"Peak traced memory: {peak / 1_048_576:.1f} MB\n\n")
+            f.write(f"Top {self.top} allocation sites (growth during stage):\n")
+            for stat in diffs[:self.top]:
+                f.write(f"{stat}\n")
+        self.files.append(path)
+
+        self._memory[name] = {
+            'peak_mb': peak / 1_048_576,
+            'top': [(str(stat.traceback[0]), stat.size_diff, stat.count_diff) for stat in diffs[:self.top]]
+        }
+
+    def summary_text(self):
+        """Top hotspots over all stages"""
+        out = io.StringIO()
+        if self._cpu_stats is not None:
+            out.write(f"Top {self.top} CPU hotspots (by own time):\n")
+            self._cpu_stats.stream = out
+            self._cpu_stats.sort_stats('tottime').print_stats(self.top)
+        if self._memory:
+            out.write("\nMemory per stage:\n")
+            for name, info in self._memory.items():
+                out.write(f"  {name:<24} peak {info['peak_mb']:.1f} MB\n")
+            allocations = sorted(
+                ((site, size, count, name) for name, info in self._memory.items() for site, size, count in info['top']),
+                key=lambda item: item[1], reverse=True
+            )
+            out.write(f"\nTop {self.top} allocation sites:\n")
+            for site, size, count, name in allocations[:self.top]:
+                out.write(f"  {size / 1024:>10.1f} KiB  {count:>8} blocks  {site}  [{name}]\n")
+        return out.getvalue()
+
+    def print_summary(self):
+        """Print and save the hotspot summary"""
+        if not self.modes:
+            return
+        text = self.summary_text()
+        path = f"{self.output_prefix}_summary.txt"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self.files.append(path)
+
+        print("\n" + "="*90)
+        print("🔬 PROFILE SUMMARY")
+        print("="*90)
+        print(text)
+        print("Profile files:")
+        for file in self.files:
+            print(f"   {file}")
@@ -0,0 +1,117 @@
+"""
+MACHINERY MATCHER - PROGRESS EVENTS
+Structured progress bus shared by the pipeline stages and the dashboard.
+
+Stages publish (stage, done, total) updates; the bus adds rate and ETA and
+fans each event out to every subscriber queue (e.g. one per SSE client).
+"""
+
+import json
+import queue
+import threading
+import time
+
+
+class ProgressBus:
+    """Thread-safe publish/subscribe hub for pipeline progress events"""
+
+    def __init__(self, max_queue_size=1000):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._started = {}
+        self._latest = {}
+
+    def start_stage(self, stage, total=0, message=''):
+        """Mark the beginning of a stage and reset its rate clock"""
+        with self._lock:
+            self._started[stage] = time.time()
+        self.publish(stage, 0, total, message, status='running')
+
+    def publish(self, stage, done, total, message='', status='running'):
+        """Publish a progress update for a stage"""
+        now = time.time()
+        with self._lock:
+            started = self._started.setdefault(stage, now)
+            elapsed = now - started
+            rate = done / elapsed if elapsed > 0 and done else 0.0
+            remaining = max(total - done, 0)
+            eta = remaining / rate if rate > 0 else None
+
+            event = {
+                'stage': stage,
+                'status': status,
+                'done': done,
+                'total': total,
+                'percent': round(done / total * 100, 1) if total else 0.0,
+                'rate': round(rate, 2),
+                'eta_seconds': round(eta, 1) if eta is not None else None,
+                'elapsed_seconds': round(elapsed, 1),
+                'message': message,
+                'timestamp': now
+            }
+            self._latest[stage] = event
+            subscribers = list(self._subscribers)
+
+        for q in subscribers:
+            self._offer(q, event)
+
+        return event
+
+    def finish_stage(self, stage, message=''):
+        """Mark a stage as complete"""
+        with self._lock:
+            last = self._latest.get(stage, {})
+        total = last.get('total', 0)
+        done = total or last.get('done', 0)
+        self.publish(stage, done, total, message, status='done')
+
+    def subscribe(self):
+        """Register a subscriber; it receives the latest event of every stage first"""
+        q = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            for event in self._latest.values():
+                self._offer(q, event)
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        """Remove a subscriber queue"""
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def snapshot(self):
+        """Latest event for every stage seen so far"""
+        with self._lock:
+            return list(self._latest.values())
+
+    def reset(self):
+        """Forget stage state (start of a new run); subscribers stay attached"""
+        with self._lock:
+            self._started.clear()
+            self._latest.clear()
+
+    @staticmethod
+    def _offer(q, event):
+        """Non-blocking put; slow subscribers lose their oldest events"""
+        try:
+            q.put_nowait(event)
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass
+
+
+def format_sse(event, event_name='progress'):
+    """Encode an event as a Server-Sent Events message"""
+    return f"event: {event_name}\ndata: {json.dumps(event)}\n\n"
+
+
+# Process-wide bus used by the pipeline and the dashboard
+progress_bus = ProgressBus()
@@ -0,0 +1,233 @@
+"""
+MACHINERY MATCHER - SHARDED RUNS
+Splits one run over several processes (or hosts sharing a work directory
+and cache directory) and merges the partial results deterministically.
+
+Usage:
+    python3 machinery_shards.py local --shards 4 --csv prospects.csv          # all steps on this machine
+    python3 machinery_shards.py prepare --work-dir shards/                    # K2025 crawl + AI profiles, once
+    python3 machinery_shards.py run --shards 4 --shard 0 --csv prospects.csv  # one per process / host
+    python3 machinery_shards.py merge --work-dir shards/ --top-n 10           # global ranking + exports
+
+A prospect belongs to shard md5("Firma|Web1") % N, so every host computes
+the same split from the same CSV. All shards score against the provider
+profiles written by prepare, and each writes its per-provider match lists
+with the prospects' CSV positions. merge puts the lists back in CSV order,
+so coverage_pct and the top-N ranking are identical to a single-process run.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from machinery_metrics import metrics
+from machinery_matcher import (ANTHROPIC_API_KEY, CSV_FILE_PATH, TOP_N_PROVIDERS, ENABLE_WEB_SCRAPING,
+                               FILTER_BY_TECHNOLOGY, HTTP_CACHE_TTL, HTTP_CACHE_OFFLINE, TECHNOLOGY_KEYWORDS,
+                               CacheDB, HTTPCache, K2025Scraper, FastMachineryMatcher, IncrementalScorer,
+                               load_prospects, export_to_excel, export_to_json)
+
+
+PLAN_FILE = 'plan.json'
+
+
+def shard_of(company, website, shards):
+    """Stable shard number of a prospect (same on every host and Python version)"""
+    key = f"{company if pd.notna(company) else ''}|{website if pd.notna(website) else ''}"
+    return int(hashlib.md5(key.encode('utf-8')).hexdigest(), 16) % shards
+
+
+def shard_rows(df, shards, shard):
+    """Rows of one shard, keeping their original index labels"""
+    websites = df['Web1'] if 'Web1' in df.columns else [None] * len(df)
+    mask = [shard_of(company, website, shards) == shard for company, website in zip(df['Firma'], websites)]
+    return df[mask]
+
+
+def shard_file(work_dir, shards, shard):
+    return os.path.join(work_dir, f"shard_{shard:03d}_of_{shards:03d}.json")
+
+
+def open_caches(cache_dir):
+    """Cache DB and HTTP cache in a directory shared by all shards"""
+    os.makedirs(cache_dir, exist_ok=True)
+    return (CacheDB(os.path.join(cache_dir, 'machinery_cache.db')),
+            HTTPCache(os.path.join(cache_dir, 'http_cache.db'), HTTP_CACHE_TTL, HTTP_CACHE_OFFLINE))
+
+
+def load_plan(work_dir):
+    with open(os.path.join(work_dir, PLAN_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def prepare(work_dir, cache_dir, technology_filter=None):
+    """Crawl K2025 and profile providers once; every shard scores against this plan"""
+    os.makedirs(work_dir, exist_ok=True)
+    cache_db, http_cache = open_caches(cache_dir)
+
+    k2025_scraper = K2025Scraper(cache_db, http_cache)
+    providers = k2025_scraper.scrape_all_exhibitors()
+    if len(providers) < 20:
+        print("⚠ Using fallback provider list")
+        providers = k2025_scraper.get_fallback_exhibitors()
+
+    matcher = FastMachineryMatcher(ANTHROPIC_API_KEY, cache_db, http_cache=http_cache)
+    # Cached profiles (e.g. from queue workers or an earlier plan) are reused
+    profiles = matcher.profile_providers(matcher.provider_candidates(providers, technology_filter), technology_filter)
+
+    profiles_json = json.dumps(profiles, sort_keys=True, ensure_ascii=False)
+    plan = {
+        'plan_id': hashlib.md5(f"{technology_filter}|{profiles_json}".encode('utf-8')).hexdigest()[:12],
+        'technology_filter': technology_filter,
+        'profiles': profiles
+    }
+    with open(os.path.join(work_dir, PLAN_FILE), 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=1, ensure_ascii=False)
+    cache_db.conn.close()
+    http_cache.close()
+    print(f"✓ Plan {plan['plan_id']}: {len(profiles)} provider profiles → {os.path.join(work_dir, PLAN_FILE)}")
+    return plan
+
+
+def run_shard(work_dir, cache_dir, csv_file, shards, shard, enable_scraping=False):
+    """Enrich and score one shard; writes its partial per-provider results"""
+    plan = load_plan(work_dir)
+    df = shard_rows(load_prospects(csv_file), shards, shard)
+    print(f"🧩 Shard {shard + 1}/{shards}: {len(df)} prospects")
+
+    metrics.reset()
+    cache_db, http_cache = open_caches(cache_dir)
+    matcher = FastMachineryMatcher(ANTHROPIC_API_KEY, cache_db, http_cache=http_cache)
+    scorer = IncrementalScorer(matcher, plan['profiles'], plan['technology_filter'])
+    for position, prospect in matcher.iter_prospects(df, enable_scraping, plan['technology_filter'], with_rows=True):
+        scorer.add(prospect, int(position))
+
+    partial = {'plan_id': plan['plan_id'], 'shards': shards, 'shard': shard, **scorer.partial(),
+               'metrics': metrics.summary()}
+    path = shard_file(work_dir, shards, shard)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(partial, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)  # Never leave a half-written shard for merge to pick up
+    cache_db.conn.close()
+    http_cache.close()
+    print(f"✓ Shard {shard + 1}/{shards}: {scorer.total} prospects scored → {path}")
+    return path
+
+
+def merge(work_dir, cache_dir, top_n=10, run_id=None):
+    """Global ranking from every shard's partial results; exports it like a normal run"""
+    plan = load_plan(work_dir)
+    files = sorted(f for f in os.listdir(work_dir) if f.startswith('shard_') and f.endswith('.json'))
+    if not files:
+        raise FileNotFoundError(f"No shard results in {work_dir}")
+
+    partials = []
+    for name in files:
+        with open(os.path.join(work_dir, name), encoding='utf-8') as f:
+            partials.append(json.load(f))
+
+    shards = partials[0]['shards']
+    if any(p['shards'] != shards for p in partials):
+        raise ValueError("Shard results come from runs with different shard counts")
+    missing = sorted(set(range(shards)) - {p['shard'] for p in partials})
+    if missing:
+        raise ValueError(f"Missing results for shard(s) {', '.join(str(i) for i in missing)} of {shards}")
+    stale = [p['shard'] for p in partials if p['plan_id'] != plan['plan_id']]
+    if stale:
+        raise ValueError(f"Shard(s) {', '.join(str(i) for i in stale)} were scored against an older plan")
+
+    scorer = IncrementalScorer.from_partials(plan['profiles'], partials, plan['technology_filter'])
+    results = scorer.ranking(top_n)
+
+    run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+    tech_suffix = f"_{plan['technology_filter']}" if plan['technology_filter'] else ""
+    excel_file = os.path.join(work_dir, f"machinery_partners{tech_suffix}_{run_id}.xlsx")
+    json_file = os.path.join(work_dir, f"machinery_partners{tech_suffix}_{run_id}.json")
+    export_to_excel(results, excel_file)
+    export_to_json(results, json_file)
+
+    cache_db, http_cache = open_caches(cache_dir)
+    cache_db.save_run_results(run_id, results)
+    cache_db.conn.close()
+    http_cache.close()
+
+    print(f"\n📊 Merged {shards} shards: {results['total_prospects']} prospects, "
+          f"{results['total_providers_analyzed']} providers")
+    for p in results['top_providers']:
+        print(f"   #{p['rank']:<3} {p['name']:<40} {p['coverage_pct']:>5}% ({p['total_prospects_matched']} prospects)")
+    print(f"✓ Stored as run {run_id}")
+    return results
+
+
+def run_local(args):
+    """prepare (unless a plan for the same technology filter exists), one process per shard, then merge"""
+    plan_path = os.path.join(args.work_dir, PLAN_FILE)
+    if not os.path.exists(plan_path) or load_plan(args.work_dir)['technology_filter'] != args.technology:
+        prepare(args.work_dir, args.cache_dir, args.technology)
+    for name in os.listdir(args.work_dir):
+        if name.startswith('shard_'):
+            os.remove(os.path.join(args.work_dir, name))
+
+    processes = []
+    for shard in range(args.shards):
+        command = [sys.executable, os.path.abspath(__file__), 'run', '--shards', str(args.shards),
+                   '--shard', str(shard), '--csv', args.csv, '--work-dir', args.work_dir,
+                   '--cache-dir', args.cache_dir]
+        command.append('--scrape' if args.scrape else '--no-scrape')
+        log = open(os.path.join(args.work_dir, f"shard_{shard:03d}.log"), 'w', encoding='utf-8')
+        processes.append((shard, subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT), log))
+    print(f"🚀 {args.shards} shard processes started (logs in {args.work_dir})")
+
+    failed = []
+    for shard, process, log in processes:
+        if process.wait() != 0:
+            failed.append(shard)
+        log.close()
+    if failed:
+        raise RuntimeError(f"Shard(s) {', '.join(str(i) for i in failed)} failed; see their logs")
+    return merge(args.work_dir, args.cache_dir, args.top_n)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded machinery matcher runs")
+    parser.add_argument('command', choices=['local', 'prepare', 'run', 'merge'])
+    parser.add_argument('--work-dir', default='shards', help="Plan and shard results (shared by all hosts)")
+    parser.add_argument('--cache-dir', default='.', help="Directory of machinery_cache.db / http_cache.db")
+    parser.add_argument('--csv', default=CSV_FILE_PATH, help="Prospect CSV")
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shard', type=int, help="Shard to run (0-based)")
+    parser.add_argument('--scrape', action=argparse.BooleanOptionalAction, default=ENABLE_WEB_SCRAPING,
+                        help="Detect existing machinery from websites")
+    parser.add_argument('--technology', choices=sorted(TECHNOLOGY_KEYWORDS), default=FILTER_BY_TECHNOLOGY,
+                        help="Technology filter (prepare/local; stored in the plan)")
+    parser.add_argument('--top-n', type=int, default=TOP_N_PROVIDERS)
+    args = parser.parse_args(argv)
+    if args.command == 'run' and (args.shard is None or not 0 <= args.shard < args.shards):
+        parser.error("run needs --shard between 0 and --shards - 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("\n" + "="*70)
+    print(f"🧩 SHARDED RUN: {args.command}")
+    print("="*70)
+
+    if args.command == 'prepare':
+        prepare(args.work_dir, args.cache_dir, args.technology)
+    elif args.command == 'run':
+        run_shard(args.work_dir, args.cache_dir, args.csv, args.shards, args.shard, args.scrape)
+    elif args.command == 'merge':
+        merge(args.work_dir, args.cache_dir, args.top_n)
+    else:
+        run_local(args)
+
+
+if __name__ == '__main__':
+    main()
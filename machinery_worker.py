@@ -0,0 +1,190 @@
+"""
+MACHINERY MATCHER - QUEUE WORKERS
+Durable task queue (the `tasks` table in machinery_cache.db) for the slow
+parts of a run: website scraping and AI provider profiling. Any number of
+worker processes can share it.
+
+Usage:
+    python3 machinery_worker.py enqueue --csv prospects.csv    # scrape tasks + provider profile batches
+    python3 machinery_worker.py worker                         # run tasks until stopped; start as many as needed
+    python3 machinery_worker.py worker --kinds scrape --exit-when-idle
+    python3 machinery_worker.py status
+
+Workers write their results to the normal cache tables (prospect_data,
+provider_data), so the next `python3 machinery_matcher.py` run finds them as
+cache hits. A task stays leased for TASK_LEASE_SECONDS; if its worker crashes
+the lease expires and another worker picks it up, and failed tasks are
+retried up to TASK_MAX_ATTEMPTS times.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import time
+
+from machinery_metrics import metrics
+from machinery_matcher import (ANTHROPIC_API_KEY, CSV_FILE_PATH, FILTER_BY_TECHNOLOGY, TECHNOLOGY_KEYWORDS,
+                               CacheDB, K2025Scraper, FastMachineryMatcher, open_http_cache, load_prospects,
+                               has_website)
+
+
+TASK_KINDS = ('scrape', 'profile')
+
+
+def enqueue_scrape_tasks(cache_db, matcher, prospects_df, technology_filter=None):
+    """One scrape task per prospect website without a fresh scraped cache row"""
+    queued = 0
+    for row, processes in matcher.tag_prospects(prospects_df, technology_filter):
+        website = row.get('Web1', '')
+        if not has_website(website):
+            continue
+        cached, state = cache_db.lookup_prospect_cache(website)
+        if cached and state == 'fresh' and 'existing_machinery' in cached:
+            continue
+        payload = {'row': json.loads(row.to_json()), 'processes': processes}
+        queued += cache_db.enqueue_task('scrape', website, payload, commit=False)
+    cache_db.conn.commit()
+    return queued
+
+
+def enqueue_profile_tasks(cache_db, matcher, providers, technology_filter=None):
+    """Profile batches (packed as for one AI request each) for providers without a cached AI profile"""
+    candidates = matcher.provider_candidates(providers, technology_filter)
+    cached = cache_db.get_provider_profiles([p['name'] for p in candidates], technology_filter)
+    missing = [p for p in candidates if p['name'] not in cached]
+    queued = 0
+    for batch in matcher.pack_profile_batches(missing):
+        key = hashlib.md5('|'.join([technology_filter or ''] + [p['name'] for p in batch]).encode('utf-8')).hexdigest()
+        queued += cache_db.enqueue_task('profile', key, {'providers': batch, 'technology_filter': technology_filter},
+                                        commit=False)
+    cache_db.conn.commit()
+    return queued
+
+
+def run_scrape_task(matcher, payload):
+    """Detect machinery on one prospect website and cache the prospect record
+    
+    Raises when the homepage could not be loaded, so the task is retried;
+    nothing is cached then, as the site was not checked.
+    """
+    row = payload['row']
+    data = matcher._prospect_record(row, payload['processes'], enable_scraping=True)
+    if 'existing_machinery' not in data:
+        raise RuntimeError(f"Homepage {row['Web1']} unreachable")
+    matcher.cache.save_prospect_cache(row['Web1'], row.get('Firma', ''), data)
+
+
+def run_profile_task(matcher, payload):
+    """Profile one batch of providers with AI and cache the profiles
+    
+    Raises when any provider only got a basic fallback profile, so the task is
+    retried; the complete profiles are cached either way, and a retry only
+    profiles the providers still missing.
+    """
+    profiles = matcher.profile_providers(payload['providers'], payload['technology_filter'])
+    if not profiles:
+        raise RuntimeError("No profiles in the AI response")
+    basic = [p['name'] for p in profiles if p.get('basic')]
+    if basic:
+        raise RuntimeError(f"No AI profile for {len(basic)} provider(s): {', '.join(basic[:5])}")
+
+
+HANDLERS = {'scrape': run_scrape_task, 'profile': run_profile_task}
+
+
+def work(cache_db, matcher, kinds=TASK_KINDS, exit_when_idle=False, poll_interval=5.0, owner=None):
+    """Lease and run tasks one at a time until stopped (or the queue is empty)"""
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    done = failed = 0
+    print(f"👷 Worker {owner} taking {', '.join(kinds)} tasks")
+    while True:
+        tasks = cache_db.lease_tasks(owner, kinds)
+        if not tasks:
+            if exit_when_idle and not any(
+                counts.get('pending', 0) + counts.get('leased', 0)
+                for kind, counts in cache_db.task_counts().items() if kind in kinds
+            ):
+                break
+            time.sleep(poll_interval)
+            continue
+
+        for task_id, kind, key, payload in tasks:
+            try:
+                with metrics.stage(f"task_{kind}"):
+                    HANDLERS[kind](matcher, payload)
+            except KeyboardInterrupt:
+                cache_db.fail_task(task_id, owner, 'worker interrupted')
+                raise
+            except Exception as e:
+                failed += 1
+                metrics.incr('tasks_failed', kind=kind)
+                cache_db.fail_task(task_id, owner, e)
+                print(f"  ⚠ {kind} {key}: {e}")
+            else:
+                done += 1
+                metrics.incr('tasks_done', kind=kind)
+                if not cache_db.complete_task(task_id, owner):
+                    print(f"  ⚠ {kind} {key}: lease expired before completion (result kept)")
+                print(f"  ✓ {kind} {key}")
+
+    print(f"✓ Queue empty: {done} tasks done, {failed} failed attempts")
+    return done, failed
+
+
+def print_status(cache_db):
+    print(f"\n{'Kind':<10} " + ' '.join(f"{state:>8}" for state in ('pending', 'leased', 'done', 'failed')))
+    print("-" * 47)
+    for kind, counts in sorted(cache_db.task_counts().items()):
+        print(f"{kind:<10} " + ' '.join(f"{counts.get(state, 0):>8,}" for state in ('pending', 'leased', 'done', 'failed')))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Machinery matcher task queue")
+    parser.add_argument('command', choices=['enqueue', 'worker', 'status'])
+    parser.add_argument('--db', default='machinery_cache.db', help="Cache database file (holds the queue)")
+    parser.add_argument('--csv', default=CSV_FILE_PATH, help="Prospect CSV (enqueue)")
+    parser.add_argument('--technology', choices=sorted(TECHNOLOGY_KEYWORDS), default=FILTER_BY_TECHNOLOGY)
+    parser.add_argument('--kinds', default=','.join(TASK_KINDS), help="Task kinds this worker takes")
+    parser.add_argument('--exit-when-idle', action='store_true', help="Stop once no task is pending or leased")
+    parser.add_argument('--poll', type=float, default=5.0, help="Seconds between polls of an empty queue")
+    args = parser.parse_args(argv)
+    args.kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    unknown = set(args.kinds) - set(TASK_KINDS)
+    if unknown:
+        parser.error(f"unknown task kind(s): {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache_db = CacheDB(args.db)
+
+    print("\n" + "="*70)
+    print(f"📬 TASK QUEUE: {args.command} ({args.db})")
+    print("="*70)
+
+    if args.command == 'enqueue':
+        http_cache = open_http_cache()
+        matcher = FastMachineryMatcher(ANTHROPIC_API_KEY, cache_db, http_cache=http_cache)
+        prospects = enqueue_scrape_tasks(cache_db, matcher, load_prospects(args.csv), args.technology)
+        k2025_scraper = K2025Scraper(cache_db, http_cache)
+        providers = k2025_scraper.scrape_all_exhibitors()
+        if len(providers) < 20:
+            providers = k2025_scraper.get_fallback_exhibitors()
+        batches = enqueue_profile_tasks(cache_db, matcher, providers, args.technology)
+        print(f"✓ Queued {prospects} scrape tasks and {batches} profile batches")
+    elif args.command == 'worker':
+        matcher = FastMachineryMatcher(ANTHROPIC_API_KEY, cache_db, http_cache=open_http_cache())
+        try:
+            work(cache_db, matcher, args.kinds, args.exit_when_idle, args.poll)
+        except KeyboardInterrupt:
+            print("\n⚠ Worker stopped")
+
+    print_status(cache_db)
+    cache_db.conn.close()
+
+
+if __name__ == '__main__':
+    main()